@@ -0,0 +1,94 @@
+import sqlite3
+import threading
+from typing import Optional
+
+
+class CheckpointStore:
+    """
+    Records which units of work a sync has completed, keyed by update tag, in a local SQLite file so that a sync that
+    died part way through can be rerun with the same update tag and skip what is already in the graph.
+
+    A unit is a (stage, account, resource) triple, e.g. ('aws', '123456789012', 'ec2:instance'). Coarser units leave
+    the trailing parts empty, e.g. ('create-indexes', '', '') for a whole stage.
+    """
+
+    def __init__(self, path: str, update_tag: int):
+        self.path = path
+        self.update_tag = update_tag
+        self._lock = threading.Lock()
+        # Units are recorded from the worker threads of concurrent account and resource syncs
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS completed_units (
+                    update_tag INTEGER NOT NULL,
+                    stage TEXT NOT NULL,
+                    account TEXT NOT NULL,
+                    resource TEXT NOT NULL,
+                    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (update_tag, stage, account, resource)
+                )
+                """,
+            )
+
+    def is_complete(self, stage: str, account: str = '', resource: str = '') -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM completed_units WHERE update_tag = ? AND stage = ? AND account = ? AND resource = ?",
+                (self.update_tag, stage, account, resource),
+            ).fetchone()
+        return row is not None
+
+    def mark_complete(self, stage: str, account: str = '', resource: str = '') -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO completed_units (update_tag, stage, account, resource) VALUES (?, ?, ?, ?)",
+                (self.update_tag, stage, account, resource),
+            )
+
+    def clear(self) -> None:
+        """
+        Forgets every unit completed under this store's update tag, and under older update tags. Called once a sync
+        succeeds: the failed syncs before it will not be resumed, since rerunning one would overwrite newer data with
+        an older update tag. Units of newer update tags are kept, they may belong to a sync that is still running.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM completed_units WHERE update_tag <= ?", (self.update_tag,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+# Checkpoint store of the current sync, or None if checkpointing is off. Set from cartography.config via
+# set_checkpoint_store().
+_checkpoint_store: Optional[CheckpointStore] = None
+
+
+def set_checkpoint_store(checkpoint_store: Optional[CheckpointStore]) -> None:
+    global _checkpoint_store
+    if _checkpoint_store is not None and _checkpoint_store is not checkpoint_store:
+        _checkpoint_store.close()
+    _checkpoint_store = checkpoint_store
+
+
+def get_checkpoint_store() -> Optional[CheckpointStore]:
+    return _checkpoint_store
+
+
+def is_complete(stage: str, account: str = '', resource: str = '') -> bool:
+    """
+    :return: True if checkpointing is on and the given unit was completed by an earlier run with the same update tag.
+    """
+    if _checkpoint_store is None:
+        return False
+    return _checkpoint_store.is_complete(stage, account, resource)
+
+
+def mark_complete(stage: str, account: str = '', resource: str = '') -> None:
+    """
+    Records that the given unit completed, if checkpointing is on.
+    """
+    if _checkpoint_store is not None:
+        _checkpoint_store.mark_complete(stage, account, resource)
@@ -111,6 +111,145 @@ class CLI:
                 'See https://neo4j.com/docs/api/python-driver/4.4/api.html#database.'
             ),
         )
+        parser.add_argument(
+            '--neo4j-load-batch-min-size',
+            type=int,
+            default=None,
+            help=(
+                'Smallest number of items that cartography will write to Neo4j in a single transaction when loading '
+                'data. Batch sizes adapt between the min and max based on transaction latency and payload size. '
+                'Default = 500, or the max size if that is lower.'
+            ),
+        )
+        parser.add_argument(
+            '--neo4j-load-batch-max-size',
+            type=int,
+            default=10000,
+            help=(
+                'Largest number of items that cartography will write to Neo4j in a single transaction when loading '
+                'data. Default = 10000.'
+            ),
+        )
+        parser.add_argument(
+            '--neo4j-load-batch-target-seconds',
+            type=float,
+            default=5.0,
+            help=(
+                'Target wall time in seconds for each Neo4j load transaction. Batches are shrunk when transactions '
+                'take longer than this and grown when they are faster. Default = 5.0.'
+            ),
+        )
+        parser.add_argument(
+            '--neo4j-cleanup-batch-size',
+            type=int,
+            default=None,
+            help=(
+                'If set, cleanup jobs delete stale nodes and relationships in a single pass using '
+                '`CALL { ... } IN TRANSACTIONS` with this many rows per transaction, instead of re-running each '
+                'cleanup query until it finds nothing left to delete. Requires Neo4j 4.4 or later. Optional.'
+            ),
+        )
+        parser.add_argument(
+            '--neo4j-cleanup-iteration-target-seconds',
+            type=float,
+            default=None,
+            help=(
+                'If set, iterative cleanup statements grow or shrink the number of items they process per transaction '
+                'so that each transaction takes about this many seconds, instead of using a fixed size per statement. '
+                'Optional.'
+            ),
+        )
+        parser.add_argument(
+            '--neo4j-cleanup-iteration-min-size',
+            type=int,
+            default=None,
+            help=(
+                'Smallest number of items processed per transaction by adaptive iterative cleanup statements. Only '
+                'used with --neo4j-cleanup-iteration-target-seconds. Default = 100, or the max size if that is lower.'
+            ),
+        )
+        parser.add_argument(
+            '--neo4j-cleanup-iteration-max-size',
+            type=int,
+            default=10000,
+            help=(
+                'Largest number of items processed per transaction by adaptive iterative cleanup statements. Only '
+                'used with --neo4j-cleanup-iteration-target-seconds. Default = 10000.'
+            ),
+        )
+        parser.add_argument(
+            '--neo4j-job-concurrency',
+            type=int,
+            default=1,
+            help=(
+                'Max number of Neo4j sessions used to run the independent statement groups of a cleanup or analysis '
+                'job, and the discovered analysis jobs, at the same time. 1 runs everything serially. Default = 1.'
+            ),
+        )
+        parser.add_argument(
+            '--api-concurrency',
+            type=int,
+            default=32,
+            help=(
+                'Size of the thread pool shared by the intel modules that fetch API data concurrently, e.g. S3 bucket '
+                'details, ECR images and KMS keys. Each module also caps how many of its calls run at once. '
+                'Default = 32.'
+            ),
+        )
+        parser.add_argument(
+            '--api-rate-limit',
+            dest='api_rate_limits',
+            action='append',
+            metavar='SERVICE=REQUESTS_PER_SECOND',
+            help=(
+                'Limits the API calls made concurrently to a service, e.g. `kms=20`, across all threads. Throttled '
+                'calls are retried with exponential backoff either way. Can be given once per service. Services are '
+                'not rate limited by default.'
+            ),
+        )
+        parser.add_argument(
+            '--neo4j-profile-queries',
+            action='store_true',
+            help=(
+                'Run load and cleanup queries with PROFILE so that the run report includes their db hits. This adds '
+                'overhead on the Neo4j server and is meant for investigating slow syncs.'
+            ),
+        )
+        parser.add_argument(
+            '--run-report-path',
+            type=str,
+            default=None,
+            help=(
+                'If set, write a JSON report of the wall time, transactions, retries, server timings and counters of '
+                'every sync stage, job, cleanup statement and load to this path at the end of the sync. Optional.'
+            ),
+        )
+        parser.add_argument(
+            '--otel-tracing',
+            action='store_true',
+            help=(
+                'Emit sync stages, jobs, cleanup statements and loads as OpenTelemetry spans. Requires the '
+                'opentelemetry-api package and an OpenTelemetry SDK configured in the environment.'
+            ),
+        )
+        parser.add_argument(
+            '--profile-dir',
+            type=str,
+            default=None,
+            help=(
+                'If set, profile each sync stage and write a cProfile dump, the allocation sites that grew the most '
+                'according to tracemalloc, and a summary table of wall time, CPU time, peak memory and max RSS per '
+                'stage to this directory. Profiling slows the sync down considerably. Optional.'
+            ),
+        )
+        parser.add_argument(
+            '--profile-aws-resource-syncs',
+            action='store_true',
+            help=(
+                'With --profile-dir, also profile each AWS resource sync (e.g. ec2:instance) of each account on its '
+                'own.'
+            ),
+        )
         parser.add_argument(
             '--selected-modules',
             type=str,
@@ -137,6 +276,16 @@ class CLI:
                 'removed from the graph. By default, cartography will use a UNIX timestamp as the update tag.'
             ),
         )
+        parser.add_argument(
+            '--checkpoint-path',
+            type=str,
+            default=None,
+            help=(
+                'Path of a SQLite file to record the sync stages, AWS accounts and AWS resource syncs that completed '
+                'in. If a sync fails, rerunning it with the same --update-tag and --checkpoint-path skips the '
+                'completed units. The checkpoints of an update tag are removed once its sync succeeds.'
+            ),
+        )
         parser.add_argument(
             '--aws-sync-all-profiles',
             action='store_true',
@@ -160,6 +309,53 @@ class CLI:
                 'syncing other accounts and delay raising an exception until the very end.'
             ),
         )
+        parser.add_argument(
+            '--aws-account-concurrency',
+            type=int,
+            default=1,
+            help=(
+                'Number of AWS accounts to sync in parallel. Each account is synced in its own worker thread with its '
+                'own Neo4j session and boto3 session. Default = 1, which syncs accounts one at a time.'
+            ),
+        )
+        parser.add_argument(
+            '--aws-region-concurrency',
+            type=int,
+            default=8,
+            help=(
+                'Max number of AWS regions to fetch data from at the same time within each AWS resource sync that '
+                'supports it. Writes to Neo4j stay serialized. Set to 1 to fetch regions one at a time. Default = 8.'
+            ),
+        )
+        parser.add_argument(
+            '--aws-resource-concurrency',
+            type=int,
+            default=1,
+            help=(
+                'Max number of AWS resource syncs (e.g. s3, dynamodb, kms) to run at the same time within each '
+                'account. Syncs still wait for the syncs they depend on. Each concurrent sync uses its own Neo4j '
+                'session. Default = 1 (serial).'
+            ),
+        )
+        parser.add_argument(
+            '--aws-s3-concurrency',
+            type=int,
+            default=16,
+            help=(
+                'Max number of S3 buckets to fetch the location and details of at the same time. Each region\'s S3 '
+                'client is sized to serve this many requests at once. Set to 1 to fetch buckets one at a time. '
+                'Default = 16.'
+            ),
+        )
+        parser.add_argument(
+            '--gcp-project-concurrency',
+            type=int,
+            default=1,
+            help=(
+                'Number of GCP projects to sync in parallel. Each project is synced in its own worker thread with its '
+                'own Neo4j session and GCP API clients. Default = 1, which syncs projects one at a time.'
+            ),
+        )
         parser.add_argument(
             '--oci-sync-all-profiles',
             action='store_true',
@@ -287,6 +483,15 @@ class CLI:
                 'If omitted the default permission relationships will be created'
             ),
         )
+        parser.add_argument(
+            '--permission-relationships-workers',
+            type=int,
+            default=1,
+            help=(
+                'Number of worker processes used to calculate AWS permission relationships. Principals are split '
+                'across the workers. Default = 1 (calculated in the main process).'
+            ),
+        )
         parser.add_argument(
             '--jamf-base-uri',
             type=str,
@@ -355,6 +560,16 @@ class CLI:
                 'If set, CVE data will be synced from NIST.'
             ),
         )
+        parser.add_argument(
+            '--cve-cache-dir',
+            type=str,
+            default=None,
+            help=(
+                'If set, CVEs fetched from NIST are also written to a compressed cache in this directory, and years '
+                'of CVEs that are in the cache are loaded from it instead of being fetched again. Reuse the directory '
+                'across syncs, e.g. to backfill new Neo4j databases quickly.'
+            ),
+        )
         parser.add_argument(
             '--cve-api-key-env-var',
             type=str,
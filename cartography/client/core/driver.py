@@ -0,0 +1,42 @@
+from typing import Optional
+
+import neo4j
+
+
+# Global driver for the current sync.
+# Will be set by cartography.sync.Sync.run so that modules that do work concurrently can open their own sessions.
+_neo4j_driver: Optional[neo4j.Driver] = None
+_neo4j_database: Optional[str] = None
+
+
+def set_neo4j_driver(neo4j_driver: Optional[neo4j.Driver], database: Optional[str] = None) -> None:
+    """
+    Sets the module level Neo4j driver (and database name) used by new_neo4j_session().
+    :param neo4j_driver: The Neo4j driver for the current sync, or None to unset it.
+    :param database: The name of the Neo4j database to open sessions against. None means the server default.
+    """
+    global _neo4j_driver, _neo4j_database
+    _neo4j_driver = neo4j_driver
+    _neo4j_database = database
+
+
+def get_neo4j_driver() -> Optional[neo4j.Driver]:
+    """
+    :return: The Neo4j driver for the current sync, or None if no sync is running.
+    """
+    return _neo4j_driver
+
+
+def new_neo4j_session() -> neo4j.Session:
+    """
+    Opens a new session from the current sync's driver connection pool. Neo4j sessions are not thread safe, so each
+    worker thread that writes to the graph must use its own session from here rather than share the stage's session.
+    Callers are responsible for closing the session, e.g. by using it as a context manager.
+    :return: A new Neo4j session.
+    """
+    if _neo4j_driver is None:
+        raise RuntimeError(
+            'No Neo4j driver has been set. new_neo4j_session() can only be used during a cartography sync; see '
+            'cartography.client.core.driver.set_neo4j_driver().',
+        )
+    return _neo4j_driver.session(database=_neo4j_database)
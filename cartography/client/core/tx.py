@@ -1,16 +1,136 @@
+import json
+import logging
+import time
+from dataclasses import dataclass
+from itertools import islice
 from typing import Any
 from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Set
 from typing import Tuple
 from typing import Union
 
 import neo4j
 
-from cartography.graph.querybuilder import build_create_index_queries
-from cartography.graph.querybuilder import build_ingestion_query
+from cartography.graph.compiledschema import get_compiled_schema
+from cartography.instrumentation import current_operation
+from cartography.instrumentation import operation
+from cartography.instrumentation import OperationStats
+from cartography.instrumentation import profiled
 from cartography.models.core.nodes import CartographyNodeSchema
-from cartography.util import batch
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LoadBatchBounds:
+    """
+    Bounds used by `AdaptiveBatchSizer` to pick how many items go into each `load_graph_data()` write transaction, or
+    how many items each transaction of an iterative `GraphStatement` updates.
+    :param min_size: Never send fewer than this many items per transaction (unless the input runs out).
+    :param max_size: Never send more than this many items per transaction. This is also the size of the first batch.
+    :param target_seconds: The wall time that we aim for each write transaction to take.
+    :param max_bytes: Approximate upper bound on the serialized size of the data sent in a single transaction.
+    """
+    min_size: int = 500
+    max_size: int = 10000
+    target_seconds: float = 5.0
+    max_bytes: int = 32 * 1024 * 1024
+
+
+# Module level bounds used by load() and load_graph_data(). Set from cartography.config via set_load_batch_bounds().
+_load_batch_bounds: LoadBatchBounds = LoadBatchBounds()
+
+
+def set_load_batch_bounds(bounds: LoadBatchBounds) -> None:
+    """
+    Sets the module level batch size bounds used by every subsequent call to `load()` and `load_graph_data()`.
+    """
+    if bounds.min_size < 1 or bounds.max_size < bounds.min_size:
+        raise ValueError(
+            f'Invalid load batch bounds: min_size={bounds.min_size}, max_size={bounds.max_size}. '
+            f'Ensure that 1 <= min_size <= max_size.',
+        )
+    global _load_batch_bounds
+    _load_batch_bounds = bounds
+
+
+def get_load_batch_bounds() -> LoadBatchBounds:
+    return _load_batch_bounds
+
+
+class AdaptiveBatchSizer:
+    """
+    Picks the size of the next write batch from how long the previous transaction took and how large its payload was,
+    so that slow transactions or very wide records shrink the batch and fast, narrow ones grow it, always staying
+    within the given `LoadBatchBounds`.
+    """
+
+    def __init__(self, bounds: Optional[LoadBatchBounds] = None, initial_size: Optional[int] = None):
+        self.bounds = bounds if bounds else get_load_batch_bounds()
+        self.size = self.bounds.max_size
+        if initial_size:
+            self.size = max(self.bounds.min_size, min(self.bounds.max_size, initial_size))
+
+    def record(self, num_items: int, elapsed_seconds: float, num_bytes: int) -> None:
+        """
+        Updates the next batch size given the observations of a just-completed transaction.
+        :param num_items: Number of items that were sent in the transaction.
+        :param elapsed_seconds: Wall time that the transaction took.
+        :param num_bytes: Approximate serialized size of the items that were sent.
+        """
+        if num_items <= 0:
+            return
+        new_size = float(self.bounds.max_size)
+        if elapsed_seconds > 0:
+            new_size = min(new_size, num_items * self.bounds.target_seconds / elapsed_seconds)
+        if num_bytes > 0:
+            new_size = min(new_size, num_items * self.bounds.max_bytes / num_bytes)
+        # Grow gradually so that a single unusually fast transaction does not make the next one blow past the target.
+        new_size = min(new_size, self.size * 2)
+        self.size = max(self.bounds.min_size, min(self.bounds.max_size, int(new_size)))
+
+    def shrink(self) -> bool:
+        """
+        Halves the next batch size, e.g. after the database ran out of memory for a transaction.
+        :return: False if the size was already at the minimum, so retrying with a smaller batch is not possible.
+        """
+        if self.size <= self.bounds.min_size:
+            return False
+        self.size = max(self.bounds.min_size, self.size // 2)
+        return True
+
+
+def _estimate_batch_bytes(data_batch: List[Dict[str, Any]]) -> int:
+    """
+    Cheaply estimates the serialized size of the given batch by serializing its first item only.
+    """
+    if not data_batch:
+        return 0
+    try:
+        sample_size = len(json.dumps(data_batch[0], default=str))
+    except (TypeError, ValueError):
+        return 0
+    return sample_size * len(data_batch)
+
+
+def _iter_adaptive_batches(
+        dict_list: Iterable[Dict[str, Any]],
+        sizer: AdaptiveBatchSizer,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Lazily pulls batches of `sizer.size` items from the given iterable. The batch size is re-read on every iteration
+    so that it reflects what the sizer learned from the previous transaction.
+    """
+    iterator = iter(dict_list)
+    while True:
+        data_batch = list(islice(iterator, sizer.size))
+        if not data_batch:
+            return
+        yield data_batch
 
 
 def read_list_of_values_tx(tx: neo4j.Transaction, query: str, **kwargs) -> List[Union[str, int]]:
@@ -191,28 +311,89 @@ def write_list_of_dicts_tx(
     tx.run(query, kwargs)
 
 
+def _write_batch_tx(
+        tx: neo4j.Transaction,
+        query: str,
+        attempts: List[int],
+        **kwargs,
+) -> neo4j.ResultSummary:
+    """
+    Like write_list_of_dicts_tx(), but returns the query's summary and counts how many times the driver attempted the
+    transaction so that retries can be reported.
+    """
+    attempts[0] += 1
+    return tx.run(query, kwargs).consume()
+
+
 def load_graph_data(
         neo4j_session: neo4j.Session,
         query: str,
-        dict_list: List[Dict[str, Any]],
+        dict_list: Iterable[Dict[str, Any]],
+        operation_name: Optional[str] = None,
         **kwargs,
 ) -> None:
     """
-    Writes data to the graph.
+    Writes data to the graph. The data is consumed lazily, so `dict_list` may be a generator; only one batch is held in
+    memory at a time. Batch sizes adapt to observed transaction latency and payload size within the bounds set by
+    `set_load_batch_bounds()`.
     :param neo4j_session: The Neo4j session
     :param query: The Neo4j write query to run. This query is not meant to be handwritten, rather it should be generated
     with cartography.graph.querybuilder.build_ingestion_query().
-    :param dict_list: The data to load to the graph represented as a list of dicts.
+    :param dict_list: The data to load to the graph represented as an iterable of dicts.
+    :param operation_name: The name that a handwritten load is reported under, e.g.
+    `cartography.intel.aws.iam.load_users`. Loads made through load() are reported under their node label instead.
     :param kwargs: Allows additional keyword args to be supplied to the Neo4j query.
     :return: None
     """
-    for data_batch in batch(dict_list, size=10000):
-        neo4j_session.write_transaction(
-            write_list_of_dicts_tx,
+    stats = current_operation('load')
+    if stats is not None:
+        _write_batches(neo4j_session, query, dict_list, stats, **kwargs)
+        return
+    with operation('load', operation_name or 'load_graph_data') as stats:
+        _write_batches(neo4j_session, query, dict_list, stats, **kwargs)
+
+
+def _write_batches(
+        neo4j_session: neo4j.Session,
+        query: str,
+        dict_list: Iterable[Dict[str, Any]],
+        stats: OperationStats,
+        **kwargs,
+) -> None:
+    query = profiled(query)
+    sizer = AdaptiveBatchSizer()
+    for data_batch in _iter_adaptive_batches(dict_list, sizer):
+        start = time.monotonic()
+        attempts = [0]
+        summary = neo4j_session.write_transaction(
+            _write_batch_tx,
             query,
+            attempts,
             DictList=data_batch,
             **kwargs,
         )
+        elapsed = time.monotonic() - start
+        num_bytes = _estimate_batch_bytes(data_batch)
+        sizer.record(len(data_batch), elapsed, num_bytes)
+        logger.debug(f"Wrote batch of {len(data_batch)} items in {elapsed:.2f}s; next batch size is {sizer.size}.")
+
+        if summary is not None:
+            stats.add_summary(summary)
+        stats.retries += max(0, attempts[0] - 1)
+        stats.rows += len(data_batch)
+        stats.bytes += num_bytes
+
+
+# `CREATE INDEX IF NOT EXISTS` statements that have already been run during the current sync. See ensure_indexes().
+_created_indexes: Set[str] = set()
+
+
+def reset_index_state() -> None:
+    """
+    Forgets which indexes ensure_indexes() has already created so that the next call for each schema runs its
+    `CREATE INDEX IF NOT EXISTS` statements again. This is called at the start of every cartography.sync.Sync.run().
+    """
+    _created_indexes.clear()
 
 
 def ensure_indexes(neo4j_session: neo4j.Session, node_schema: CartographyNodeSchema) -> None:
@@ -223,21 +404,27 @@ def ensure_indexes(neo4j_session: neo4j.Session, node_schema: CartographyNodeSch
 
     This ensures that every time we need to MATCH on a node to draw a relationship to it, the field used for the MATCH
     will be indexed, making the operation fast.
+
+    Each statement is only sent to Neo4j once per sync (see reset_index_state()), so calling this on every load() for
+    every account and region does not cost a round-trip each time.
     :param neo4j_session: The neo4j session
     :param node_schema: The node_schema object to create indexes for.
     """
-    queries = build_create_index_queries(node_schema)
+    queries = get_compiled_schema(node_schema).index_queries
 
     for query in queries:
         if not query.startswith('CREATE INDEX IF NOT EXISTS'):
             raise ValueError('Query provided to `ensure_indexes()` does not start with "CREATE INDEX IF NOT EXISTS".')
+        if query in _created_indexes:
+            continue
         neo4j_session.run(query)
+        _created_indexes.add(query)
 
 
 def load(
         neo4j_session: neo4j.Session,
         node_schema: CartographyNodeSchema,
-        dict_list: List[Dict[str, Any]],
+        dict_list: Iterable[Dict[str, Any]],
         **kwargs,
 ) -> None:
     """
@@ -245,10 +432,11 @@ def load(
     to the graph and then performs the load operation.
     :param neo4j_session: The Neo4j session
     :param node_schema: The CartographyNodeSchema object to create indexes for and generate a query.
-    :param dict_list: The data to load to the graph represented as a list of dicts.
+    :param dict_list: The data to load to the graph represented as an iterable of dicts. Generators are streamed.
     :param kwargs: Allows additional keyword args to be supplied to the Neo4j query.
     :return: None
     """
-    ensure_indexes(neo4j_session, node_schema)
-    ingestion_query = build_ingestion_query(node_schema)
-    load_graph_data(neo4j_session, ingestion_query, dict_list, **kwargs)
+    with operation('load', node_schema.label):
+        ensure_indexes(neo4j_session, node_schema)
+        ingestion_query = get_compiled_schema(node_schema).ingestion_query
+        load_graph_data(neo4j_session, ingestion_query, dict_list, **kwargs)
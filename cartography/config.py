@@ -19,16 +19,75 @@ class Config:
     :param neo4j_database: The name of the database in Neo4j to connect to. If not specified, uses your Neo4j database
     settings to infer which database is set to default.
     See https://neo4j.com/docs/api/python-driver/4.4/api.html#database. Optional.
+    :type neo4j_load_batch_min_size: int
+    :param neo4j_load_batch_min_size: Smallest number of items written per Neo4j load transaction. Optional.
+    :type neo4j_load_batch_max_size: int
+    :param neo4j_load_batch_max_size: Largest number of items written per Neo4j load transaction. Optional.
+    :type neo4j_load_batch_target_seconds: float
+    :param neo4j_load_batch_target_seconds: Target wall time for each Neo4j load transaction. Load batch sizes adapt
+        between the min and max to meet this target. Optional.
+    :type neo4j_cleanup_batch_size: int
+    :param neo4j_cleanup_batch_size: If set, iterative cleanup deletes run as a single `CALL { } IN TRANSACTIONS` pass
+        with this many rows per transaction instead of repeated LIMIT batches. Requires Neo4j 4.4+. Optional.
+    :type neo4j_cleanup_iteration_min_size: int
+    :param neo4j_cleanup_iteration_min_size: Smallest LIMIT_SIZE used by adaptive iterative cleanup statements.
+        Optional.
+    :type neo4j_cleanup_iteration_max_size: int
+    :param neo4j_cleanup_iteration_max_size: Largest LIMIT_SIZE used by adaptive iterative cleanup statements.
+        Optional.
+    :type neo4j_cleanup_iteration_target_seconds: float
+    :param neo4j_cleanup_iteration_target_seconds: If set, iterative cleanup statements adapt their LIMIT_SIZE between
+        the min and max so that each transaction takes about this long. Optional.
+    :type neo4j_job_concurrency: int
+    :param neo4j_job_concurrency: Max number of Neo4j sessions used to run independent statement groups of a job, and
+        analysis jobs, at the same time. Optional.
+    :type api_concurrency: int
+    :param api_concurrency: Size of the thread pool shared by the intel modules that fetch API data concurrently, see
+        cartography.util.concurrency. Optional.
+    :type api_rate_limits: list[str]
+    :param api_rate_limits: Rate limits of the API calls made through cartography.util.concurrency, each given as
+        `SERVICE=REQUESTS_PER_SECOND`, e.g. `kms=20`. Optional.
+    :type neo4j_profile_queries: bool
+    :param neo4j_profile_queries: If True, load and cleanup queries run with PROFILE so that the run report includes
+        their db hits. Optional.
+    :type run_report_path: str
+    :param run_report_path: If set, a JSON report of the time, transactions and counters of every stage, job,
+        statement and load is written to this path at the end of the sync. Optional.
+    :type otel_tracing: bool
+    :param otel_tracing: If True, stages, jobs, statements and loads are also emitted as OpenTelemetry spans. Requires
+        the opentelemetry-api package. Optional.
+    :type profile_dir: str
+    :param profile_dir: If set, a cProfile dump and the top tracemalloc allocations of each sync stage, and a summary
+        table of their time and memory, are written to this directory. Optional.
+    :type profile_aws_resource_syncs: bool
+    :param profile_aws_resource_syncs: If True and profile_dir is set, each AWS resource sync of each account is also
+        profiled on its own. Optional.
     :type selected_modules: str
     :param selected_modules: Comma-separated list of cartography top-level modules to sync. Optional.
     :type update_tag: int
     :param update_tag: Update tag for a cartography sync run. Optional.
+    :type checkpoint_path: str
+    :param checkpoint_path: Path of a SQLite file to record completed units of the sync in, so that a failed sync can
+        be resumed by rerunning it with the same update tag. Optional.
     :type aws_sync_all_profiles: bool
     :param aws_sync_all_profiles: If True, AWS sync will run for all non-default profiles in the AWS_CONFIG_FILE. If
         False (default), AWS sync will run using the default credentials only. Optional.
     :type aws_best_effort_mode: bool
     :param aws_best_effort_mode: If True, AWS sync will not raise any exceptions, just log. If False (default),
         exceptions will be raised.
+    :type aws_account_concurrency: int
+    :param aws_account_concurrency: Number of AWS accounts to sync in parallel. Defaults to 1 (serial). Optional.
+    :type aws_region_concurrency: int
+    :param aws_region_concurrency: Max number of AWS regions to fetch from at the same time within a resource sync.
+        Optional.
+    :type aws_resource_concurrency: int
+    :param aws_resource_concurrency: Max number of AWS resource syncs to run at the same time within an account,
+        respecting the dependencies declared in cartography.intel.aws.resources.RESOURCE_DEPENDENCIES. Optional.
+    :type aws_s3_concurrency: int
+    :param aws_s3_concurrency: Max number of S3 buckets to fetch the location and details of at the same time.
+        Optional.
+    :type gcp_project_concurrency: int
+    :param gcp_project_concurrency: Number of GCP projects to sync in parallel. Defaults to 1 (serial). Optional.
     :type azure_sync_all_subscriptions: bool
     :param azure_sync_all_subscriptions: If True, Azure sync will run for all profiles in azureProfile.json. If
         False (default), Azure sync will run using current user session via CLI credentials. Optional.
@@ -59,6 +118,9 @@ class Config:
     :param digitalocean_token: DigitalOcean access token. Optional.
     :type permission_relationships_file: str
     :param permission_relationships_file: File path for the resource permission relationships file. Optional.
+    :type permission_relationships_workers: int
+    :param permission_relationships_workers: Number of worker processes used to calculate AWS permission
+        relationships. Defaults to 1 (calculated in the main process). Optional.
     :type jamf_base_uri: string
     :param jamf_base_uri: Jamf data provider base URI, e.g. https://example.com/JSSResource. Optional.
     :type jamf_user: string
@@ -85,6 +147,8 @@ class Config:
     :param pagerduty_request_timeout: Seconds to timeout for pagerduty session requests. Optional
     :type: nist_cve_url: str
     :param nist_cve_url: NIST CVE data provider base URI, e.g. https://nvd.nist.gov/feeds/json/cve/1.1. Optional.
+    :type cve_cache_dir: str
+    :param cve_cache_dir: Directory to cache the CVEs fetched from NIST in across syncs. Optional.
     :type: gsuite_auth_method: str
     :param gsuite_auth_method: Auth method (delegated, oauth) used for Google Workspace. Optional.
     :type gsuite_config: str
@@ -122,10 +186,31 @@ class Config:
         neo4j_password=None,
         neo4j_max_connection_lifetime=None,
         neo4j_database=None,
+        neo4j_load_batch_min_size=None,
+        neo4j_load_batch_max_size=None,
+        neo4j_load_batch_target_seconds=None,
+        neo4j_cleanup_batch_size=None,
+        neo4j_cleanup_iteration_min_size=None,
+        neo4j_cleanup_iteration_max_size=None,
+        neo4j_cleanup_iteration_target_seconds=None,
+        neo4j_job_concurrency=None,
+        api_concurrency=None,
+        api_rate_limits=None,
+        neo4j_profile_queries=False,
+        run_report_path=None,
+        otel_tracing=False,
+        profile_dir=None,
+        profile_aws_resource_syncs=False,
         selected_modules=None,
         update_tag=None,
+        checkpoint_path=None,
         aws_sync_all_profiles=False,
         aws_best_effort_mode=False,
+        aws_account_concurrency=1,
+        aws_region_concurrency=None,
+        aws_resource_concurrency=None,
+        aws_s3_concurrency=None,
+        gcp_project_concurrency=1,
         azure_sync_all_subscriptions=False,
         azure_sp_auth=None,
         azure_tenant_id=None,
@@ -140,6 +225,7 @@ class Config:
         github_config=None,
         digitalocean_token=None,
         permission_relationships_file=None,
+        permission_relationships_workers=1,
         jamf_base_uri=None,
         jamf_user=None,
         jamf_password=None,
@@ -156,6 +242,7 @@ class Config:
         nist_cve_url=None,
         cve_enabled=False,
         cve_api_key=None,
+        cve_cache_dir=None,
         crowdstrike_client_id=None,
         crowdstrike_client_secret=None,
         crowdstrike_api_url=None,
@@ -179,10 +266,31 @@ class Config:
         self.neo4j_password = neo4j_password
         self.neo4j_max_connection_lifetime = neo4j_max_connection_lifetime
         self.neo4j_database = neo4j_database
+        self.neo4j_load_batch_min_size = neo4j_load_batch_min_size
+        self.neo4j_load_batch_max_size = neo4j_load_batch_max_size
+        self.neo4j_load_batch_target_seconds = neo4j_load_batch_target_seconds
+        self.neo4j_cleanup_batch_size = neo4j_cleanup_batch_size
+        self.neo4j_cleanup_iteration_min_size = neo4j_cleanup_iteration_min_size
+        self.neo4j_cleanup_iteration_max_size = neo4j_cleanup_iteration_max_size
+        self.neo4j_cleanup_iteration_target_seconds = neo4j_cleanup_iteration_target_seconds
+        self.neo4j_job_concurrency = neo4j_job_concurrency
+        self.api_concurrency = api_concurrency
+        self.api_rate_limits = api_rate_limits
+        self.neo4j_profile_queries = neo4j_profile_queries
+        self.run_report_path = run_report_path
+        self.otel_tracing = otel_tracing
+        self.profile_dir = profile_dir
+        self.profile_aws_resource_syncs = profile_aws_resource_syncs
         self.selected_modules = selected_modules
         self.update_tag = update_tag
+        self.checkpoint_path = checkpoint_path
         self.aws_sync_all_profiles = aws_sync_all_profiles
         self.aws_best_effort_mode = aws_best_effort_mode
+        self.aws_account_concurrency = aws_account_concurrency
+        self.aws_region_concurrency = aws_region_concurrency
+        self.aws_resource_concurrency = aws_resource_concurrency
+        self.aws_s3_concurrency = aws_s3_concurrency
+        self.gcp_project_concurrency = gcp_project_concurrency
         self.azure_sync_all_subscriptions = azure_sync_all_subscriptions
         self.azure_sp_auth = azure_sp_auth
         self.azure_tenant_id = azure_tenant_id
@@ -197,6 +305,7 @@ class Config:
         self.github_config = github_config
         self.digitalocean_token = digitalocean_token
         self.permission_relationships_file = permission_relationships_file
+        self.permission_relationships_workers = permission_relationships_workers
         self.jamf_base_uri = jamf_base_uri
         self.jamf_user = jamf_user
         self.jamf_password = jamf_password
@@ -213,6 +322,7 @@ class Config:
         self.nist_cve_url = nist_cve_url
         self.cve_enabled = cve_enabled
         self.cve_api_key = cve_api_key
+        self.cve_cache_dir = cve_cache_dir
         self.crowdstrike_client_id = crowdstrike_client_id
         self.crowdstrike_client_secret = crowdstrike_client_secret
         self.crowdstrike_api_url = crowdstrike_api_url
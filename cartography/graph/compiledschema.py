@@ -0,0 +1,112 @@
+import string
+from string import Template
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Type
+
+from cartography.graph.cleanupbuilder import build_cleanup_queries
+from cartography.graph.querybuilder import build_create_index_queries
+from cartography.graph.querybuilder import build_ingestion_query
+from cartography.models.core.nodes import CartographyNodeSchema
+
+
+def _get_identifiers(template: string.Template) -> List[str]:
+    """
+    :param template: A string Template
+    :return: the variable names that start with a '$' like $this in the given Template.
+    Stolen from https://github.com/python/cpython/issues/90465#issuecomment-1093941790.
+    TODO we can get rid of this and use template.get_identifiers() once we are on python 3.11
+    """
+    return list(
+        set(
+            filter(
+                lambda v: v is not None,
+                (
+                    mo.group('named') or mo.group('braced')
+                    for mo in template.pattern.finditer(template.template)
+                ),
+            ),
+        ),
+    )
+
+
+def get_parameters(queries: List[str]) -> Set[str]:
+    """
+    :param queries: A list of Neo4j queries with parameters indicated by leading '$' like $this.
+    :return: The set of all parameters across all given Neo4j queries.
+    """
+    parameter_set = set()
+    for query in queries:
+        as_template = Template(query)
+        params = _get_identifiers(as_template)
+        parameter_set.update(params)
+    return parameter_set
+
+
+class CompiledNodeSchema:
+    """
+    Holds the Neo4j queries generated from a CartographyNodeSchema so that they only need to be built once per process.
+    Building these queries runs dataclasses.asdict() and string.Template substitution over the whole schema, which adds
+    up when the same schema is loaded and cleaned up for every account and region.
+
+    The ingestion and index queries are built eagerly. The cleanup queries are built on first access because not every
+    schema supports auto-cleanup (e.g. schemas without a sub resource relationship).
+    """
+
+    def __init__(self, node_schema: CartographyNodeSchema):
+        self.node_schema = node_schema
+        self.ingestion_query: str = build_ingestion_query(node_schema)
+        self.index_queries: Tuple[str, ...] = tuple(build_create_index_queries(node_schema))
+        self._cleanup_queries: Optional[Tuple[str, ...]] = None
+        self._cleanup_parameters: Optional[Set[str]] = None
+
+    @property
+    def cleanup_queries(self) -> Tuple[str, ...]:
+        """
+        :return: The queries generated by cartography.graph.cleanupbuilder.build_cleanup_queries() for this schema.
+        """
+        if self._cleanup_queries is None:
+            self._cleanup_queries = tuple(build_cleanup_queries(self.node_schema))
+        return self._cleanup_queries
+
+    @property
+    def cleanup_parameters(self) -> Set[str]:
+        """
+        :return: The set of query parameters that must be supplied to run the cleanup queries for this schema.
+        """
+        if self._cleanup_parameters is None:
+            self._cleanup_parameters = get_parameters(list(self.cleanup_queries))
+        return set(self._cleanup_parameters)
+
+
+# Process-wide registry of compiled schemas keyed by their CartographyNodeSchema subclass.
+_compiled_schemas: Dict[Type[CartographyNodeSchema], CompiledNodeSchema] = {}
+
+
+def get_compiled_schema(node_schema: CartographyNodeSchema) -> CompiledNodeSchema:
+    """
+    Returns the CompiledNodeSchema for the given node schema, building it on first use.
+    Schemas are keyed by class. Node schemas are frozen dataclasses that are almost always instantiated without
+    arguments, but if an instance differs from the one that was compiled for its class we compile it again rather than
+    returning stale queries.
+    :param node_schema: The CartographyNodeSchema object to get compiled queries for.
+    :return: The CompiledNodeSchema for the given node schema.
+    """
+    schema_class = type(node_schema)
+    compiled = _compiled_schemas.get(schema_class)
+    if compiled is not None and (compiled.node_schema is node_schema or compiled.node_schema == node_schema):
+        return compiled
+
+    compiled = CompiledNodeSchema(node_schema)
+    _compiled_schemas[schema_class] = compiled
+    return compiled
+
+
+def clear_compiled_schemas() -> None:
+    """
+    Empties the compiled schema registry. Intended for tests.
+    """
+    _compiled_schemas.clear()
@@ -1,8 +1,7 @@
 import json
 import logging
-import string
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from string import Template
 from typing import Any
 from typing import Dict
 from typing import List
@@ -12,45 +11,38 @@ from typing import Union
 
 import neo4j
 
-from cartography.graph.cleanupbuilder import build_cleanup_queries
+from cartography.client.core.driver import get_neo4j_driver
+from cartography.client.core.driver import new_neo4j_session
+from cartography.graph.compiledschema import CompiledNodeSchema
+from cartography.graph.compiledschema import get_compiled_schema
+from cartography.graph.compiledschema import get_parameters as get_parameters  # noqa: F401 re-exported
 from cartography.graph.statement import get_job_shortname
 from cartography.graph.statement import GraphStatement
+from cartography.instrumentation import operation
 from cartography.models.core.nodes import CartographyNodeSchema
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_JOB_CONCURRENCY = 1
 
-def _get_identifiers(template: string.Template) -> List[str]:
-    """
-    :param template: A string Template
-    :return: the variable names that start with a '$' like $this in the given Template.
-    Stolen from https://github.com/python/cpython/issues/90465#issuecomment-1093941790.
-    TODO we can get rid of this and use template.get_identifiers() once we are on python 3.11
-    """
-    return list(
-        set(
-            filter(
-                lambda v: v is not None,
-                (
-                    mo.group('named') or mo.group('braced')
-                    for mo in template.pattern.finditer(template.template)
-                ),
-            ),
-        ),
-    )
-
-
-def get_parameters(queries: List[str]) -> Set[str]:
+# Max number of Neo4j sessions that a job uses to run independent statement groups at the same time, and that
+# cartography.intel.analysis uses to run analysis jobs at the same time. Set from cartography.config via
+# set_job_concurrency().
+_job_concurrency: int = DEFAULT_JOB_CONCURRENCY
+
+
+def set_job_concurrency(job_concurrency: int) -> None:
     """
-    :param queries: A list of Neo4j queries with parameters indicated by leading '$' like $this.
-    :return: The set of all parameters across all given Neo4j queries.
+    Sets how many statement groups (or analysis jobs) run at the same time. 1 means everything runs serially.
     """
-    parameter_set = set()
-    for query in queries:
-        as_template = Template(query)
-        params = _get_identifiers(as_template)
-        parameter_set.update(params)
-    return parameter_set
+    if job_concurrency < 1:
+        raise ValueError(f'job_concurrency must be at least 1, got {job_concurrency}.')
+    global _job_concurrency
+    _job_concurrency = job_concurrency
+
+
+def get_job_concurrency() -> int:
+    return _job_concurrency
 
 
 class GraphJobJSONEncoder(json.JSONEncoder):
@@ -69,6 +61,11 @@ class GraphJobJSONEncoder(json.JSONEncoder):
 class GraphJob:
     """
     A job that will run against the cartography graph. A job is a sequence of statements which execute sequentially.
+
+    Statements can be given a `group`. A run of consecutive grouped statements is treated as a set of independent
+    groups: statements within a group run in order, but different groups may run concurrently on their own sessions
+    when the job concurrency is above 1. Ungrouped statements always run on their own, after everything before them
+    has finished.
     """
 
     def __init__(self, name: str, statements: List[GraphStatement], short_name: Optional[str] = None):
@@ -87,10 +84,25 @@ class GraphJob:
 
     def run(self, neo4j_session: neo4j.Session) -> None:
         """
-        Run the job. This will execute all statements sequentially.
+        Run the job. This will execute all statements sequentially, except for independent statement groups which run
+        concurrently if the job concurrency allows it.
         """
         logger.debug("Starting job '%s'.", self.name)
-        for stm in self.statements:
+        max_workers = get_job_concurrency()
+        with operation('job', self.short_name or self.name):
+            if max_workers <= 1 or get_neo4j_driver() is None:
+                self._run_statements(neo4j_session, self.statements)
+            else:
+                for stage in _get_stages(self.statements):
+                    if len(stage) == 1:
+                        self._run_statements(neo4j_session, stage[0])
+                    else:
+                        self._run_groups_concurrently(stage, max_workers)
+        log_msg = f"Finished job {self.short_name}" if self.short_name else f"Finished job {self.name}"
+        logger.info(log_msg)
+
+    def _run_statements(self, neo4j_session: neo4j.Session, statements: List[GraphStatement]) -> None:
+        for stm in statements:
             try:
                 stm.run(neo4j_session)
             except Exception as e:
@@ -100,8 +112,23 @@ class GraphJob:
                     e,
                 )
                 raise
-        log_msg = f"Finished job {self.short_name}" if self.short_name else f"Finished job {self.name}"
-        logger.info(log_msg)
+
+    def _run_group_in_worker(self, statements: List[GraphStatement]) -> None:
+        with new_neo4j_session() as worker_session:
+            self._run_statements(worker_session, statements)
+
+    def _run_groups_concurrently(self, groups: List[List[GraphStatement]], max_workers: int) -> None:
+        """
+        Runs the given statement groups on a bounded thread pool. If a group raises, groups that have not started yet
+        are cancelled and the first exception is re-raised once the running ones have finished.
+        """
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(groups)), thread_name_prefix='graph-job')
+        try:
+            futures = [executor.submit(self._run_group_in_worker, group) for group in groups]
+            for future in futures:
+                future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
 
     def as_dict(self) -> Dict:
         """
@@ -134,9 +161,10 @@ class GraphJob:
         For a given node, the fields used in the node_schema.sub_resource_relationship.target_node_node_matcher.keys()
         must be provided as keys and values in the params dict.
         """
-        queries: List[str] = build_cleanup_queries(node_schema)
+        compiled: CompiledNodeSchema = get_compiled_schema(node_schema)
+        queries = compiled.cleanup_queries
 
-        expected_param_keys: Set[str] = get_parameters(queries)
+        expected_param_keys: Set[str] = compiled.cleanup_parameters
         actual_param_keys: Set[str] = set(parameters.keys())
         # Hacky, but LIMIT_SIZE is specified by default in cartography.graph.statement, so we exclude it from validation
         actual_param_keys.add('LIMIT_SIZE')
@@ -207,6 +235,27 @@ class GraphJob:
         job.run(neo4j_session)
 
 
+def _get_stages(statements: List[GraphStatement]) -> List[List[List[GraphStatement]]]:
+    """
+    Splits a job's statements into stages that must run one after another. Each stage is a list of statement groups
+    that may run concurrently: an ungrouped statement is a stage with a single group of its own, and a run of
+    consecutive grouped statements is a stage with one group per group name, in order of first appearance.
+    """
+    stages: List[List[List[GraphStatement]]] = []
+    groups: Dict[str, List[GraphStatement]] = {}
+    for statement in statements:
+        if statement.group is None:
+            if groups:
+                stages.append(list(groups.values()))
+                groups = {}
+            stages.append([[statement]])
+        else:
+            groups.setdefault(statement.group, []).append(statement)
+    if groups:
+        stages.append(list(groups.values()))
+    return stages
+
+
 def _get_statements_from_json(blob: Dict, short_job_name: Optional[str] = None) -> List[GraphStatement]:
     """
     Deserialize all statements from the JSON blob.
@@ -1,20 +1,116 @@
 import json
 import logging
 import os
+import re
+import time
 from pathlib import Path
 from typing import Any
 from typing import Dict
 from typing import Optional
 from typing import Union
 
+import backoff
 import neo4j
+import neo4j.exceptions
 
+from cartography.client.core.tx import AdaptiveBatchSizer
+from cartography.client.core.tx import LoadBatchBounds
+from cartography.instrumentation import current_operation
+from cartography.instrumentation import operation
+from cartography.instrumentation import profiled
 from cartography.stats import get_stats_client
 
 
 logger = logging.getLogger(__name__)
 stat_handler = get_stats_client(__name__)
 
+# Rows per transaction when iterative delete statements run as a single `CALL { ... } IN TRANSACTIONS` pass, or None to
+# run them as a loop of `LIMIT $LIMIT_SIZE` transactions. Set from cartography.config via set_cleanup_batch_size().
+_cleanup_batch_size: Optional[int] = None
+
+# Bounds within which iterative statements adapt their LIMIT_SIZE to the observed transaction time, or None to use each
+# statement's fixed iterationsize. Set from cartography.config via set_iteration_size_bounds().
+_iteration_size_bounds: Optional[LoadBatchBounds] = None
+
+# How long a single pass delete keeps retrying transient errors such as deadlocks, like the driver's default
+# max_transaction_retry_time does for write_transaction().
+SINGLE_PASS_RETRY_MAX_TIME = 30
+
+# Matches the tail of an iterative delete statement, e.g. `WITH n LIMIT $LIMIT_SIZE DETACH DELETE (n)`. This is how
+# every statement built by cartography.graph.cleanupbuilder and almost every JSON cleanup job ends.
+_ITERATIVE_DELETE_PATTERN = re.compile(
+    r"WITH\s+(?P<var>\w+)\s+LIMIT\s+\$LIMIT_SIZE\s+(?P<action>(?:DETACH\s+)?DELETE)\s+\(?\s*(?P=var)\s*\)?"
+    r"(?:\s+RETURN\s+COUNT\(\*\)\s+AS\s+\w+)?\s*;?\s*$",
+    re.IGNORECASE,
+)
+
+
+def set_cleanup_batch_size(batch_size: Optional[int]) -> None:
+    """
+    Sets how iterative delete statements run.
+
+    By default they run as a loop of write transactions that each delete up to $LIMIT_SIZE matches, which re-runs the
+    whole MATCH every time. Given a batch size, each one instead runs as a single query that matches once and deletes
+    through `CALL { ... } IN TRANSACTIONS OF <batch_size> ROWS`. That requires Neo4j 4.4 or later.
+    :param batch_size: Rows per transaction, or None to use the iterative loop.
+    """
+    if batch_size is not None and batch_size < 1:
+        raise ValueError(f'batch_size must be at least 1, got {batch_size}.')
+    global _cleanup_batch_size
+    _cleanup_batch_size = batch_size
+
+
+def get_cleanup_batch_size() -> Optional[int]:
+    return _cleanup_batch_size
+
+
+def set_iteration_size_bounds(bounds: Optional[LoadBatchBounds]) -> None:
+    """
+    Sets how many items each transaction of an iterative statement processes.
+
+    By default every transaction uses the statement's fixed iterationsize. Given bounds, the statement's iterationsize
+    is only the starting point: the LIMIT_SIZE of each following transaction is grown or shrunk by an
+    AdaptiveBatchSizer so that transactions take about `bounds.target_seconds`, and halved when Neo4j runs out of
+    transaction memory. `bounds.max_bytes` is not used because the statements send no data.
+    :param bounds: The min/max LIMIT_SIZE and target transaction time, or None to use fixed iteration sizes.
+    """
+    if bounds is not None and (bounds.min_size < 1 or bounds.max_size < bounds.min_size):
+        raise ValueError(
+            f'Invalid iteration size bounds: min_size={bounds.min_size}, max_size={bounds.max_size}. '
+            f'Ensure that 1 <= min_size <= max_size.',
+        )
+    global _iteration_size_bounds
+    _iteration_size_bounds = bounds
+
+
+def get_iteration_size_bounds() -> Optional[LoadBatchBounds]:
+    return _iteration_size_bounds
+
+
+def _is_out_of_memory_error(error: neo4j.exceptions.TransientError) -> bool:
+    # e.g. Neo.TransientError.General.MemoryPoolOutOfMemoryError or Neo.TransientError.General.TransactionMemoryLimit
+    return 'Memory' in (getattr(error, 'code', None) or '')
+
+
+def to_single_pass_delete(query: str, batch_size: int) -> Optional[str]:
+    """
+    Rewrites an iterative delete statement that ends in `WITH x LIMIT $LIMIT_SIZE [DETACH] DELETE x` into a single pass
+    that deletes every match in batches of `batch_size` rows per transaction. The matches are de-duplicated first so
+    that no batch tries to delete something an earlier batch already deleted.
+    :param query: The iterative statement's query.
+    :param batch_size: Rows per transaction. Neo4j 4.4 requires this to be a literal rather than a query parameter.
+    :return: The single pass query, or None if the query does not have that shape.
+    """
+    match = _ITERATIVE_DELETE_PATTERN.search(query)
+    if not match:
+        return None
+    var = match.group('var')
+    action = ' '.join(match.group('action').upper().split())
+    return (
+        f"{query[:match.start()]}WITH DISTINCT {var}\n"
+        f"CALL {{ WITH {var} {action} {var} }} IN TRANSACTIONS OF {int(batch_size)} ROWS"
+    )
+
 
 class GraphStatementJSONEncoder(json.JSONEncoder):
     """
@@ -48,15 +144,22 @@ class GraphStatement:
             iterationsize: int = 0,
             parent_job_name: Optional[str] = None,
             parent_job_sequence_num: Optional[int] = None,
+            group: Optional[str] = None,
     ):
         self.query = query
-        self.parameters = parameters or {}
+        # Copied because statements write LIMIT_SIZE into their parameters, and callers such as
+        # GraphJob.from_node_schema() pass the same common_job_parameters to statements that may run concurrently.
+        self.parameters = dict(parameters or {})
         self.iterative = iterative
         self.iterationsize = iterationsize
         self.parameters["LIMIT_SIZE"] = self.iterationsize
 
         self.parent_job_name = parent_job_name if parent_job_name else None
         self.parent_job_sequence_num = parent_job_sequence_num if parent_job_sequence_num else None
+        # GraphJob may run consecutive statements with different groups concurrently, so a job must only give them
+        # different groups if they never update or delete the same nodes or relationships: a statement that matches
+        # something another group already deleted fails. Statements within a group always run in order.
+        self.group = group
 
     def merge_parameters(self, parameters: Dict) -> None:
         """
@@ -70,10 +173,11 @@ class GraphStatement:
         """
         Run the statement. This will execute the query against the graph.
         """
-        if self.iterative:
-            self._run_iterative(session)
-        else:
-            session.write_transaction(self._run_noniterative).consume()
+        with operation('statement', f"{self.parent_job_name}#{self.parent_job_sequence_num}"):
+            if self.iterative:
+                self._run_iterative(session)
+            else:
+                session.write_transaction(self._run_noniterative).consume()
         logger.info(f"Completed {self.parent_job_name} statement #{self.parent_job_sequence_num}")
 
     def as_dict(self) -> Dict[str, Any]:
@@ -85,16 +189,22 @@ class GraphStatement:
             "parameters": self.parameters,
             "iterative": self.iterative,
             "iterationsize": self.iterationsize,
+            "group": self.group,
         }
 
     def _run_noniterative(self, tx: neo4j.Transaction) -> neo4j.Result:
         """
         Non-iterative statement execution.
         """
-        result: neo4j.Result = tx.run(self.query, self.parameters)
+        result: neo4j.Result = tx.run(profiled(self.query), self.parameters)
 
         # Handle stats
         summary: neo4j.ResultSummary = result.consume()
+        self._record_stats(summary)
+        return result
+
+    @staticmethod
+    def _record_stats(summary: neo4j.ResultSummary) -> None:
         stat_handler.incr('constraints_added', summary.counters.constraints_added)
         stat_handler.incr('constraints_removed', summary.counters.constraints_removed)
         stat_handler.incr('indexes_added', summary.counters.indexes_added)
@@ -106,8 +216,9 @@ class GraphStatement:
         stat_handler.incr('properties_set', summary.counters.properties_set)
         stat_handler.incr('relationships_created', summary.counters.relationships_created)
         stat_handler.incr('relationships_deleted', summary.counters.relationships_deleted)
-
-        return result
+        stats = current_operation('statement')
+        if stats is not None:
+            stats.add_summary(summary)
 
     def _run_iterative(self, session: neo4j.Session) -> None:
         """
@@ -115,6 +226,17 @@ class GraphStatement:
 
         Expects the query to return the total number of records updated.
         """
+        batch_size = get_cleanup_batch_size()
+        single_pass_query = to_single_pass_delete(self.query, batch_size) if batch_size else None
+        if single_pass_query:
+            self._run_single_pass(session, single_pass_query)
+            return
+
+        bounds = get_iteration_size_bounds()
+        if bounds:
+            self._run_iterative_adaptive(session, bounds)
+            return
+
         self.parameters["LIMIT_SIZE"] = self.iterationsize
 
         while True:
@@ -127,6 +249,69 @@ class GraphStatement:
                 break
             result.consume()
 
+    def _run_iterative_adaptive(self, session: neo4j.Session, bounds: LoadBatchBounds) -> None:
+        """
+        Iterative statement execution where LIMIT_SIZE adapts to how long each transaction takes. The sizes used are
+        reported through the `iterationsize` gauge.
+        """
+        sizer = AdaptiveBatchSizer(bounds, initial_size=self.iterationsize)
+        num_transactions = 0
+        while True:
+            limit_size = sizer.size
+            self.parameters["LIMIT_SIZE"] = limit_size
+            start = time.monotonic()
+            try:
+                result: neo4j.Result = session.write_transaction(self._run_noniterative)
+            except neo4j.exceptions.TransientError as e:
+                if not _is_out_of_memory_error(e) or not sizer.shrink():
+                    raise
+                logger.warning(
+                    f"{self.parent_job_name} statement #{self.parent_job_sequence_num} ran out of memory with "
+                    f"LIMIT_SIZE {limit_size}; retrying with {sizer.size}.",
+                )
+                stat_handler.incr('iteration_out_of_memory')
+                continue
+            elapsed = time.monotonic() - start
+            num_transactions += 1
+            stat_handler.gauge('iterationsize', limit_size)
+
+            if not result.consume().counters.contains_updates:
+                break
+            sizer.record(limit_size, elapsed, 0)
+
+        logger.debug(
+            f"{self.parent_job_name} statement #{self.parent_job_sequence_num} ran {num_transactions} transactions, "
+            f"ending with LIMIT_SIZE {sizer.size}.",
+        )
+
+    def _run_single_pass(self, session: neo4j.Session, query: str) -> None:
+        """
+        Runs a query from to_single_pass_delete(). `CALL { ... } IN TRANSACTIONS` manages its own transactions, so it
+        must run as an auto-commit query rather than through write_transaction(), which means that the driver does not
+        retry it. Deleting is idempotent, so the whole query is re-run on transient errors such as deadlocks with other
+        statements that run concurrently, except when it ran out of memory.
+        """
+        def _on_backoff(details: Dict) -> None:
+            logger.warning(
+                f"{self.parent_job_name} statement #{self.parent_job_sequence_num} failed with a transient error; "
+                f"retrying in {details['wait']:0.1f} seconds after {details['tries']} tries.",
+            )
+            stat_handler.incr('single_pass_retries')
+
+        def _run() -> neo4j.ResultSummary:
+            # Errors of the inner transactions surface while the result is consumed, so retry both.
+            return session.run(query, self.parameters).consume()
+
+        # don't use @backoff as decorator, to preserve typing
+        run_with_retry = backoff.on_exception(
+            backoff.expo,
+            neo4j.exceptions.TransientError,
+            max_time=SINGLE_PASS_RETRY_MAX_TIME,
+            giveup=_is_out_of_memory_error,
+            on_backoff=_on_backoff,
+        )(_run)
+        self._record_stats(run_with_retry())
+
     @classmethod
     def create_from_json(
             cls,
@@ -144,6 +329,7 @@ class GraphStatement:
             json_obj.get("iterationsize", 0),
             short_job_name,
             job_sequence_num,
+            json_obj.get("group"),
         )
 
     @classmethod
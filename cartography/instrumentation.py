@@ -0,0 +1,206 @@
+import json
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextlib import nullcontext
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import fields
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import neo4j
+
+from cartography.stats import get_stats_client
+
+logger = logging.getLogger(__name__)
+stat_handler = get_stats_client('instrumentation')
+
+
+@dataclass
+class OperationStats:
+    """
+    Everything observed while running one kind of operation, e.g. every load() of one node schema during a sync.
+    :param count: Number of times the operation ran.
+    :param seconds: Total wall time of the operation.
+    :param batches: Number of committed Neo4j transactions.
+    :param retries: Number of transaction attempts that were retried by the driver. Only counted for loads.
+    :param rows: Number of records sent to Neo4j.
+    :param bytes: Approximate serialized size of the records sent to Neo4j.
+    :param result_available_after_ms: Total time the server took before results were available.
+    :param result_consumed_after_ms: Total time the server took to consume the results.
+    :param db_hits: Total database hits. Only counted when queries are profiled, see configure().
+    """
+    count: int = 0
+    seconds: float = 0.0
+    batches: int = 0
+    retries: int = 0
+    rows: int = 0
+    bytes: int = 0
+    result_available_after_ms: int = 0
+    result_consumed_after_ms: int = 0
+    db_hits: int = 0
+    nodes_created: int = 0
+    nodes_deleted: int = 0
+    relationships_created: int = 0
+    relationships_deleted: int = 0
+    properties_set: int = 0
+
+    def add_summary(self, summary: neo4j.ResultSummary) -> None:
+        """
+        Adds the server side timings and counters of one committed transaction.
+        """
+        self.batches += 1
+        self.result_available_after_ms += int(summary.result_available_after or 0)
+        self.result_consumed_after_ms += int(summary.result_consumed_after or 0)
+        if summary.profile:
+            self.db_hits += _count_db_hits(summary.profile)
+        self.nodes_created += int(summary.counters.nodes_created)
+        self.nodes_deleted += int(summary.counters.nodes_deleted)
+        self.relationships_created += int(summary.counters.relationships_created)
+        self.relationships_deleted += int(summary.counters.relationships_deleted)
+        self.properties_set += int(summary.counters.properties_set)
+
+    def merge(self, other: 'OperationStats') -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+
+# Operation kind -> operation name -> stats, for everything that ran during the current sync. See get_run_report().
+_operations: Dict[str, Dict[str, OperationStats]] = {}
+_operations_lock = threading.Lock()
+_run_started_at: float = time.time()
+
+# Per-thread stack of the (kind, stats) of the operations that are running, innermost last. See current_operation().
+_local = threading.local()
+
+# Whether queries sent by load_graph_data() and GraphStatement are prefixed with PROFILE to count db hits, and the
+# OpenTelemetry tracer used to emit a span per operation, if any. Set from cartography.config via configure().
+_profile_queries: bool = False
+_tracer: Optional[Any] = None
+
+
+def configure(profile_queries: bool = False, tracing: bool = False) -> None:
+    """
+    Configures what is collected on top of timings and counters.
+    :param profile_queries: If True, load and statement queries run with PROFILE so that their db hits are reported.
+        Profiling adds overhead on the server, so this is meant for investigating slow syncs.
+    :param tracing: If True, every operation is also emitted as an OpenTelemetry span. This requires the
+        opentelemetry-api package and an OpenTelemetry SDK configured by the caller; if it is not installed, a warning
+        is logged and tracing stays off.
+    """
+    global _profile_queries, _tracer
+    _profile_queries = profile_queries
+    _tracer = None
+    if tracing:
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            logger.warning("Tracing was requested but the opentelemetry-api package is not installed; skipping.")
+            return
+        _tracer = trace.get_tracer('cartography')
+
+
+def profiled(query: str) -> str:
+    """
+    :return: The query prefixed with PROFILE if queries are being profiled, else the query unchanged.
+    """
+    return f"PROFILE {query}" if _profile_queries else query
+
+
+def reset_run_report() -> None:
+    """
+    Forgets the operations recorded so far. This is called at the start of every cartography.sync.Sync.run().
+    """
+    global _run_started_at
+    with _operations_lock:
+        _operations.clear()
+        _run_started_at = time.time()
+
+
+def get_run_report() -> Dict[str, Any]:
+    """
+    :return: The stats of every operation recorded since the last reset_run_report(), grouped by kind ('stage', 'job',
+        'statement' or 'load') and name, with the slowest operations first.
+    """
+    with _operations_lock:
+        operations = {
+            kind: {
+                name: asdict(stats)
+                for name, stats in sorted(by_name.items(), key=lambda item: item[1].seconds, reverse=True)
+            }
+            for kind, by_name in _operations.items()
+        }
+    return {
+        'started_at': _run_started_at,
+        'seconds': time.time() - _run_started_at,
+        'operations': operations,
+    }
+
+
+def write_run_report(path: str) -> None:
+    """
+    Writes get_run_report() to the given path as JSON.
+    """
+    with open(path, 'w') as report_file:
+        json.dump(get_run_report(), report_file, indent=2)
+    logger.info(f"Wrote sync run report to {path}.")
+
+
+def current_operation(kind: str) -> Optional[OperationStats]:
+    """
+    :param kind: The kind of operation that the caller wants to add to.
+    :return: The stats of the innermost operation running on this thread, or None if there is none or it is of another
+        kind.
+    """
+    stack: List[Tuple[str, OperationStats]] = getattr(_local, 'stack', [])
+    if stack and stack[-1][0] == kind:
+        return stack[-1][1]
+    return None
+
+
+@contextmanager
+def operation(kind: str, name: str) -> Iterator[OperationStats]:
+    """
+    Times the enclosed block as one run of the given operation. The yielded stats can be filled in by the block, either
+    directly or through current_operation(). When the block exits, they are added to the run report, the elapsed time
+    is sent to statsd as an `instrumentation.<kind>.<name>` timer, and the span is ended if tracing is enabled.
+    :param kind: The kind of operation, e.g. 'load'.
+    :param name: The name of the operation, e.g. the label of the node schema being loaded.
+    """
+    stats = OperationStats(count=1)
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    span_context = _tracer.start_as_current_span(f"{kind} {name}") if _tracer else nullcontext()
+    start = time.monotonic()
+    with span_context as span:
+        _local.stack.append((kind, stats))
+        try:
+            yield stats
+        finally:
+            _local.stack.pop()
+            stats.seconds = time.monotonic() - start
+            _record(kind, name, stats)
+            if span is not None:
+                span.set_attributes({f'cartography.{key}': value for key, value in asdict(stats).items()})
+
+
+def _record(kind: str, name: str, stats: OperationStats) -> None:
+    with _operations_lock:
+        _operations.setdefault(kind, {}).setdefault(name, OperationStats()).merge(stats)
+    stat_handler.timing(f"{kind}.{_to_metric_name(name)}", stats.seconds * 1000)
+
+
+def _to_metric_name(name: str) -> str:
+    # statsd uses '.' to separate scopes and ':' and '|' as delimiters
+    return re.sub(r'[^\w\-]', '_', name)
+
+
+def _count_db_hits(profile: Dict[str, Any]) -> int:
+    return int(profile.get('dbHits') or 0) + sum(_count_db_hits(child) for child in profile.get('children') or [])
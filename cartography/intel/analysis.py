@@ -1,14 +1,37 @@
 import logging
 import pathlib
+from concurrent.futures import ThreadPoolExecutor
 
 import neo4j
 
+from cartography.client.core.driver import get_neo4j_driver
+from cartography.client.core.driver import new_neo4j_session
 from cartography.config import Config
+from cartography.graph.job import get_job_concurrency
 from cartography.graph.job import GraphJob
 
 logger = logging.getLogger(__name__)
 
 
+def _run_analysis_job(neo4j_session: neo4j.Session, path: pathlib.Path, update_tag: int) -> None:
+    logger.info("Running discovered analysis job: %s", path)
+    try:
+        GraphJob.run_from_json_file(
+            path,
+            neo4j_session,
+            {"UPDATE_TAG": update_tag},
+        )
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except Exception:
+        logger.exception("An exception occurred while executing discovered analysis job: %s", path)
+
+
+def _run_analysis_job_in_worker(path: pathlib.Path, update_tag: int) -> None:
+    with new_neo4j_session() as worker_session:
+        _run_analysis_job(worker_session, path, update_tag)
+
+
 def run(neo4j_session: neo4j.Session, config: Config) -> None:
     analysis_job_directory_path = config.analysis_job_directory
     if not analysis_job_directory_path:
@@ -28,15 +51,15 @@ def run(neo4j_session: neo4j.Session, config: Config) -> None:
         )
         return
     logger.info("Loading analysis jobs from directory: %s", analysis_job_directory)
-    for path in analysis_job_directory.glob("**/*.json"):
-        logger.info("Running discovered analysis job: %s", path)
-        try:
-            GraphJob.run_from_json_file(
-                path,
-                neo4j_session,
-                {"UPDATE_TAG": config.update_tag},
-            )
-        except (KeyboardInterrupt, SystemExit):
-            raise
-        except Exception:
-            logger.exception("An exception occurred while executing discovered analysis job: %s", path)
+    paths = list(analysis_job_directory.glob("**/*.json"))
+    max_workers = get_job_concurrency()
+    if max_workers <= 1 or len(paths) <= 1 or get_neo4j_driver() is None:
+        for path in paths:
+            _run_analysis_job(neo4j_session, path, config.update_tag)
+        return
+
+    # Discovered analysis jobs run in no particular order, so they can run concurrently on their own sessions.
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths)), thread_name_prefix='analysis') as executor:
+        futures = [executor.submit(_run_analysis_job_in_worker, path, config.update_tag) for path in paths]
+        for future in futures:
+            future.result()
@@ -1,6 +1,9 @@
 import datetime
 import logging
 import traceback
+from concurrent.futures import as_completed
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 from typing import Dict
 from typing import Iterable
@@ -12,9 +15,19 @@ import neo4j
 
 from . import ec2
 from . import organizations
+from . import s3
+from .resources import RESOURCE_DEPENDENCIES
 from .resources import RESOURCE_FUNCTIONS
+from cartography.checkpoint import is_complete
+from cartography.checkpoint import mark_complete
+from cartography.client.core.driver import get_neo4j_driver
+from cartography.client.core.driver import new_neo4j_session
 from cartography.config import Config
+from cartography.intel.aws.util import policy_cache
 from cartography.intel.aws.util.common import parse_and_validate_aws_requested_syncs
+from cartography.intel.aws.util.regions import set_region_concurrency
+from cartography.intel.aws.util.scheduler import run_resource_syncs
+from cartography.intel.aws.util.scheduler import set_resource_concurrency
 from cartography.stats import get_stats_client
 from cartography.util import merge_module_sync_metadata
 from cartography.util import run_analysis_and_ensure_deps
@@ -57,23 +70,17 @@ def _sync_one_account(
         neo4j_session, boto3_session, regions, current_aws_account_id, update_tag, common_job_parameters,
     )
 
-    for func_name in aws_requested_syncs:
-        if func_name in RESOURCE_FUNCTIONS:
-            # Skip permission relationships and tags for now because they rely on data already being in the graph
-            if func_name not in ['permission_relationships', 'resourcegroupstaggingapi']:
-                RESOURCE_FUNCTIONS[func_name](**sync_args)
-            else:
-                continue
-        else:
+    requested_syncs = list(aws_requested_syncs)
+    for func_name in requested_syncs:
+        if func_name not in RESOURCE_FUNCTIONS:
             raise ValueError(f'AWS sync function "{func_name}" was specified but does not exist. Did you misspell it?')
 
-    # MAP IAM permissions
-    if 'permission_relationships' in aws_requested_syncs:
-        RESOURCE_FUNCTIONS['permission_relationships'](**sync_args)
-
-    # AWS Tags - Must always be last.
-    if 'resourcegroupstaggingapi' in aws_requested_syncs:
-        RESOURCE_FUNCTIONS['resourcegroupstaggingapi'](**sync_args)
+    # Syncs run in dependency order; e.g. permission relationships and tags rely on data already being in the graph.
+    try:
+        run_resource_syncs(requested_syncs, RESOURCE_FUNCTIONS, RESOURCE_DEPENDENCIES, sync_args)
+    finally:
+        # Free the IAM policies that the iam sync cached for this account's later stages
+        policy_cache.clear_account(current_aws_account_id)
 
     run_analysis_job(
         'aws_ec2_iaminstanceprofile.json',
@@ -138,6 +145,67 @@ def _autodiscover_accounts(
         logger.warning(f"The current account ({account_id}) doesn't have enough permissions to perform autodiscovery.")
 
 
+def _get_boto3_session_for_profile(profile_name: str, num_accounts: int) -> boto3.session.Session:
+    if num_accounts == 1:
+        # Use the default boto3 session because boto3 gets confused if you give it a profile name with 1 account
+        return boto3.Session()
+    return boto3.Session(profile_name=profile_name)
+
+
+def _sync_account_with_profile(
+    neo4j_session: neo4j.Session,
+    boto3_session: boto3.session.Session,
+    profile_name: str,
+    account_id: str,
+    sync_tag: int,
+    common_job_parameters: Dict[str, Any],
+    aws_requested_syncs: List[str],
+) -> None:
+    logger.info("Syncing AWS account with ID '%s' using configured profile '%s'.", account_id, profile_name)
+    _autodiscover_accounts(neo4j_session, boto3_session, account_id, sync_tag, common_job_parameters)
+    _sync_one_account(
+        neo4j_session,
+        boto3_session,
+        account_id,
+        sync_tag,
+        common_job_parameters,
+        aws_requested_syncs=aws_requested_syncs,  # Could be replaced later with per-account requested syncs
+    )
+    mark_complete('aws', account_id)
+
+
+def _sync_account_in_worker(
+    boto3_session: boto3.session.Session,
+    profile_name: str,
+    account_id: str,
+    sync_tag: int,
+    common_job_parameters: Dict[str, Any],
+    aws_requested_syncs: List[str],
+) -> None:
+    """
+    Syncs a single account from a worker thread, using its own Neo4j session and its own copy of the job parameters
+    so that AWS_ID does not leak between accounts.
+    """
+    account_job_parameters = {**common_job_parameters, 'AWS_ID': account_id}
+    with new_neo4j_session() as worker_session:
+        _sync_account_with_profile(
+            worker_session,
+            boto3_session,
+            profile_name,
+            account_id,
+            sync_tag,
+            account_job_parameters,
+            aws_requested_syncs,
+        )
+
+
+def _format_account_exception(account_id: str, e: BaseException) -> str:
+    timestamp = datetime.datetime.now()
+    exception_traceback = traceback.TracebackException.from_exception(e)
+    traceback_string = ''.join(exception_traceback.format())
+    return f'{timestamp} - Exception for account ID: {account_id}\n{traceback_string}'
+
+
 def _sync_multiple_accounts(
     neo4j_session: neo4j.Session,
     accounts: Dict[str, str],
@@ -145,6 +213,7 @@ def _sync_multiple_accounts(
     common_job_parameters: Dict[str, Any],
     aws_best_effort_mode: bool,
     aws_requested_syncs: List[str] = [],
+    aws_account_concurrency: int = 1,
 ) -> bool:
     logger.info("Syncing AWS accounts: %s", ', '.join(accounts.values()))
     organizations.sync(neo4j_session, accounts, sync_tag, common_job_parameters)
@@ -154,48 +223,93 @@ def _sync_multiple_accounts(
 
     num_accounts = len(accounts)
 
-    for profile_name, account_id in accounts.items():
-        logger.info("Syncing AWS account with ID '%s' using configured profile '%s'.", account_id, profile_name)
-        common_job_parameters["AWS_ID"] = account_id
-        if num_accounts == 1:
-            # Use the default boto3 session because boto3 gets confused if you give it a profile name with 1 account
-            boto3_session = boto3.Session()
-        else:
-            boto3_session = boto3.Session(profile_name=profile_name)
+    # When resuming a sync with the same update tag, accounts that already finished are left as they are in the graph.
+    pending_accounts = {
+        profile_name: account_id for profile_name, account_id in accounts.items() if not is_complete('aws', account_id)
+    }
+    if len(pending_accounts) < num_accounts:
+        logger.info(
+            f"Skipping {num_accounts - len(pending_accounts)} AWS accounts that were completed by an earlier run with "
+            f"update tag {sync_tag}.",
+        )
 
-        _autodiscover_accounts(neo4j_session, boto3_session, account_id, sync_tag, common_job_parameters)
+    if aws_account_concurrency > 1 and len(pending_accounts) > 1 and get_neo4j_driver() is None:
+        logger.warning(
+            "aws_account_concurrency is set but no Neo4j driver is available to open per-worker sessions; syncing AWS "
+            "accounts one at a time.",
+        )
+        aws_account_concurrency = 1
 
+    if aws_account_concurrency > 1 and len(pending_accounts) > 1:
+        logger.info(f"Syncing {len(pending_accounts)} AWS accounts with up to {aws_account_concurrency} in parallel.")
+        executor = ThreadPoolExecutor(max_workers=aws_account_concurrency, thread_name_prefix='aws-account')
         try:
-            _sync_one_account(
-                neo4j_session,
-                boto3_session,
-                account_id,
-                sync_tag,
-                common_job_parameters,
-                aws_requested_syncs=aws_requested_syncs,  # Could be replaced later with per-account requested syncs
-            )
-        except Exception as e:
-            if aws_best_effort_mode:
-                timestamp = datetime.datetime.now()
-                failed_account_ids.append(account_id)
-                exception_traceback = traceback.TracebackException.from_exception(e)
-                traceback_string = ''.join(exception_traceback.format())
-                exception_tracebacks.append(f'{timestamp} - Exception for account ID: {account_id}\n{traceback_string}')
-                logger.warning(
-                    f"Caught exception syncing account {account_id}. aws-best-effort-mode is on so we are continuing "
-                    f"on to the next AWS account. All exceptions will be aggregated and re-logged at the end of the "
-                    f"sync.",
-                    exc_info=True,
+            futures: Dict[Future, str] = {}
+            for profile_name, account_id in pending_accounts.items():
+                # Create boto3 sessions up front in this thread: creating them concurrently is not thread safe.
+                boto3_session = _get_boto3_session_for_profile(profile_name, num_accounts)
+                future = executor.submit(
+                    _sync_account_in_worker,
+                    boto3_session,
+                    profile_name,
+                    account_id,
+                    sync_tag,
+                    common_job_parameters,
+                    aws_requested_syncs,
                 )
-                continue
-            else:
-                raise
+                futures[future] = account_id
+
+            for future in as_completed(futures):
+                account_id = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    if not aws_best_effort_mode:
+                        raise
+                    failed_account_ids.append(account_id)
+                    exception_tracebacks.append(_format_account_exception(account_id, e))
+                    logger.warning(
+                        f"Caught exception syncing account {account_id}. aws-best-effort-mode is on so we are "
+                        f"continuing with the other AWS accounts. All exceptions will be aggregated and re-logged at "
+                        f"the end of the sync.",
+                        exc_info=True,
+                    )
+        finally:
+            # If we are raising, don't start any account syncs that have not begun yet.
+            executor.shutdown(wait=True, cancel_futures=True)
+    else:
+        for profile_name, account_id in pending_accounts.items():
+            common_job_parameters["AWS_ID"] = account_id
+            boto3_session = _get_boto3_session_for_profile(profile_name, num_accounts)
+            try:
+                _sync_account_with_profile(
+                    neo4j_session,
+                    boto3_session,
+                    profile_name,
+                    account_id,
+                    sync_tag,
+                    common_job_parameters,
+                    aws_requested_syncs,
+                )
+            except Exception as e:
+                if aws_best_effort_mode:
+                    failed_account_ids.append(account_id)
+                    exception_tracebacks.append(_format_account_exception(account_id, e))
+                    logger.warning(
+                        f"Caught exception syncing account {account_id}. aws-best-effort-mode is on so we are "
+                        f"continuing on to the next AWS account. All exceptions will be aggregated and re-logged at "
+                        f"the end of the sync.",
+                        exc_info=True,
+                    )
+                    continue
+                else:
+                    raise
 
     if failed_account_ids:
         logger.error(f'AWS sync failed for accounts {failed_account_ids}')
         raise Exception('\n'.join(exception_tracebacks))
 
-    del common_job_parameters["AWS_ID"]
+    common_job_parameters.pop("AWS_ID", None)
 
     # There may be orphan Principals which point outside of known AWS accounts. This job cleans
     # up those nodes after all AWS accounts have been synced.
@@ -257,6 +371,7 @@ def start_aws_ingestion(neo4j_session: neo4j.Session, config: Config) -> None:
     common_job_parameters = {
         "UPDATE_TAG": config.update_tag,
         "permission_relationships_file": config.permission_relationships_file,
+        "permission_relationships_workers": config.permission_relationships_workers,
     }
     try:
         boto3_session = boto3.Session()
@@ -295,6 +410,13 @@ def start_aws_ingestion(neo4j_session: neo4j.Session, config: Config) -> None:
     if config.aws_requested_syncs:
         requested_syncs = parse_and_validate_aws_requested_syncs(config.aws_requested_syncs)
 
+    if config.aws_region_concurrency:
+        set_region_concurrency(config.aws_region_concurrency)
+    if config.aws_resource_concurrency:
+        set_resource_concurrency(config.aws_resource_concurrency)
+    if config.aws_s3_concurrency:
+        s3.set_s3_concurrency(config.aws_s3_concurrency)
+
     sync_successful = _sync_multiple_accounts(
         neo4j_session,
         aws_accounts,
@@ -302,6 +424,7 @@ def start_aws_ingestion(neo4j_session: neo4j.Session, config: Config) -> None:
         common_job_parameters,
         config.aws_best_effort_mode,
         requested_syncs,
+        config.aws_account_concurrency or 1,
     )
 
     if sync_successful:
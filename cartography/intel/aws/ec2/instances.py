@@ -11,6 +11,7 @@ import neo4j
 from cartography.client.core.tx import load
 from cartography.graph.job import GraphJob
 from cartography.intel.aws.ec2.util import get_botocore_config
+from cartography.intel.aws.util.regions import fetch_and_load_regions
 from cartography.models.aws.ec2.instances import EC2InstanceSchema
 from cartography.models.aws.ec2.keypairs import EC2KeyPairSchema
 from cartography.models.aws.ec2.networkinterface_instance import EC2NetworkInterfaceInstanceSchema
@@ -319,9 +320,8 @@ def sync_ec2_instances(
         update_tag: int,
         common_job_parameters: Dict[str, Any],
 ) -> None:
-    for region in regions:
+    def _load_region(region: str, reservations: List[Dict[str, Any]]) -> None:
         logger.info("Syncing EC2 instances for region '%s' in account '%s'.", region, current_aws_account_id)
-        reservations = get_ec2_instances(boto3_session, region)
         ec2_data = transform_ec2_instances(reservations, region, current_aws_account_id)
         load_ec2_instance_data(
             neo4j_session,
@@ -336,4 +336,6 @@ def sync_ec2_instances(
             ec2_data.network_interface_list,
             ec2_data.instance_ebs_volumes_list,
         )
+
+    fetch_and_load_regions(boto3_session, regions, get_ec2_instances, _load_region)
     cleanup(neo4j_session, common_job_parameters)
@@ -1,4 +1,5 @@
 import logging
+from collections import namedtuple
 from string import Template
 from typing import Dict
 from typing import List
@@ -7,6 +8,7 @@ import boto3
 import neo4j
 
 from .util import get_botocore_config
+from cartography.client.core.tx import load_graph_data
 from cartography.graph.job import GraphJob
 from cartography.models.aws.ec2.securitygroup_instance import EC2SecurityGroupInstanceSchema
 from cartography.util import aws_handle_regions
@@ -15,6 +17,15 @@ from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
 
+Ec2SecurityGroupData = namedtuple(
+    'Ec2SecurityGroupData', [
+        'groups',
+        'inbound_rules',
+        'egress_rules',
+        'ip_ranges',
+    ],
+)
+
 
 @timeit
 @aws_handle_regions
@@ -27,79 +38,97 @@ def get_ec2_security_group_data(boto3_session: boto3.session.Session, region: st
     return security_groups
 
 
+def transform_ec2_security_group_data(data: List[Dict]) -> Ec2SecurityGroupData:
+    """
+    Flatten the security groups returned by describe_security_groups into the groups, their inbound and egress rules
+    and the IP ranges of the rules, so that each can be written with one batched query.
+    """
+    groups = []
+    rules: Dict[str, List[Dict]] = {"IpPermissions": [], "IpPermissionsEgress": []}
+    ip_ranges = []
+
+    for group in data:
+        group_id = group["GroupId"]
+        groups.append({
+            'GroupId': group_id,
+            'GroupName': group.get("GroupName"),
+            'Description': group.get("Description"),
+            'VpcId': group.get("VpcId", None),
+        })
+
+        for rule_type, rule_list in rules.items():
+            for rule in group.get(rule_type) or []:
+                protocol = rule.get("IpProtocol", "all")
+                from_port = rule.get("FromPort")
+                to_port = rule.get("ToPort")
+
+                ruleid = f"{group_id}/{rule_type}/{from_port}{to_port}{protocol}"
+                rule_list.append({
+                    'RuleId': ruleid,
+                    'GroupId': group_id,
+                    'FromPort': from_port,
+                    'ToPort': to_port,
+                    'Protocol': protocol,
+                })
+
+                for ip_range in rule.get("IpRanges", []):
+                    ip_ranges.append({'RangeId': ip_range["CidrIp"], 'RuleId': ruleid})
+
+    return Ec2SecurityGroupData(
+        groups=groups,
+        inbound_rules=rules["IpPermissions"],
+        egress_rules=rules["IpPermissionsEgress"],
+        ip_ranges=ip_ranges,
+    )
+
+
 @timeit
-def load_ec2_security_group_rule(neo4j_session: neo4j.Session, group: Dict, rule_type: str, update_tag: int) -> None:
+def load_ec2_security_group_rule(
+    neo4j_session: neo4j.Session, rules: List[Dict], rule_type: str, update_tag: int,
+) -> None:
     INGEST_RULE_TEMPLATE = Template("""
-    MERGE (rule:$rule_label{ruleid: $RuleId})
-    ON CREATE SET rule :IpRule, rule.firstseen = timestamp(), rule.fromport = $FromPort, rule.toport = $ToPort,
-    rule.protocol = $Protocol
+    UNWIND $DictList AS rule_data
+    MERGE (rule:$rule_label{ruleid: rule_data.RuleId})
+    ON CREATE SET rule :IpRule, rule.firstseen = timestamp(), rule.fromport = rule_data.FromPort,
+    rule.toport = rule_data.ToPort, rule.protocol = rule_data.Protocol
     SET rule.lastupdated = $update_tag
-    WITH rule
-    MATCH (group:EC2SecurityGroup{groupid: $GroupId})
+    WITH rule, rule_data
+    MATCH (group:EC2SecurityGroup{groupid: rule_data.GroupId})
     MERGE (group)<-[r:MEMBER_OF_EC2_SECURITY_GROUP]-(rule)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = $update_tag;
     """)
 
-    ingest_rule_group_pair = """
-    MERGE (group:EC2SecurityGroup{id: $GroupId})
-    ON CREATE SET group.firstseen = timestamp(), group.groupid = $GroupId
-    SET group.lastupdated = $update_tag
-    WITH group
-    MATCH (inbound:IpRule{ruleid: $RuleId})
-    MERGE (inbound)-[r:MEMBER_OF_EC2_SECURITY_GROUP]->(group)
-    ON CREATE SET r.firstseen = timestamp()
-    SET r.lastupdated = $update_tag
-    """
+    rule_type_map = {"IpPermissions": "IpPermissionInbound", "IpPermissionsEgress": "IpPermissionEgress"}
 
+    # NOTE Cypher query syntax is incompatible with Python string formatting, so we have to do this awkward
+    # NOTE manual formatting instead.
+    load_graph_data(
+        neo4j_session,
+        INGEST_RULE_TEMPLATE.safe_substitute(rule_label=rule_type_map[rule_type]),
+        rules,
+        update_tag=update_tag,
+        operation_name=f'{__name__}.load_ec2_security_group_rule.{rule_type_map[rule_type]}',
+    )
+
+
+@timeit
+def load_ec2_security_group_ip_ranges(neo4j_session: neo4j.Session, ip_ranges: List[Dict], update_tag: int) -> None:
     ingest_range = """
-    MERGE (range:IpRange{id: $RangeId})
-    ON CREATE SET range.firstseen = timestamp(), range.range = $RangeId
+    UNWIND $DictList AS range_data
+    MERGE (range:IpRange{id: range_data.RangeId})
+    ON CREATE SET range.firstseen = timestamp(), range.range = range_data.RangeId
     SET range.lastupdated = $update_tag
-    WITH range
-    MATCH (rule:IpRule{ruleid: $RuleId})
+    WITH range, range_data
+    MATCH (rule:IpRule{ruleid: range_data.RuleId})
     MERGE (rule)<-[r:MEMBER_OF_IP_RULE]-(range)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = $update_tag
     """
-
-    group_id = group["GroupId"]
-    rule_type_map = {"IpPermissions": "IpPermissionInbound", "IpPermissionsEgress": "IpPermissionEgress"}
-
-    if group.get(rule_type):
-        for rule in group[rule_type]:
-            protocol = rule.get("IpProtocol", "all")
-            from_port = rule.get("FromPort")
-            to_port = rule.get("ToPort")
-
-            ruleid = f"{group_id}/{rule_type}/{from_port}{to_port}{protocol}"
-            # NOTE Cypher query syntax is incompatible with Python string formatting, so we have to do this awkward
-            # NOTE manual formatting instead.
-            neo4j_session.run(
-                INGEST_RULE_TEMPLATE.safe_substitute(rule_label=rule_type_map[rule_type]),
-                RuleId=ruleid,
-                FromPort=from_port,
-                ToPort=to_port,
-                Protocol=protocol,
-                GroupId=group_id,
-                update_tag=update_tag,
-            )
-
-            neo4j_session.run(
-                ingest_rule_group_pair,
-                GroupId=group_id,
-                RuleId=ruleid,
-                update_tag=update_tag,
-            )
-
-            for ip_range in rule["IpRanges"]:
-                range_id = ip_range["CidrIp"]
-                neo4j_session.run(
-                    ingest_range,
-                    RangeId=range_id,
-                    RuleId=ruleid,
-                    update_tag=update_tag,
-                )
+    load_graph_data(
+        neo4j_session, ingest_range, ip_ranges, update_tag=update_tag,
+        operation_name=f'{__name__}.load_ec2_security_group_ip_ranges',
+    )
 
 
 @timeit
@@ -108,37 +137,37 @@ def load_ec2_security_groupinfo(
     current_aws_account_id: str, update_tag: int,
 ) -> None:
     ingest_security_group = """
-    MERGE (group:EC2SecurityGroup{id: $GroupId})
-    ON CREATE SET group.firstseen = timestamp(), group.groupid = $GroupId
-    SET group.name = $GroupName, group.description = $Description, group.region = $Region,
+    UNWIND $DictList AS sg
+    MERGE (group:EC2SecurityGroup{id: sg.GroupId})
+    ON CREATE SET group.firstseen = timestamp(), group.groupid = sg.GroupId
+    SET group.name = sg.GroupName, group.description = sg.Description, group.region = $Region,
     group.lastupdated = $update_tag
-    WITH group
+    WITH group, sg
     MATCH (aa:AWSAccount{id: $AWS_ACCOUNT_ID})
     MERGE (aa)-[r:RESOURCE]->(group)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = $update_tag
-    WITH group
-    MATCH (vpc:AWSVpc{id: $VpcId})
+    WITH group, sg
+    MATCH (vpc:AWSVpc{id: sg.VpcId})
     MERGE (vpc)-[rg:MEMBER_OF_EC2_SECURITY_GROUP]->(group)
     ON CREATE SET rg.firstseen = timestamp()
     """
 
-    for group in data:
-        group_id = group["GroupId"]
+    sg_data = transform_ec2_security_group_data(data)
+    load_graph_data(
+        neo4j_session,
+        ingest_security_group,
+        sg_data.groups,
+        Region=region,
+        AWS_ACCOUNT_ID=current_aws_account_id,
+        update_tag=update_tag,
+        operation_name=f'{__name__}.load_ec2_security_groupinfo',
+    )
 
-        neo4j_session.run(
-            ingest_security_group,
-            GroupId=group_id,
-            GroupName=group.get("GroupName"),
-            Description=group.get("Description"),
-            VpcId=group.get("VpcId", None),
-            Region=region,
-            AWS_ACCOUNT_ID=current_aws_account_id,
-            update_tag=update_tag,
-        )
-
-        load_ec2_security_group_rule(neo4j_session, group, "IpPermissions", update_tag)
-        load_ec2_security_group_rule(neo4j_session, group, "IpPermissionsEgress", update_tag)
+    load_ec2_security_group_rule(neo4j_session, sg_data.inbound_rules, "IpPermissions", update_tag)
+    load_ec2_security_group_rule(neo4j_session, sg_data.egress_rules, "IpPermissionsEgress", update_tag)
+    # The ranges are attached to rules of both types, so they are loaded once all of the rules are in the graph
+    load_ec2_security_group_ip_ranges(neo4j_session, sg_data.ip_ranges, update_tag)
 
 
 @timeit
@@ -2,16 +2,19 @@ import logging
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import Tuple
+from typing import Union
 
 import boto3
 import neo4j
 
+from cartography.intel.aws.util.regions import fetch_and_load_regions
+from cartography.intel.aws.util.regions import ThreadSafeBoto3Session
 from cartography.util import aws_handle_regions
 from cartography.util import batch
 from cartography.util import run_cleanup_job
 from cartography.util import timeit
-from cartography.util import to_asynchronous
-from cartography.util import to_synchronous
+from cartography.util.concurrency import as_completed
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +33,9 @@ def get_ecr_repositories(boto3_session: boto3.session.Session, region: str) -> L
 
 @timeit
 @aws_handle_regions
-def get_ecr_repository_images(boto3_session: boto3.session.Session, region: str, repository_name: str) -> List[Dict]:
+def get_ecr_repository_images(
+    boto3_session: Union[boto3.session.Session, ThreadSafeBoto3Session], region: str, repository_name: str,
+) -> List[Dict]:
     logger.debug("Getting ECR images in repository '%s' for region '%s'.", repository_name, region)
     client = boto3_session.client('ecr', region_name=region)
     paginator = client.get_paginator('list_images')
@@ -151,14 +156,16 @@ def _get_image_data(
     Given a list of repositories, get the image data for each repository,
     return as a mapping from repositoryUri to image object
     '''
-    image_data = {}
+    # Each repository is fetched on a worker thread, which creates its own client from the session
+    shared_session = ThreadSafeBoto3Session(boto3_session)
 
-    async def async_get_images(repo: Dict[str, Any]) -> None:
-        repo_image_obj = await to_asynchronous(get_ecr_repository_images, boto3_session, region, repo['repositoryName'])
-        image_data[repo['repositoryUri']] = repo_image_obj
-    to_synchronous(*[async_get_images(repo) for repo in repositories])
+    def _get_images(repo: Dict[str, Any]) -> List[Dict]:
+        return get_ecr_repository_images(shared_session, region, repo['repositoryName'])
 
-    return image_data
+    return {
+        repo['repositoryUri']: repo_images
+        for repo, repo_images in as_completed(_get_images, repositories, service='ecr')
+    }
 
 
 @timeit
@@ -166,12 +173,17 @@ def sync(
     neo4j_session: neo4j.Session, boto3_session: boto3.session.Session, regions: List[str], current_aws_account_id: str,
     update_tag: int, common_job_parameters: Dict,
 ) -> None:
-    for region in regions:
+    def _fetch_region(boto3_session: boto3.session.Session, region: str) -> Tuple[List[Dict], Dict[str, Any]]:
         logger.info("Syncing ECR for region '%s' in account '%s'.", region, current_aws_account_id)
-        image_data = {}
         repositories = get_ecr_repositories(boto3_session, region)
         image_data = _get_image_data(boto3_session, region, repositories)
+        return repositories, image_data
+
+    def _load_region(region: str, region_data: Tuple[List[Dict], Dict[str, Any]]) -> None:
+        repositories, image_data = region_data
         load_ecr_repositories(neo4j_session, repositories, region, current_aws_account_id, update_tag)
         repo_images_list = transform_ecr_repository_images(image_data)
         load_ecr_repository_images(neo4j_session, repo_images_list, region, update_tag)
+
+    fetch_and_load_regions(boto3_session, regions, _fetch_region, _load_region)
     cleanup(neo4j_session, common_job_parameters)
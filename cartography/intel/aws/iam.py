@@ -9,8 +9,10 @@ from typing import Tuple
 import boto3
 import neo4j
 
+from cartography.client.core.tx import load_graph_data
 from cartography.intel.aws.permission_relationships import parse_statement_node
 from cartography.intel.aws.permission_relationships import principal_allowed_on_resource
+from cartography.intel.aws.util import policy_cache
 from cartography.stats import get_stats_client
 from cartography.util import merge_module_sync_metadata
 from cartography.util import run_cleanup_job
@@ -246,10 +248,11 @@ def load_users(
     neo4j_session: neo4j.Session, users: List[Dict], current_aws_account_id: str, aws_update_tag: int,
 ) -> None:
     ingest_user = """
-    MERGE (unode:AWSUser{arn: $ARN})
-    ON CREATE SET unode:AWSPrincipal, unode.userid = $USERID, unode.firstseen = timestamp(),
-    unode.createdate = $CREATE_DATE
-    SET unode.name = $USERNAME, unode.path = $PATH, unode.passwordlastused = $PASSWORD_LASTUSED,
+    UNWIND $DictList AS user
+    MERGE (unode:AWSUser{arn: user.ARN})
+    ON CREATE SET unode:AWSPrincipal, unode.userid = user.USERID, unode.firstseen = timestamp(),
+    unode.createdate = user.CREATE_DATE
+    SET unode.name = user.USERNAME, unode.path = user.PATH, unode.passwordlastused = user.PASSWORD_LASTUSED,
     unode.lastupdated = $aws_update_tag
     WITH unode
     MATCH (aa:AWSAccount{id: $AWS_ACCOUNT_ID})
@@ -258,18 +261,24 @@ def load_users(
     SET r.lastupdated = $aws_update_tag
     """
     logger.info(f"Loading {len(users)} IAM users.")
-    for user in users:
-        neo4j_session.run(
-            ingest_user,
-            ARN=user["Arn"],
-            USERID=user["UserId"],
-            CREATE_DATE=str(user["CreateDate"]),
-            USERNAME=user["UserName"],
-            PATH=user["Path"],
-            PASSWORD_LASTUSED=str(user.get("PasswordLastUsed", "")),
-            AWS_ACCOUNT_ID=current_aws_account_id,
-            aws_update_tag=aws_update_tag,
-        )
+    load_graph_data(
+        neo4j_session,
+        ingest_user,
+        [
+            {
+                'ARN': user["Arn"],
+                'USERID': user["UserId"],
+                'CREATE_DATE': str(user["CreateDate"]),
+                'USERNAME': user["UserName"],
+                'PATH': user["Path"],
+                'PASSWORD_LASTUSED': str(user.get("PasswordLastUsed", "")),
+            }
+            for user in users
+        ],
+        AWS_ACCOUNT_ID=current_aws_account_id,
+        aws_update_tag=aws_update_tag,
+        operation_name=f'{__name__}.load_users',
+    )
 
 
 @timeit
@@ -277,9 +286,10 @@ def load_groups(
     neo4j_session: neo4j.Session, groups: List[Dict], current_aws_account_id: str, aws_update_tag: int,
 ) -> None:
     ingest_group = """
-    MERGE (gnode:AWSGroup{arn: $ARN})
-    ON CREATE SET gnode.groupid = $GROUP_ID, gnode.firstseen = timestamp(), gnode.createdate = $CREATE_DATE
-    SET gnode:AWSPrincipal, gnode.name = $GROUP_NAME, gnode.path = $PATH,gnode.lastupdated = $aws_update_tag
+    UNWIND $DictList AS group
+    MERGE (gnode:AWSGroup{arn: group.ARN})
+    ON CREATE SET gnode.groupid = group.GROUP_ID, gnode.firstseen = timestamp(), gnode.createdate = group.CREATE_DATE
+    SET gnode:AWSPrincipal, gnode.name = group.GROUP_NAME, gnode.path = group.PATH,gnode.lastupdated = $aws_update_tag
     WITH gnode
     MATCH (aa:AWSAccount{id: $AWS_ACCOUNT_ID})
     MERGE (aa)-[r:RESOURCE]->(gnode)
@@ -287,17 +297,23 @@ def load_groups(
     SET r.lastupdated = $aws_update_tag
     """
     logger.info(f"Loading {len(groups)} IAM groups to the graph.")
-    for group in groups:
-        neo4j_session.run(
-            ingest_group,
-            ARN=group["Arn"],
-            GROUP_ID=group["GroupId"],
-            CREATE_DATE=str(group["CreateDate"]),
-            GROUP_NAME=group["GroupName"],
-            PATH=group["Path"],
-            AWS_ACCOUNT_ID=current_aws_account_id,
-            aws_update_tag=aws_update_tag,
-        )
+    load_graph_data(
+        neo4j_session,
+        ingest_group,
+        [
+            {
+                'ARN': group["Arn"],
+                'GROUP_ID': group["GroupId"],
+                'CREATE_DATE': str(group["CreateDate"]),
+                'GROUP_NAME': group["GroupName"],
+                'PATH': group["Path"],
+            }
+            for group in groups
+        ],
+        AWS_ACCOUNT_ID=current_aws_account_id,
+        aws_update_tag=aws_update_tag,
+        operation_name=f'{__name__}.load_groups',
+    )
 
 
 def _parse_principal_entries(principal: Dict) -> List[Tuple[Any, Any]]:
@@ -320,14 +336,15 @@ def load_roles(
     neo4j_session: neo4j.Session, roles: List[Dict], current_aws_account_id: str, aws_update_tag: int,
 ) -> None:
     ingest_role = """
-    MERGE (rnode:AWSPrincipal{arn: $Arn})
+    UNWIND $DictList AS role
+    MERGE (rnode:AWSPrincipal{arn: role.Arn})
     ON CREATE SET rnode.firstseen = timestamp()
     SET
         rnode:AWSRole,
-        rnode.roleid = $RoleId,
-        rnode.createdate = $CreateDate,
-        rnode.name = $RoleName,
-        rnode.path = $Path,
+        rnode.roleid = role.RoleId,
+        rnode.createdate = role.CreateDate,
+        rnode.name = role.RoleName,
+        rnode.path = role.Path,
         rnode.lastupdated = $aws_update_tag
     WITH rnode
     MATCH (aa:AWSAccount{id: $AWS_ACCOUNT_ID})
@@ -337,11 +354,12 @@ def load_roles(
     """
 
     ingest_policy_statement = """
-    MERGE (spnnode:AWSPrincipal{arn: $SpnArn})
+    UNWIND $DictList AS trust
+    MERGE (spnnode:AWSPrincipal{arn: trust.SpnArn})
     ON CREATE SET spnnode.firstseen = timestamp()
-    SET spnnode.lastupdated = $aws_update_tag, spnnode.type = $SpnType
-    WITH spnnode
-    MATCH (role:AWSRole{arn: $RoleArn})
+    SET spnnode.lastupdated = $aws_update_tag, spnnode.type = trust.SpnType
+    WITH spnnode, trust
+    MATCH (role:AWSRole{arn: trust.RoleArn})
     MERGE (role)-[r:TRUSTS_AWS_PRINCIPAL]->(spnnode)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = $aws_update_tag
@@ -356,11 +374,12 @@ def load_roles(
     # - The foreign attribute - the attribute assignment logic is in aws_foreign_accounts.json analysis job
     # - Why seperate statement is needed - the arn may point to service level principals ex - ec2.amazonaws.com
     ingest_spnmap_statement = """
-    MERGE (aa:AWSAccount{id: $SpnAccountId})
+    UNWIND $DictList AS spn
+    MERGE (aa:AWSAccount{id: spn.SpnAccountId})
     ON CREATE SET aa.firstseen = timestamp()
     SET aa.lastupdated = $aws_update_tag
-    WITH aa
-    MATCH (spnnode:AWSPrincipal{arn: $SpnArn})
+    WITH aa, spn
+    MATCH (spnnode:AWSPrincipal{arn: spn.SpnArn})
     WITH spnnode, aa
     MERGE (aa)-[r:RESOURCE]->(spnnode)
     ON CREATE SET r.firstseen = timestamp()
@@ -368,44 +387,68 @@ def load_roles(
 
     # TODO support conditions
     logger.info(f"Loading {len(roles)} IAM roles to the graph.")
-    for role in roles:
-        neo4j_session.run(
-            ingest_role,
-            Arn=role["Arn"],
-            RoleId=role["RoleId"],
-            CreateDate=str(role["CreateDate"]),
-            RoleName=role["RoleName"],
-            Path=role["Path"],
-            AWS_ACCOUNT_ID=current_aws_account_id,
-            aws_update_tag=aws_update_tag,
-        )
+    role_data, trust_data, spn_account_data = transform_roles(roles)
+    # All roles are loaded before their trust relationships because a role's trusted principal may be another role.
+    load_graph_data(
+        neo4j_session,
+        ingest_role,
+        role_data,
+        AWS_ACCOUNT_ID=current_aws_account_id,
+        aws_update_tag=aws_update_tag,
+        operation_name=f'{__name__}.load_roles',
+    )
+    load_graph_data(
+        neo4j_session, ingest_policy_statement, trust_data, aws_update_tag=aws_update_tag,
+        operation_name=f'{__name__}.load_roles.trusts',
+    )
+    load_graph_data(
+        neo4j_session, ingest_spnmap_statement, spn_account_data, aws_update_tag=aws_update_tag,
+        operation_name=f'{__name__}.load_roles.spn_accounts',
+    )
 
+
+def transform_roles(roles: List[Dict]) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """
+    Flattens roles and their trust policies into the rows loaded by load_roles().
+    :return: (role rows, one row per (role, trusted principal), one row per distinct trusted principal that belongs to
+        an AWS account)
+    """
+    role_data: List[Dict] = []
+    # Dicts keyed by the row contents drop duplicate rows while keeping the original order
+    trust_data: Dict[Tuple[str, str, str], Dict] = {}
+    spn_account_data: Dict[Tuple[str, str], Dict] = {}
+    for role in roles:
+        role_data.append({
+            'Arn': role["Arn"],
+            'RoleId': role["RoleId"],
+            'CreateDate': str(role["CreateDate"]),
+            'RoleName': role["RoleName"],
+            'Path': role["Path"],
+        })
         for statement in role["AssumeRolePolicyDocument"]["Statement"]:
             principal_entries = _parse_principal_entries(statement["Principal"])
             for principal_type, principal_value in principal_entries:
-                neo4j_session.run(
-                    ingest_policy_statement,
-                    SpnArn=principal_value,
-                    SpnType=principal_type,
-                    RoleArn=role['Arn'],
-                    aws_update_tag=aws_update_tag,
-                )
-                spn_arn = get_account_from_arn(principal_value)
-                if spn_arn:
-                    neo4j_session.run(
-                        ingest_spnmap_statement,
-                        SpnArn=principal_value,
-                        SpnAccountId=get_account_from_arn(principal_value),
-                        aws_update_tag=aws_update_tag,
-                    )
+                trust_data[(role['Arn'], principal_value, principal_type)] = {
+                    'SpnArn': principal_value,
+                    'SpnType': principal_type,
+                    'RoleArn': role['Arn'],
+                }
+                spn_account_id = get_account_from_arn(principal_value)
+                if spn_account_id:
+                    spn_account_data[(principal_value, spn_account_id)] = {
+                        'SpnArn': principal_value,
+                        'SpnAccountId': spn_account_id,
+                    }
+    return role_data, list(trust_data.values()), list(spn_account_data.values())
 
 
 @timeit
 def load_group_memberships(neo4j_session: neo4j.Session, group_memberships: Dict, aws_update_tag: int) -> None:
     ingest_membership = """
-    MATCH (group:AWSGroup{arn: $GroupArn})
-    WITH group
-    MATCH (user:AWSUser{arn: $PrincipalArn})
+    UNWIND $DictList AS membership
+    MATCH (group:AWSGroup{arn: membership.GroupArn})
+    WITH group, membership
+    MATCH (user:AWSUser{arn: membership.PrincipalArn})
     MERGE (user)-[r:MEMBER_AWS_GROUP]->(group)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = $aws_update_tag
@@ -415,15 +458,17 @@ def load_group_memberships(neo4j_session: neo4j.Session, group_memberships: Dict
     SET r2.lastupdated = $aws_update_tag
     """
 
-    for group_arn, membership_data in group_memberships.items():
-        for info in membership_data.get("Users", []):
-            principal_arn = info["Arn"]
-            neo4j_session.run(
-                ingest_membership,
-                GroupArn=group_arn,
-                PrincipalArn=principal_arn,
-                aws_update_tag=aws_update_tag,
-            )
+    load_graph_data(
+        neo4j_session,
+        ingest_membership,
+        [
+            {'GroupArn': group_arn, 'PrincipalArn': info["Arn"]}
+            for group_arn, membership_data in group_memberships.items()
+            for info in membership_data.get("Users", [])
+        ],
+        aws_update_tag=aws_update_tag,
+        operation_name=f'{__name__}.load_group_memberships',
+    )
 
 
 @timeit
@@ -478,7 +523,10 @@ def sync_assumerole_relationships(
     )
     potential_matches = [(r["source_arn"], r["target_arn"]) for r in results]
     for source_arn, target_arn in potential_matches:
-        policies = get_policies_for_principal(neo4j_session, source_arn)
+        # Use the policies cached by sync() where we have them; sources in other accounts are read from the graph.
+        policies = policy_cache.get_principal_policies(source_arn)
+        if policies is None:
+            policies = get_policies_for_principal(neo4j_session, source_arn)
         if principal_allowed_on_resource(policies, target_arn, ["sts:AssumeRole"]):
             neo4j_session.run(
                 ingest_policies_assume_role,
@@ -497,35 +545,42 @@ def sync_assumerole_relationships(
 def load_user_access_keys(neo4j_session: neo4j.Session, user_access_keys: Dict, aws_update_tag: int) -> None:
     # TODO change the node label to reflect that this is a user access key, not an account access key
     ingest_account_key = """
-    MATCH (user:AWSUser{arn: $UserARN})
-    WITH user
-    MERGE (key:AccountAccessKey{accesskeyid: $AccessKeyId})
-    ON CREATE SET key.firstseen = timestamp(), key.createdate = $CreateDate
-    SET key.status = $Status,
+    UNWIND $DictList AS access_key
+    MATCH (user:AWSUser{arn: access_key.UserARN})
+    WITH user, access_key
+    MERGE (key:AccountAccessKey{accesskeyid: access_key.AccessKeyId})
+    ON CREATE SET key.firstseen = timestamp(), key.createdate = access_key.CreateDate
+    SET key.status = access_key.Status,
         key.lastupdated = $aws_update_tag,
-        key.lastuseddate = $LastUsedDate,
-        key.lastusedservice = $LastUsedService,
-        key.lastusedregion = $LastUsedRegion
+        key.lastuseddate = access_key.LastUsedDate,
+        key.lastusedservice = access_key.LastUsedService,
+        key.lastusedregion = access_key.LastUsedRegion
     WITH user,key
     MERGE (user)-[r:AWS_ACCESS_KEY]->(key)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = $aws_update_tag
     """
 
-    for arn, access_keys in user_access_keys.items():
-        for key in access_keys["AccessKeyMetadata"]:
-            if key.get('AccessKeyId'):
-                neo4j_session.run(
-                    ingest_account_key,
-                    UserARN=arn,
-                    AccessKeyId=key['AccessKeyId'],
-                    CreateDate=str(key['CreateDate']),
-                    Status=key['Status'],
-                    LastUsedDate=key['LastUsedDate'],
-                    LastUsedService=key['LastUsedService'],
-                    LastUsedRegion=key['LastUsedRegion'],
-                    aws_update_tag=aws_update_tag,
-                )
+    load_graph_data(
+        neo4j_session,
+        ingest_account_key,
+        [
+            {
+                'UserARN': arn,
+                'AccessKeyId': key['AccessKeyId'],
+                'CreateDate': str(key['CreateDate']),
+                'Status': key['Status'],
+                'LastUsedDate': key['LastUsedDate'],
+                'LastUsedService': key['LastUsedService'],
+                'LastUsedRegion': key['LastUsedRegion'],
+            }
+            for arn, access_keys in user_access_keys.items()
+            for key in access_keys["AccessKeyMetadata"]
+            if key.get('AccessKeyId')
+        ],
+        aws_update_tag=aws_update_tag,
+        operation_name=f'{__name__}.load_user_access_keys',
+    )
 
 
 def ensure_list(obj: Any) -> List[Any]:
@@ -574,6 +629,35 @@ def transform_policy_id(principal_arn: str, policy_type: str, name: str) -> str:
     return f"{principal_arn}/{policy_type}_policy/{name}"
 
 
+def cache_policy_data(policy_map: Dict, policy_type: str) -> None:
+    """
+    Adds transformed policies to the account's in-memory policy cache, keyed by the same policy ids that
+    load_policy_data() uses in the graph.
+    """
+    policy_cache.add_policies({
+        principal_arn: {
+            transform_policy_id(
+                principal_arn,
+                policy_type,
+                policy_key,
+            ) if policy_type == PolicyType.inline.value else policy_key: statements
+            for policy_key, statements in policy_statement_map.items()
+        }
+        for principal_arn, policy_statement_map in policy_map.items()
+    })
+
+
+def cache_group_memberships(group_memberships: Dict) -> None:
+    """
+    Adds each group's cached policies to its member users, mirroring the (user)-[:POLICY]->(policy) relationships
+    that load_group_memberships() creates in the graph.
+    """
+    policy_cache.add_group_members({
+        group_arn: [info["Arn"] for info in membership_data.get("Users", [])]
+        for group_arn, membership_data in group_memberships.items()
+    })
+
+
 def _load_policy_tx(
     tx: neo4j.Transaction, policy_id: str, policy_name: str, policy_type: str, principal_arn: str,
     aws_update_tag: int,
@@ -641,14 +725,60 @@ def load_policy_statements(
 
 
 @timeit
-def load_policy_data(
-        neo4j_session: neo4j.Session,
-        principal_policy_map: Dict[str, Dict[str, Any]],
-        policy_type: str,
-        aws_update_tag: int,
-) -> None:
+def load_policies(neo4j_session: neo4j.Session, policies: List[Dict], aws_update_tag: int) -> None:
+    """
+    Batched equivalent of calling load_policy() and then load_policy_statements() for each policy.
+    :param policies: Dicts with keys PolicyId, PolicyName, PolicyType, PrincipalArn and Statements, as returned by
+        transform_policies_for_load().
+    """
+    ingest_policies = """
+    UNWIND $DictList AS policy_data
+    MERGE (policy:AWSPolicy{id: policy_data.PolicyId})
+    ON CREATE SET
+        policy.firstseen = timestamp(),
+        policy.type = policy_data.PolicyType,
+        policy.name = policy_data.PolicyName
+    SET policy.lastupdated = $aws_update_tag
+    WITH policy, policy_data
+    MATCH (principal:AWSPrincipal{arn: policy_data.PrincipalArn})
+    MERGE (policy) <-[r:POLICY]-(principal)
+    SET r.lastupdated = $aws_update_tag
+    """
+    ingest_policy_statements = """
+    UNWIND $DictList AS policy_data
+    MATCH (policy:AWSPolicy{id: policy_data.PolicyId})
+    WITH policy, policy_data
+    UNWIND policy_data.Statements as statement_data
+    MERGE (statement:AWSPolicyStatement{id: statement_data.id})
+    SET
+    statement.effect = statement_data.Effect,
+    statement.action = statement_data.Action,
+    statement.notaction = statement_data.NotAction,
+    statement.resource = statement_data.Resource,
+    statement.notresource = statement_data.NotResource,
+    statement.condition = statement_data.Condition,
+    statement.sid = statement_data.Sid,
+    statement.lastupdated = $aws_update_tag
+    MERGE (policy)-[r:STATEMENT]->(statement)
+    ON CREATE SET r.firstseen = timestamp()
+    SET r.lastupdated = $aws_update_tag
+    """
+    load_graph_data(
+        neo4j_session, ingest_policies, policies, aws_update_tag=aws_update_tag,
+        operation_name=f'{__name__}.load_policies',
+    )
+    load_graph_data(
+        neo4j_session, ingest_policy_statements, policies, aws_update_tag=aws_update_tag,
+        operation_name=f'{__name__}.load_policies.statements',
+    )
+
+
+def transform_policies_for_load(principal_policy_map: Dict[str, Dict[str, Any]], policy_type: str) -> List[Dict]:
+    """
+    Flattens a principal -> policy -> statements map into one row per (principal, policy) for load_policies().
+    """
+    policies = []
     for principal_arn, policy_statement_map in principal_policy_map.items():
-        logger.debug(f"Loading policies for principal {principal_arn}")
         for policy_key, statements in policy_statement_map.items():
             policy_name = policy_key if policy_type == PolicyType.inline.value else get_policy_name_from_arn(policy_key)
             policy_id = transform_policy_id(
@@ -656,8 +786,26 @@ def load_policy_data(
                 policy_type,
                 policy_key,
             ) if policy_type == PolicyType.inline.value else policy_key
-            load_policy(neo4j_session, policy_id, policy_name, policy_type, principal_arn, aws_update_tag)
-            load_policy_statements(neo4j_session, policy_id, policy_name, statements, aws_update_tag)
+            policies.append({
+                'PolicyId': policy_id,
+                'PolicyName': policy_name,
+                'PolicyType': policy_type,
+                'PrincipalArn': principal_arn,
+                'Statements': statements,
+            })
+    return policies
+
+
+@timeit
+def load_policy_data(
+        neo4j_session: neo4j.Session,
+        principal_policy_map: Dict[str, Dict[str, Any]],
+        policy_type: str,
+        aws_update_tag: int,
+) -> None:
+    policies = transform_policies_for_load(principal_policy_map, policy_type)
+    logger.debug(f"Loading {len(policies)} {policy_type} policies for {len(principal_policy_map)} principals.")
+    load_policies(neo4j_session, policies, aws_update_tag)
 
 
 @timeit
@@ -683,6 +831,7 @@ def sync_user_managed_policies(
 ) -> None:
     managed_policy_data = get_user_managed_policy_data(boto3_session, data['Users'])
     transform_policy_data(managed_policy_data, PolicyType.managed.value)
+    cache_policy_data(managed_policy_data, PolicyType.managed.value)
     load_policy_data(neo4j_session, managed_policy_data, PolicyType.managed.value, aws_update_tag)
 
 
@@ -693,6 +842,7 @@ def sync_user_inline_policies(
 ) -> None:
     policy_data = get_user_policy_data(boto3_session, data['Users'])
     transform_policy_data(policy_data, PolicyType.inline.value)
+    cache_policy_data(policy_data, PolicyType.inline.value)
     load_policy_data(neo4j_session, policy_data, PolicyType.inline.value, aws_update_tag)
 
 
@@ -718,6 +868,7 @@ def sync_group_managed_policies(
 ) -> None:
     managed_policy_data = get_group_managed_policy_data(boto3_session, data["Groups"])
     transform_policy_data(managed_policy_data, PolicyType.managed.value)
+    cache_policy_data(managed_policy_data, PolicyType.managed.value)
     load_policy_data(neo4j_session, managed_policy_data, PolicyType.managed.value, aws_update_tag)
 
 
@@ -727,6 +878,7 @@ def sync_groups_inline_policies(
 ) -> None:
     policy_data = get_group_policy_data(boto3_session, data["Groups"])
     transform_policy_data(policy_data, PolicyType.inline.value)
+    cache_policy_data(policy_data, PolicyType.inline.value)
     load_policy_data(neo4j_session, policy_data, PolicyType.inline.value, aws_update_tag)
 
 
@@ -753,6 +905,7 @@ def sync_role_managed_policies(
     logger.info("Syncing IAM role managed policies for account '%s'.", current_aws_account_id)
     managed_policy_data = get_role_managed_policy_data(boto3_session, data["Roles"])
     transform_policy_data(managed_policy_data, PolicyType.managed.value)
+    cache_policy_data(managed_policy_data, PolicyType.managed.value)
     load_policy_data(neo4j_session, managed_policy_data, PolicyType.managed.value, aws_update_tag)
 
 
@@ -763,6 +916,7 @@ def sync_role_inline_policies(
     logger.info("Syncing IAM role inline policies for account '%s'.", current_aws_account_id)
     inline_policy_data = get_role_policy_data(boto3_session, data["Roles"])
     transform_policy_data(inline_policy_data, PolicyType.inline.value)
+    cache_policy_data(inline_policy_data, PolicyType.inline.value)
     load_policy_data(neo4j_session, inline_policy_data, PolicyType.inline.value, aws_update_tag)
 
 
@@ -777,6 +931,7 @@ def sync_group_memberships(
     groups = neo4j_session.run(query, AWS_ACCOUNT_ID=current_aws_account_id)
     groups_membership = {group["arn"]: get_group_membership_data(boto3_session, group["name"]) for group in groups}
     load_group_memberships(neo4j_session, groups_membership, aws_update_tag)
+    cache_group_memberships(groups_membership)
     run_cleanup_job(
         'aws_import_groups_membership_cleanup.json',
         neo4j_session,
@@ -792,11 +947,13 @@ def sync_user_access_keys(
     logger.info("Syncing IAM user access keys for account '%s'.", current_aws_account_id)
     query = "MATCH (user:AWSUser)<-[:RESOURCE]-(:AWSAccount{id: $AWS_ACCOUNT_ID}) " \
             "RETURN user.name as name, user.arn as arn"
-    for user in neo4j_session.run(query, AWS_ACCOUNT_ID=current_aws_account_id):
+    users = neo4j_session.run(query, AWS_ACCOUNT_ID=current_aws_account_id).data()
+    account_access_keys = {}
+    for user in users:
         access_keys = get_account_access_key_data(boto3_session, user["name"])
         if access_keys:
-            account_access_keys = {user["arn"]: access_keys}
-            load_user_access_keys(neo4j_session, account_access_keys, aws_update_tag)
+            account_access_keys[user["arn"]] = access_keys
+    load_user_access_keys(neo4j_session, account_access_keys, aws_update_tag)
     run_cleanup_job(
         'aws_import_account_access_key_cleanup.json',
         neo4j_session,
@@ -810,6 +967,9 @@ def sync(
     update_tag: int, common_job_parameters: Dict,
 ) -> None:
     logger.info("Syncing IAM for account '%s'.", current_aws_account_id)
+    # Keep the account's policies in memory for sync_assumerole_relationships() and permission_relationships.sync().
+    # The cache is released by cartography.intel.aws._sync_one_account() once the account is done.
+    policy_cache.start_account(current_aws_account_id)
     # This module only syncs IAM information that is in use.
     # As such only policies that are attached to a user, role or group are synced
     sync_users(neo4j_session, boto3_session, current_aws_account_id, update_tag, common_job_parameters)
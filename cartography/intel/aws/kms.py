@@ -14,8 +14,10 @@ from botocore.exceptions import ClientError
 from policyuniverse.policy import Policy
 
 from cartography.util import aws_handle_regions
+from cartography.util import is_throttling_exception
 from cartography.util import run_cleanup_job
 from cartography.util import timeit
+from cartography.util.concurrency import map_bounded
 
 logger = logging.getLogger(__name__)
 
@@ -29,17 +31,17 @@ def get_kms_key_list(boto3_session: boto3.session.Session, region: str) -> List[
     for page in paginator.paginate():
         key_list.extend(page['Keys'])
 
-    described_key_list = []
-    for key in key_list:
+    def _describe_key(key: Dict) -> Optional[Dict]:
         try:
-            response = client.describe_key(KeyId=key["KeyId"])['KeyMetadata']
+            return client.describe_key(KeyId=key["KeyId"])['KeyMetadata']
         except ClientError as e:
+            if is_throttling_exception(e):
+                # Let map_bounded() retry it
+                raise
             logger.warning("Failed to describe key with key id - {}. Error - {}".format(key["KeyId"], e))
-            continue
-
-        described_key_list.append(response)
+            return None
 
-    return described_key_list
+    return [key for key in map_bounded(_describe_key, key_list, service='kms') if key is not None]
 
 
 @timeit
@@ -51,11 +53,12 @@ def get_kms_key_details(
     Iterates over all KMS Keys.
     """
     client = boto3_session.client('kms', region_name=region)
-    for key in kms_key_data:
-        policy = get_policy(key, client)
-        aliases = get_aliases(key, client)
-        grants = get_grants(key, client)
-        yield key['KeyId'], policy, aliases, grants
+
+    def _get_key_details(key: Dict) -> Tuple[str, Any, List[Any], List[Any]]:
+        return key['KeyId'], get_policy(key, client), get_aliases(key, client), get_grants(key, client)
+
+    # Keys are fetched concurrently on the shared pool, and yielded in order as they are fetched
+    yield from map_bounded(_get_key_details, kms_key_data, service='kms')
 
 
 @timeit
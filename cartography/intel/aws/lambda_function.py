@@ -8,6 +8,7 @@ import boto3
 import botocore
 import neo4j
 
+from cartography.intel.aws.util.regions import fetch_and_load_regions
 from cartography.util import aws_handle_regions
 from cartography.util import run_cleanup_job
 from cartography.util import timeit
@@ -241,13 +242,20 @@ def sync_lambda_functions(
         neo4j_session: neo4j.Session, boto3_session: boto3.session.Session, regions: List[str],
         current_aws_account_id: str, aws_update_tag: int, common_job_parameters: Dict,
 ) -> None:
-    for region in regions:
+    LambdaRegionData = Tuple[List[Dict], List[Tuple[str, List[Any], List[Any], List[Any]]]]
+
+    def _fetch_region(boto3_session: boto3.session.Session, region: str) -> LambdaRegionData:
         logger.info("Syncing Lambda for region in '%s' in account '%s'.", region, current_aws_account_id)
         data = get_lambda_data(boto3_session, region)
-        load_lambda_functions(neo4j_session, data, region, current_aws_account_id, aws_update_tag)
         lambda_function_details = get_lambda_function_details(boto3_session, data, region)
+        return data, lambda_function_details
+
+    def _load_region(region: str, region_data: LambdaRegionData) -> None:
+        data, lambda_function_details = region_data
+        load_lambda_functions(neo4j_session, data, region, current_aws_account_id, aws_update_tag)
         load_lambda_function_details(neo4j_session, lambda_function_details, aws_update_tag)
 
+    fetch_and_load_regions(boto3_session, regions, _fetch_region, _load_region)
     cleanup_lambda(neo4j_session, common_job_parameters)
 
 
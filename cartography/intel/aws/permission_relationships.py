@@ -1,11 +1,17 @@
 import logging
+import multiprocessing
 import os
 import re
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
 from string import Template
 from typing import Any
 from typing import Dict
+from typing import FrozenSet
 from typing import List
+from typing import Optional
 from typing import Pattern
+from typing import Set
 from typing import Tuple
 
 import boto3
@@ -13,6 +19,7 @@ import neo4j
 import yaml
 
 from cartography.graph.statement import GraphStatement
+from cartography.intel.aws.util import policy_cache
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -156,8 +163,242 @@ def principal_allowed_on_resource(policies: Dict, resource_arn: str, permissions
     return granted
 
 
+# Characters that end the literal prefix of a compiled clause. See _get_literal_prefix().
+_REGEX_SPECIAL_CHARS = frozenset('.^$*+?{}[]\\|()')
+
+# Identifies a statement by its effect and the patterns of its action/notaction/resource/notresource clauses, so that
+# identical statements in different policies (e.g. a managed policy attached to many principals) are evaluated once.
+StatementKey = Tuple[str, Tuple[Optional[Tuple[str, ...]], ...]]
+
+_STATEMENT_CLAUSES = ('action', 'notaction', 'resource', 'notresource')
+
+
+def _get_literal_prefix(pattern: Pattern) -> str:
+    """ Returns the lowercased literal text that every string fully matched by the compiled clause must start with,
+    e.g. "arn:aws:s3:::test" for the clause "arn:aws:s3:::test*". Returns an empty string if nothing can be assumed.
+    """
+    if '|' in pattern.pattern:
+        return ''
+    prefix: List[str] = []
+    chars = iter(pattern.pattern)
+    for c in chars:
+        if c == '\\':
+            escaped = next(chars, '')
+            if escaped != '.':
+                break
+            prefix.append('.')
+        elif c in _REGEX_SPECIAL_CHARS:
+            if c == '{' and prefix:
+                # A repetition like {0} can make the preceding character optional
+                prefix.pop()
+            break
+        else:
+            prefix.append(c)
+    return ''.join(prefix).lower()
+
+
+def _get_arn_service(arn: str) -> Optional[str]:
+    """ Returns the lowercased service of a (lowercased) ARN like "arn:aws:s3:::bucket", or None if it has no service
+    field.
+    """
+    parts = arn.split(':', 3)
+    return parts[2] if len(parts) == 4 else None
+
+
+class PermissionEvaluator:
+    """ Evaluates which principals have a set of permissions on a set of resources. This returns the same result as
+    calling principal_allowed_on_resource() for every (principal, resource) pair, but avoids most of the regex work:
+
+    - Resources are grouped by the service in their ARN. A resource clause with a literal service like
+      "arn:aws:s3:::test*" is only matched against the resources of that service, and only those that start with the
+      clause's literal prefix.
+    - Likewise a clause's action service prefix like "s3:" is compared against the permission's service before any
+      regex runs.
+    - Each unique (clause, permission) and (clause, resource) pair is evaluated once, and each unique statement and
+      policy is resolved once to the sets of resources it allows and denies.
+    """
+
+    def __init__(self, resource_arns: List[str], permissions: List[str]):
+        if not isinstance(permissions, list):
+            raise ValueError("permissions is not a list")
+        self.permissions = permissions
+        self.all_resources: FrozenSet[str] = frozenset(arn for arn in resource_arns if isinstance(arn, str))
+        self._resources_by_service: Dict[Optional[str], List[Tuple[str, str]]] = {}
+        for arn in self.all_resources:
+            lowered = arn.lower()
+            self._resources_by_service.setdefault(_get_arn_service(lowered), []).append((lowered, arn))
+        self._action_matches: Dict[str, FrozenSet[str]] = {}
+        self._resource_matches: Dict[str, FrozenSet[str]] = {}
+        self._statements: Dict[StatementKey, Tuple[FrozenSet[str], FrozenSet[str]]] = {}
+        self._policies: Dict[Tuple[StatementKey, ...], Tuple[FrozenSet[str], FrozenSet[str]]] = {}
+
+    def _match_actions(self, pattern: Pattern) -> FrozenSet[str]:
+        """ Returns the permissions fully matched by an action or notaction clause. """
+        matches = self._action_matches.get(pattern.pattern)
+        if matches is None:
+            prefix = _get_literal_prefix(pattern)
+            matches = frozenset(
+                permission for permission in self.permissions
+                if permission.lower().startswith(prefix) and pattern.fullmatch(permission)
+            )
+            self._action_matches[pattern.pattern] = matches
+        return matches
+
+    def _match_resources(self, pattern: Pattern) -> FrozenSet[str]:
+        """ Returns the resource ARNs fully matched by a resource or notresource clause. """
+        matches = self._resource_matches.get(pattern.pattern)
+        if matches is None:
+            prefix = _get_literal_prefix(pattern)
+            service = _get_arn_service(prefix)
+            if service is not None:
+                candidates = self._resources_by_service.get(service, [])
+            else:
+                candidates = [item for group in self._resources_by_service.values() for item in group]
+            matches = frozenset(
+                arn for lowered, arn in candidates
+                if lowered.startswith(prefix) and pattern.fullmatch(arn)
+            )
+            self._resource_matches[pattern.pattern] = matches
+        return matches
+
+    def _evaluate_statement(self, statement: Dict) -> Tuple[StatementKey, Tuple[FrozenSet[str], FrozenSet[str]]]:
+        """ Resolves a statement to (the permissions its action clauses apply to, the resources its resource clauses
+        apply to), following evaluate_statements_for_permission().
+        """
+        clauses: Dict[str, Optional[Tuple[Pattern, ...]]] = {
+            name: tuple(compile_regex(clause) for clause in statement[name]) if name in statement else None
+            for name in _STATEMENT_CLAUSES
+        }
+        key: StatementKey = (
+            statement['effect'],
+            tuple(
+                tuple(p.pattern for p in patterns) if patterns is not None else None
+                for patterns in clauses.values()
+            ),
+        )
+        result = self._statements.get(key)
+        if result is None:
+            action, notaction, resource, notresource = clauses.values()
+            actions: FrozenSet[str] = frozenset(self.permissions)
+            resources: FrozenSet[str] = frozenset()
+            if action is not None:
+                actions = frozenset().union(*(self._match_actions(p) for p in action))
+            if notaction is not None:
+                actions = actions.difference(*(self._match_actions(p) for p in notaction))
+            if actions and resource is not None:
+                resources = frozenset().union(*(self._match_resources(p) for p in resource))
+                if notresource is not None:
+                    resources = resources.difference(*(self._match_resources(p) for p in notresource))
+            result = (actions, resources) if resources else (frozenset(), frozenset())
+            self._statements[key] = result
+        return key, result
+
+    def evaluate_policy(self, statements: List[Dict]) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+        """ Returns (the resources the policy allows, the resources the policy explicitly denies) for the evaluator's
+        permissions, following evaluate_policy_for_permissions(): for each resource, the first permission that the
+        policy denies or allows decides the outcome.
+        """
+        evaluated = [(statement['effect'], *self._evaluate_statement(statement)) for statement in statements]
+        policy_key = tuple(key for _, key, _ in evaluated)
+        result = self._policies.get(policy_key)
+        if result is None:
+            allowed: Set[str] = set()
+            denied: Set[str] = set()
+            for permission in self.permissions:
+                deny_resources: Set[str] = set()
+                allow_resources: Set[str] = set()
+                for effect, _, (actions, resources) in evaluated:
+                    if permission in actions:
+                        if effect == 'Deny':
+                            deny_resources.update(resources)
+                        elif effect == 'Allow':
+                            allow_resources.update(resources)
+                deny_resources -= allowed
+                deny_resources -= denied
+                denied |= deny_resources
+                allowed |= allow_resources - denied
+            result = (frozenset(allowed), frozenset(denied))
+            self._policies[policy_key] = result
+        return result
+
+    def get_allowed_resources(self, policies: Dict) -> Set[str]:
+        """ Returns the resources that the given policies grant the evaluator's permissions on, following
+        principal_allowed_on_resource(): any explicit deny wins over any allow.
+        """
+        granted: Set[str] = set()
+        denied: Set[str] = set()
+        for statements in policies.values():
+            allowed, explicitly_denied = self.evaluate_policy(statements)
+            granted |= allowed
+            denied |= explicitly_denied
+        return granted - denied
+
+
+# A policy's statements reduced to their effect and the patterns of their compiled clauses. Unlike the statements
+# returned by get_principals_for_account(), these are cheap to pickle, so they can be sent to worker processes.
+PicklablePolicies = Dict[str, List[Dict[str, Any]]]
+
+
+def to_picklable_policies(policies: Dict) -> PicklablePolicies:
+    """ Converts a principal's policies to the form sent to worker processes: each statement keeps only its effect and
+    the regex pattern strings of its action/notaction/resource/notresource clauses.
+    """
+    result: PicklablePolicies = {}
+    for policy_id, statements in policies.items():
+        result[policy_id] = [
+            {
+                'effect': statement['effect'],
+                **{
+                    name: [compile_regex(clause).pattern for clause in statement[name]]
+                    for name in _STATEMENT_CLAUSES if name in statement
+                },
+            }
+            for statement in statements
+        ]
+    return result
+
+
+def from_picklable_policies(policies: PicklablePolicies) -> Dict:
+    """ Inverse of to_picklable_policies(). The pattern strings are already in regex form, so they are compiled directly
+    rather than through compile_regex().
+    """
+    return {
+        policy_id: [
+            {
+                name: [re.compile(pattern, flags=re.IGNORECASE) for pattern in value] if name != 'effect' else value
+                for name, value in statement.items()
+            }
+            for statement in statements
+        ]
+        for policy_id, statements in policies.items()
+    }
+
+
+def _calculate_allowed_resources_for_shard(
+    principals: Dict[str, PicklablePolicies], resource_arns: List[str], permissions: List[str],
+) -> Dict[str, Set[str]]:
+    """ Runs in a worker process: returns the resources each principal of the shard is allowed on. """
+    evaluator = PermissionEvaluator(resource_arns, permissions)
+    return {
+        principal_arn: evaluator.get_allowed_resources(from_picklable_policies(policies))
+        for principal_arn, policies in principals.items()
+    }
+
+
+def _shard_principals(
+    principals: Dict[str, PicklablePolicies], num_shards: int,
+) -> List[Dict[str, PicklablePolicies]]:
+    principal_arns = list(principals)
+    shard_size = -(-len(principal_arns) // num_shards)
+    return [
+        {principal_arn: principals[principal_arn] for principal_arn in principal_arns[i:i + shard_size]}
+        for i in range(0, len(principal_arns), shard_size)
+    ]
+
+
 def calculate_permission_relationships(
-    principals: Dict, resource_arns: List[str], permissions: List[str],
+    principals: Dict, resource_arns: List[str], permissions: List[str], executor: Optional[Executor] = None,
+    num_shards: int = 1,
 ) -> List[Dict]:
     """ Evaluate principals permissions to resources
     This currently only evaluates policies on IAM principals. It does not take into account
@@ -168,18 +409,45 @@ def calculate_permission_relationships(
     AWS Policy evaluation reference
     https://docs.aws.amazon.com/IAM/latest/UserGuide/reference_policies_evaluation-logic.html
 
+    The result is the same as calling principal_allowed_on_resource() for every (principal, resource) pair, but is
+    computed with a PermissionEvaluator.
+
     Arguments:
         principals {[dict]} -- The principals to check permission for
         resource_arns {[str]} -- The resources to test the permission against
         permissions {[str]} -- The permissions to evaluate
+        executor {Executor} -- Optional. If given, principals are split into num_shards shards that are evaluated on
+            the executor, e.g. a ProcessPoolExecutor. Policies are sent in the form returned by to_picklable_policies().
+        num_shards {int} -- The number of shards to split principals into when an executor is given.
 
     Returns:
         [dict] -- The allowed mappings
     """
+    allowed_by_principal: Dict[str, Set[str]] = {}
+    if executor is not None and num_shards > 1 and len(principals) > 1:
+        if not isinstance(permissions, list):
+            raise ValueError("permissions is not a list")
+        picklable_principals = {
+            principal_arn: to_picklable_policies(policies) for principal_arn, policies in principals.items()
+        }
+        futures = [
+            executor.submit(_calculate_allowed_resources_for_shard, shard, resource_arns, permissions)
+            for shard in _shard_principals(picklable_principals, num_shards)
+        ]
+        shard_results = [future.result() for future in futures]
+        # Merge the shards back in the original principal order so that the mappings come out in the same order
+        for shard_result in shard_results:
+            allowed_by_principal.update(shard_result)
+    else:
+        evaluator = PermissionEvaluator(resource_arns, permissions)
+        allowed_by_principal = {
+            principal_arn: evaluator.get_allowed_resources(policies) for principal_arn, policies in principals.items()
+        }
+
     allowed_mappings: List[Dict] = []
     for resource_arn in resource_arns:
-        for principal_arn, policies in principals.items():
-            if principal_allowed_on_resource(policies, resource_arn, permissions):
+        for principal_arn, allowed_resources in allowed_by_principal.items():
+            if resource_arn in allowed_resources:
                 allowed_mappings.append({"principal_arn": principal_arn, "resource_arn": resource_arn})
     return allowed_mappings
 
@@ -363,7 +631,15 @@ def sync(
     update_tag: int, common_job_parameters: Dict,
 ) -> None:
     logger.info("Syncing Permission Relationships for account '%s'.", current_aws_account_id)
-    principals = get_principals_for_account(neo4j_session, current_aws_account_id)
+    cached_principals = policy_cache.get_account_policies(current_aws_account_id)
+    if cached_principals is not None:
+        # The IAM sync for this account already has every principal's policies in memory
+        principals = {
+            principal_arn: {policy_id: compile_statement(statements) for policy_id, statements in policies.items()}
+            for principal_arn, policies in cached_principals.items()
+        }
+    else:
+        principals = get_principals_for_account(neo4j_session, current_aws_account_id)
     pr_file = common_job_parameters["permission_relationships_file"]
     if not pr_file:
         logger.warning(
@@ -372,20 +648,31 @@ def sync(
         )
         return
     relationship_mapping = parse_permission_relationships_file(pr_file)
-    for rpr in relationship_mapping:
-        if not is_valid_rpr(rpr):
-            raise ValueError("""
-        Resource permission relationship is missing fields.
-        Required fields: permissions, relationship_name, target_label"
-        """)
-        permissions = rpr["permissions"]
-        relationship_name = rpr["relationship_name"]
-        target_label = rpr["target_label"]
-        resource_arns = get_resource_arns(neo4j_session, current_aws_account_id, target_label)
-        logger.info("Syncing relationship '%s' for node label '%s'", relationship_name, target_label)
-        allowed_mappings = calculate_permission_relationships(principals, resource_arns, permissions)
-        load_principal_mappings(
-            neo4j_session, allowed_mappings,
-            target_label, relationship_name, update_tag,
-        )
-        cleanup_rpr(neo4j_session, target_label, relationship_name, update_tag, current_aws_account_id)
+    num_workers = common_job_parameters.get("permission_relationships_workers") or 1
+    executor: Optional[ProcessPoolExecutor] = None
+    if num_workers > 1 and relationship_mapping:
+        # Use spawn rather than fork: the parent has live Neo4j driver and boto3 threads that are not fork-safe.
+        executor = ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        for rpr in relationship_mapping:
+            if not is_valid_rpr(rpr):
+                raise ValueError("""
+            Resource permission relationship is missing fields.
+            Required fields: permissions, relationship_name, target_label"
+            """)
+            permissions = rpr["permissions"]
+            relationship_name = rpr["relationship_name"]
+            target_label = rpr["target_label"]
+            resource_arns = get_resource_arns(neo4j_session, current_aws_account_id, target_label)
+            logger.info("Syncing relationship '%s' for node label '%s'", relationship_name, target_label)
+            allowed_mappings = calculate_permission_relationships(
+                principals, resource_arns, permissions, executor=executor, num_shards=num_workers,
+            )
+            load_principal_mappings(
+                neo4j_session, allowed_mappings,
+                target_label, relationship_name, update_tag,
+            )
+            cleanup_rpr(neo4j_session, target_label, relationship_name, update_tag, current_aws_account_id)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
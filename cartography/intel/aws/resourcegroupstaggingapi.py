@@ -1,14 +1,19 @@
 import logging
+import re
 from string import Template
 from typing import Dict
+from typing import Iterable
 from typing import List
+from typing import Optional
 
 import boto3
+import botocore
 import neo4j
 
+from cartography.client.core.tx import load_graph_data
 from cartography.intel.aws.iam import get_role_tags
+from cartography.intel.aws.util.regions import fetch_and_load_regions
 from cartography.util import aws_handle_regions
-from cartography.util import batch
 from cartography.util import run_cleanup_job
 from cartography.util import timeit
 
@@ -116,40 +121,134 @@ TAG_RESOURCE_TYPE_MAPPINGS: Dict = {
 }
 
 
+# get_resources accepts at most this many ResourceTypeFilters per call
+MAX_RESOURCE_TYPE_FILTERS = 100
+
+
+# The `service:type` of some ARNs differs from the resource type filter that selects them. Maps those to their key in
+# TAG_RESOURCE_TYPE_MAPPINGS.
+ARN_RESOURCE_TYPE_ALIASES: Dict[str, str] = {
+    'ec2:elastic-ip': 'ec2:elastic-ip-address',
+}
+
+
+def _get_resources(client: botocore.client.BaseClient, resource_types: List[str]) -> List[Dict]:
+    paginator = client.get_paginator('get_resources')
+    resources: List[Dict] = []
+    for page in paginator.paginate(ResourceTypeFilters=resource_types):
+        resources.extend(page['ResourceTagMappingList'])
+    return resources
+
+
+def _is_invalid_parameter_error(e: botocore.exceptions.ClientError) -> bool:
+    return e.response['Error']['Code'] == 'InvalidParameterException'
+
+
 @timeit
 @aws_handle_regions
-def get_tags(boto3_session: boto3.session.Session, resource_type: str, region: str) -> List[Dict]:
+def get_tags(boto3_session: boto3.session.Session, resource_types: List[str], region: str) -> List[Dict]:
     """
-    Create boto3 client and retrieve tag data.
+    Create boto3 client and retrieve tag data for all of the given resource types. The types are requested together,
+    so a region costs one paginated get_resources call rather than one per type; use group_tags_by_resource_type() to
+    split the result back up.
     """
-    # this is a temporary workaround to populate AWS tags for IAM roles.
-    # resourcegroupstaggingapi does not support IAM roles and no ETA is provided
-    # TODO: when resourcegroupstaggingapi supports iam:role, remove this condition block
-    if resource_type == 'iam:role':
-        return get_role_tags(boto3_session)
-
     client = boto3_session.client('resourcegroupstaggingapi', region_name=region)
-    paginator = client.get_paginator('get_resources')
     resources: List[Dict] = []
-    for page in paginator.paginate(
+    for i in range(0, len(resource_types), MAX_RESOURCE_TYPE_FILTERS):
         # Only ingest tags for resources that Cartography supports.
         # This is just a starting list; there may be others supported by this API.
-        ResourceTypeFilters=[resource_type],
-    ):
-        resources.extend(page['ResourceTagMappingList'])
+        chunk = resource_types[i:i + MAX_RESOURCE_TYPE_FILTERS]
+        try:
+            resources.extend(_get_resources(client, chunk))
+        except botocore.exceptions.ClientError as e:
+            if not _is_invalid_parameter_error(e):
+                raise
+            # A single filter that the region rejects fails the whole call, so fall back to one call per type and
+            # skip only the rejected ones.
+            logger.warning(
+                f"get_resources rejected the resource type filters in region {region}, requesting them one at a "
+                f"time: {e.response['Error']['Message']}",
+            )
+            for resource_type in chunk:
+                try:
+                    resources.extend(_get_resources(client, [resource_type]))
+                except botocore.exceptions.ClientError as type_error:
+                    if not _is_invalid_parameter_error(type_error):
+                        raise
+                    logger.warning(
+                        f"Skipping tags of resource type {resource_type} in region {region}: "
+                        f"{type_error.response['Error']['Message']}",
+                    )
     return resources
 
 
-def _load_tags_tx(
-    tx: neo4j.Transaction,
-    tag_data: Dict,
+@timeit
+@aws_handle_regions
+def get_iam_role_tags(boto3_session: boto3.session.Session) -> List[Dict]:
+    """
+    Retrieve tag data for IAM roles, in the same form as get_tags().
+    """
+    # this is a temporary workaround to populate AWS tags for IAM roles.
+    # resourcegroupstaggingapi does not support IAM roles and no ETA is provided
+    # TODO: when resourcegroupstaggingapi supports iam:role, remove this function
+    return get_role_tags(boto3_session)
+
+
+def get_resource_type_from_arn(arn: str, resource_types: Iterable[str]) -> Optional[str]:
+    """
+    Return which of the given resource types, as in TAG_RESOURCE_TYPE_MAPPINGS, the resource with the given ARN is.
+    ARNs end in `service:type/id`, `service:type:id` or `service:id` (S3 buckets and SQS queues), so the most specific
+    matching type wins, e.g. 'elasticloadbalancing:loadbalancer/app' before 'elasticloadbalancing:loadbalancer'. Types
+    whose ARNs spell them differently are translated through ARN_RESOURCE_TYPE_ALIASES.
+    For example, for "arn:aws:ec2:us-east-1:test_account:instance/i-1337", return 'ec2:instance'.
+    :param arn: The ARN
+    :param resource_types: The resource types to choose from
+    :return: The resource type, or None if the ARN is not of any of the given types
+    """
+    arn_parts = arn.split(':', 5)
+    if len(arn_parts) < 6:
+        return None
+    service, resource = arn_parts[2], arn_parts[5]
+    resource_path = re.split('[/:]', resource)
+    candidates = [f'{service}:{resource_path[0]}', service]
+    if len(resource_path) > 2:
+        candidates.insert(0, f'{service}:{resource_path[0]}/{resource_path[1]}')
+    for candidate in candidates:
+        candidate = ARN_RESOURCE_TYPE_ALIASES.get(candidate, candidate)
+        if candidate in resource_types:
+            return candidate
+    return None
+
+
+def group_tags_by_resource_type(tag_data: List[Dict], resource_types: List[str]) -> Dict[str, List[Dict]]:
+    """
+    Split the tag mappings returned by get_tags() by resource type, in the order of `resource_types`. Mappings of
+    resources that are not of any of the given types are dropped with a warning: get_tags() only returns resources of
+    the requested types, so such an ARN means that get_resource_type_from_arn() does not recognize its type.
+    """
+    tags_by_type: Dict[str, List[Dict]] = {resource_type: [] for resource_type in resource_types}
+    for tag_mapping in tag_data:
+        resource_type = get_resource_type_from_arn(tag_mapping['ResourceARN'], tags_by_type)
+        if resource_type is None:
+            logger.warning(
+                f"Skipping tags of {tag_mapping['ResourceARN']}, its ARN does not match any synced resource type.",
+            )
+            continue
+        tags_by_type[resource_type].append(tag_mapping)
+    return tags_by_type
+
+
+@timeit
+def load_tags(
+    neo4j_session: neo4j.Session,
+    tag_data: List[Dict],
     resource_type: str,
     region: str,
     current_aws_account_id: str,
     aws_update_tag: int,
 ) -> None:
     INGEST_TAG_TEMPLATE = Template("""
-    UNWIND $TagData as tag_mapping
+    UNWIND $DictList as tag_mapping
         UNWIND tag_mapping.Tags as input_tag
             MATCH
             (a:AWSAccount{id:$Account})-[res:RESOURCE]->(resource:$resource_label{$property:tag_mapping.resource_id})
@@ -170,37 +269,19 @@ def _load_tags_tx(
         resource_label=TAG_RESOURCE_TYPE_MAPPINGS[resource_type]['label'],
         property=TAG_RESOURCE_TYPE_MAPPINGS[resource_type]['property'],
     )
-    tx.run(
+    load_graph_data(
+        neo4j_session,
         query,
-        TagData=tag_data,
+        tag_data,
         UpdateTag=aws_update_tag,
         Region=region,
         Account=current_aws_account_id,
+        operation_name=f'{__name__}.load_tags.{resource_type}',
     )
 
 
 @timeit
-def load_tags(
-    neo4j_session: neo4j.Session,
-    tag_data: Dict,
-    resource_type: str,
-    region: str,
-    current_aws_account_id: str,
-    aws_update_tag: int,
-) -> None:
-    for tag_data_batch in batch(tag_data, size=100):
-        neo4j_session.write_transaction(
-            _load_tags_tx,
-            tag_data=tag_data_batch,
-            resource_type=resource_type,
-            region=region,
-            current_aws_account_id=current_aws_account_id,
-            aws_update_tag=aws_update_tag,
-        )
-
-
-@timeit
-def transform_tags(tag_data: Dict, resource_type: str) -> None:
+def transform_tags(tag_data: List[Dict], resource_type: str) -> None:
     for tag_mapping in tag_data:
         tag_mapping['resource_id'] = compute_resource_id(tag_mapping, resource_type)
 
@@ -228,18 +309,30 @@ def sync(
     common_job_parameters: Dict,
     tag_resource_type_mappings: Dict = TAG_RESOURCE_TYPE_MAPPINGS,
 ) -> None:
-    for region in regions:
+    # IAM role tags are not served by resourcegroupstaggingapi. IAM is global, so they are fetched once rather than
+    # per region and loaded along with every region.
+    resource_types = [resource_type for resource_type in tag_resource_type_mappings if resource_type != 'iam:role']
+    role_tags = get_iam_role_tags(boto3_session) if 'iam:role' in tag_resource_type_mappings else []
+
+    def _fetch_region(boto3_session: boto3.session.Session, region: str) -> List[Dict]:
         logger.info(f"Syncing AWS tags for account {current_aws_account_id} and region {region}")
-        for resource_type in tag_resource_type_mappings.keys():
-            tag_data = get_tags(boto3_session, resource_type, region)
-            transform_tags(tag_data, resource_type)  # type: ignore
-            logger.info(f"Loading {len(tag_data)} tags for resource type {resource_type}")
+        return get_tags(boto3_session, resource_types, region)
+
+    def _load_region(region: str, tag_data: List[Dict]) -> None:
+        tag_data_by_type = group_tags_by_resource_type(tag_data, resource_types)
+        if 'iam:role' in tag_resource_type_mappings:
+            tag_data_by_type['iam:role'] = role_tags
+        for resource_type, resource_tag_data in tag_data_by_type.items():
+            transform_tags(resource_tag_data, resource_type)
+            logger.info(f"Loading {len(resource_tag_data)} tags for resource type {resource_type}")
             load_tags(
                 neo4j_session=neo4j_session,
-                tag_data=tag_data,  # type: ignore
+                tag_data=resource_tag_data,
                 resource_type=resource_type,
                 region=region,
                 current_aws_account_id=current_aws_account_id,
                 aws_update_tag=update_tag,
             )
+
+    fetch_and_load_regions(boto3_session, regions, _fetch_region, _load_region)
     cleanup(neo4j_session, common_job_parameters)
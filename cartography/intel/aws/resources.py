@@ -1,4 +1,5 @@
 from typing import Dict
+from typing import List
 
 from . import apigateway
 from . import config
@@ -50,8 +51,6 @@ RESOURCE_FUNCTIONS: Dict = {
     'dynamodb': dynamodb.sync,
     'ec2:launch_templates': sync_ec2_launch_templates,
     'ec2:autoscalinggroup': sync_ec2_auto_scaling_groups,
-    # `ec2:instance` must be included before `ssm` and `ec2:images`,
-    # they rely on EC2Instance data provided by this module.
     'ec2:instance': sync_ec2_instances,
     'ec2:images': sync_ec2_images,
     'ec2:keypair': sync_ec2_key_pairs,
@@ -91,3 +90,61 @@ RESOURCE_FUNCTIONS: Dict = {
     'config': config.sync,
     'identitycenter': identitycenter.sync_identity_center_instances,
 }
+
+# Maps each sync in RESOURCE_FUNCTIONS to the syncs that must finish before it starts. A sync depends on another if it
+# attaches to or MERGEs nodes that the other one loads, e.g. `ssm` and `ec2:images` rely on EC2Instance data provided by
+# `ec2:instance`. Syncs that are not listed have no dependencies beyond the AWSAccount node and can run at any time.
+# See cartography.intel.aws.util.scheduler.
+RESOURCE_DEPENDENCIES: Dict[str, List[str]] = {
+    'ec2:autoscalinggroup': ['ec2:launch_templates'],
+    'ec2:instance': ['ec2:autoscalinggroup'],
+    'ec2:images': ['ec2:launch_templates', 'ec2:autoscalinggroup', 'ec2:instance'],
+    'ec2:keypair': ['ec2:instance'],
+    'ec2:load_balancer_v2': ['ec2:autoscalinggroup', 'ec2:instance', 'ec2:load_balancer'],
+    'ec2:network_acls': ['ec2:autoscalinggroup', 'ec2:instance', 'ec2:load_balancer_v2'],
+    'ec2:network_interface': [
+        'ec2:autoscalinggroup', 'ec2:instance', 'ec2:load_balancer', 'ec2:load_balancer_v2', 'ec2:network_acls',
+    ],
+    'ec2:security_group': ['ec2:instance', 'ec2:keypair', 'ec2:network_acls', 'ec2:network_interface'],
+    'ec2:subnet': [
+        'ec2:autoscalinggroup', 'ec2:instance', 'ec2:keypair', 'ec2:load_balancer_v2', 'ec2:network_acls',
+        'ec2:network_interface', 'ec2:security_group',
+    ],
+    'ec2:tgw': [
+        'iam', 'ec2:autoscalinggroup', 'ec2:instance', 'ec2:load_balancer_v2', 'ec2:network_acls',
+        'ec2:network_interface', 'ec2:subnet',
+    ],
+    'ec2:vpc': ['ec2:network_acls', 'ec2:tgw'],
+    'ec2:vpc_peering': ['iam', 'ec2:network_acls', 'ec2:tgw', 'ec2:vpc'],
+    'ec2:internet_gateway': ['ec2:network_acls', 'ec2:tgw', 'ec2:vpc', 'ec2:vpc_peering'],
+    'ec2:volumes': ['ec2:instance', 'ec2:keypair', 'ec2:security_group', 'ec2:subnet'],
+    'ec2:snapshots': ['ec2:instance', 'ec2:volumes'],
+    'elastic_ip_addresses': [
+        'ec2:instance', 'ec2:keypair', 'ec2:network_interface', 'ec2:security_group', 'ec2:subnet', 'ec2:volumes',
+    ],
+    'lambda_function': ['iam'],
+    'rds': [
+        'ec2:autoscalinggroup', 'ec2:instance', 'ec2:load_balancer_v2', 'ec2:network_acls', 'ec2:network_interface',
+        'ec2:security_group', 'ec2:subnet', 'ec2:tgw',
+    ],
+    'redshift': [
+        'iam', 'ec2:instance', 'ec2:network_acls', 'ec2:network_interface', 'ec2:security_group', 'ec2:tgw',
+        'ec2:vpc', 'ec2:vpc_peering', 'rds',
+    ],
+    'route53': [
+        'ec2:instance', 'ec2:keypair', 'ec2:load_balancer', 'ec2:load_balancer_v2', 'ec2:network_interface',
+        'ec2:security_group', 'ec2:subnet', 'ec2:volumes',
+    ],
+    'elasticsearch': [
+        'ec2:autoscalinggroup', 'ec2:instance', 'ec2:load_balancer_v2', 'ec2:network_acls', 'ec2:network_interface',
+        'ec2:security_group', 'ec2:subnet', 'ec2:tgw', 'rds', 'redshift',
+    ],
+    'ssm': ['ec2:instance', 'ec2:keypair', 'ec2:security_group', 'ec2:subnet', 'ec2:volumes'],
+    'inspector': ['ec2:instance', 'ec2:keypair', 'ec2:security_group', 'ec2:subnet', 'ec2:volumes', 'ecr', 'ssm'],
+    # Permission relationships are mapped against resources already in the graph.
+    'permission_relationships': [
+        name for name in RESOURCE_FUNCTIONS if name not in ('permission_relationships', 'resourcegroupstaggingapi')
+    ],
+    # AWS Tags - Must always be last.
+    'resourcegroupstaggingapi': [name for name in RESOURCE_FUNCTIONS if name != 'resourcegroupstaggingapi'],
+}
@@ -1,7 +1,8 @@
-import asyncio
 import hashlib
 import json
 import logging
+import threading
+from functools import partial
 from typing import Any
 from typing import Dict
 from typing import Generator
@@ -11,6 +12,7 @@ from typing import Tuple
 
 import boto3
 import botocore
+import botocore.config
 import neo4j
 from botocore.exceptions import ClientError
 from botocore.exceptions import EndpointConnectionError
@@ -21,28 +23,87 @@ from cartography.util import merge_module_sync_metadata
 from cartography.util import run_analysis_job
 from cartography.util import run_cleanup_job
 from cartography.util import timeit
-from cartography.util import to_asynchronous
-from cartography.util import to_synchronous
+from cartography.util.concurrency import as_completed
+from cartography.util.concurrency import call_with_retry
 
 logger = logging.getLogger(__name__)
 stat_handler = get_stats_client(__name__)
 
 
+DEFAULT_S3_CONCURRENCY = 16
+
+# Max number of S3 buckets whose location or details are fetched at the same time. Set from cartography.config via
+# set_s3_concurrency().
+_s3_concurrency: int = DEFAULT_S3_CONCURRENCY
+
+BucketDetail = Tuple[str, Optional[Dict], Optional[Dict], Optional[Dict], Optional[Dict], Optional[Dict]]
+
+
+def set_s3_concurrency(s3_concurrency: int) -> None:
+    """
+    Sets how many S3 buckets are fetched at the same time. 1 means buckets are fetched serially.
+    """
+    if s3_concurrency < 1:
+        raise ValueError(f's3_concurrency must be at least 1, got {s3_concurrency}.')
+    global _s3_concurrency
+    _s3_concurrency = s3_concurrency
+
+
+def get_s3_concurrency() -> int:
+    return _s3_concurrency
+
+
+def _get_s3_client_config(max_pool_connections: int) -> botocore.config.Config:
+    # Every worker thread may use the same client at once, so its connection pool must be at least as large as the
+    # number of workers; otherwise urllib3 discards and reopens connections.
+    return botocore.config.Config(max_pool_connections=max(max_pool_connections, 10))
+
+
+class S3ClientPool:
+    """
+    One S3 client per region, shared by the threads that fetch bucket details. boto3 clients are thread safe, but
+    creating them from a shared Session is not, so clients are created under a lock.
+    """
+
+    def __init__(self, boto3_session: boto3.session.Session, max_pool_connections: int):
+        self._boto3_session = boto3_session
+        self._config = _get_s3_client_config(max_pool_connections)
+        self._clients: Dict[Optional[str], botocore.client.BaseClient] = {}
+        self._lock = threading.Lock()
+
+    def get_client(self, region: Optional[str]) -> botocore.client.BaseClient:
+        # Note: region is sometimes None because client.get_bucket_location() does not return a location constraint
+        # for buckets in us-east-1 region
+        with self._lock:
+            client = self._clients.get(region)
+            if client is None:
+                client = self._boto3_session.client('s3', region_name=region, config=self._config)
+                self._clients[region] = client
+            return client
+
+
+def _set_bucket_region(bucket: Dict, client: botocore.client.BaseClient) -> None:
+    try:
+        bucket['Region'] = client.get_bucket_location(Bucket=bucket['Name'])['LocationConstraint']
+    except ClientError as e:
+        if _is_common_exception(e, bucket):
+            bucket['Region'] = None
+            logger.warning("skipping bucket='{}' due to exception.".format(bucket['Name']))
+        else:
+            raise
+
+
 @timeit
-def get_s3_bucket_list(boto3_session: boto3.session.Session) -> List[Dict]:
-    client = boto3_session.client('s3')
+def get_s3_bucket_list(boto3_session: boto3.session.Session) -> Dict:
+    max_workers = get_s3_concurrency()
+    # get_bucket_location() can be called from any region, so a single client serves all of the lookups
+    client = boto3_session.client('s3', config=_get_s3_client_config(max_workers))
     # NOTE no paginator available for this operation
     buckets = client.list_buckets()
-    for bucket in buckets['Buckets']:
-        try:
-            bucket['Region'] = client.get_bucket_location(Bucket=bucket['Name'])['LocationConstraint']
-        except ClientError as e:
-            if _is_common_exception(e, bucket):
-                bucket['Region'] = None
-                logger.warning("skipping bucket='{}' due to exception.".format(bucket['Name']))
-                continue
-            else:
-                raise
+    for _ in as_completed(
+        partial(_set_bucket_region, client=client), buckets['Buckets'], max_concurrency=max_workers, service='s3',
+    ):
+        pass
     return buckets
 
 
@@ -50,41 +111,35 @@ def get_s3_bucket_list(boto3_session: boto3.session.Session) -> List[Dict]:
 def get_s3_bucket_details(
         boto3_session: boto3.session.Session,
         bucket_data: Dict,
-) -> Generator[Tuple[str, Dict, Dict, Dict, Dict, Dict], None, None]:
+) -> Generator[BucketDetail, None, None]:
     """
     Iterates over all S3 buckets. Yields bucket name (string), S3 bucket policies (JSON), ACLs (JSON),
     default encryption policy (JSON), Versioning (JSON), and Public Access Block (JSON)
+
+    Buckets are fetched get_s3_concurrency() at a time and yielded as soon as they are fetched, so that the loader
+    parses them while the next ones are fetched.
     """
+    max_workers = get_s3_concurrency()
     # a local store for s3 clients so that we may re-use clients for an AWS region
-    s3_regional_clients: Dict[Any, Any] = {}
-
-    BucketDetail = Tuple[str, Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any]]
-
-    async def _get_bucket_detail(bucket: Dict[str, Any]) -> BucketDetail:
-        # Note: bucket['Region'] is sometimes None because
-        # client.get_bucket_location() does not return a location constraint for buckets
-        # in us-east-1 region
-        client = s3_regional_clients.get(bucket['Region'])
-        if not client:
-            client = boto3_session.client('s3', bucket['Region'])
-            s3_regional_clients[bucket['Region']] = client
-        (
-            acl,
-            policy,
-            encryption,
-            versioning,
-            public_access_block,
-        ) = await asyncio.gather(
-            to_asynchronous(get_acl, bucket, client),
-            to_asynchronous(get_policy, bucket, client),
-            to_asynchronous(get_encryption, bucket, client),
-            to_asynchronous(get_versioning, bucket, client),
-            to_asynchronous(get_public_access_block, bucket, client),
+    client_pool = S3ClientPool(boto3_session, max_workers)
+
+    def _get_bucket_detail(bucket: Dict[str, Any]) -> BucketDetail:
+        client = client_pool.get_client(bucket['Region'])
+        # Each call is retried on its own when throttled, so that one throttled call doesn't repeat the others
+        return (
+            bucket['Name'],
+            call_with_retry(get_acl, bucket, client, service='s3'),
+            call_with_retry(get_policy, bucket, client, service='s3'),
+            call_with_retry(get_encryption, bucket, client, service='s3'),
+            call_with_retry(get_versioning, bucket, client, service='s3'),
+            call_with_retry(get_public_access_block, bucket, client, service='s3'),
         )
-        return bucket['Name'], acl, policy, encryption, versioning, public_access_block
 
-    bucket_details = to_synchronous(*[_get_bucket_detail(bucket) for bucket in bucket_data['Buckets']])
-    yield from bucket_details
+    # retry=False as each call above is already retried on its own
+    for _, bucket_detail in as_completed(
+        _get_bucket_detail, bucket_data['Buckets'], max_concurrency=max_workers, retry=False,
+    ):
+        yield bucket_detail
 
 
 @timeit
@@ -0,0 +1,127 @@
+import threading
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+# Maps principal ARN -> policy id -> statements, with statements in the same form as the AWSPolicyStatement node
+# properties returned by cartography.intel.aws.permission_relationships.parse_statement_node().
+PrincipalPolicies = Dict[str, Dict[str, List[Dict[str, Any]]]]
+
+# Maps the keys of a statement transformed by cartography.intel.aws.iam._transform_policy_statements() to the
+# AWSPolicyStatement node property they are loaded into.
+_STATEMENT_PROPERTIES = {
+    'Effect': 'effect',
+    'Action': 'action',
+    'NotAction': 'notaction',
+    'Resource': 'resource',
+    'NotResource': 'notresource',
+    'Condition': 'condition',
+    'Sid': 'sid',
+    'id': 'id',
+}
+
+# In-memory copy of the IAM policies synced for each AWS account, keyed by account id. Populated by
+# cartography.intel.aws.iam.sync so that later IAM stages and permission_relationships.sync do not have to read the
+# same policies back from the graph. An account only has an entry while its IAM data is being synced in this process.
+_account_policies: Dict[str, PrincipalPolicies] = {}
+_lock = threading.Lock()
+
+
+def _get_account_id_from_arn(arn: str) -> str:
+    parts = arn.split(':')
+    return parts[4] if len(parts) > 4 else ''
+
+
+def start_account(account_id: str) -> None:
+    """
+    Starts caching policies for the given account, dropping anything previously cached for it.
+    """
+    with _lock:
+        _account_policies[account_id] = {}
+
+
+def clear_account(account_id: str) -> None:
+    """
+    Stops caching policies for the given account and frees its cached policies.
+    """
+    with _lock:
+        _account_policies.pop(account_id, None)
+
+
+def add_policies(policy_statements: Dict[str, Dict[str, List[Dict[str, Any]]]]) -> None:
+    """
+    Caches transformed policies. Principals whose account has not been started with start_account() are ignored.
+
+    The cache mirrors what is loaded to the graph: statements are keyed by their id like AWSPolicyStatement nodes are,
+    and policies without statements are left out because they cannot be matched by a principal's policies query.
+
+    :param policy_statements: Maps principal ARN -> policy id -> statements transformed by
+        cartography.intel.aws.iam._transform_policy_statements().
+    """
+    with _lock:
+        for principal_arn, policies in policy_statements.items():
+            account_policies = _account_policies.get(_get_account_id_from_arn(principal_arn))
+            if account_policies is None:
+                continue
+            for policy_id, statements in policies.items():
+                statements_by_id = {
+                    statement['id']: {
+                        node_property: statement[key]
+                        for key, node_property in _STATEMENT_PROPERTIES.items()
+                        if statement.get(key) is not None
+                    }
+                    for statement in statements
+                }
+                if statements_by_id:
+                    account_policies.setdefault(principal_arn, {})[policy_id] = list(statements_by_id.values())
+
+
+def add_group_members(group_members: Dict[str, List[str]]) -> None:
+    """
+    Gives users the cached policies of the groups they are members of, like
+    cartography.intel.aws.iam.load_group_memberships() links users to their groups' policies in the graph. Must be
+    called once the groups' policies are cached. Groups whose account has not been started are ignored.
+
+    :param group_members: Maps group ARN -> ARNs of the group's member users.
+    """
+    with _lock:
+        for group_arn, user_arns in group_members.items():
+            account_policies = _account_policies.get(_get_account_id_from_arn(group_arn))
+            if account_policies is None:
+                continue
+            group_policies = account_policies.get(group_arn)
+            if not group_policies:
+                continue
+            for user_arn in user_arns:
+                account_policies.setdefault(user_arn, {}).update(group_policies)
+
+
+def get_principal_policies(principal_arn: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """
+    :param principal_arn: The ARN of an AWS principal.
+    :return: Policy id -> copies of the statements for the given principal, or None if the principal's account is not
+        cached, in which case callers need to read the policies from the graph instead.
+    """
+    with _lock:
+        account_policies = _account_policies.get(_get_account_id_from_arn(principal_arn))
+        if account_policies is None:
+            return None
+        policies = account_policies.get(principal_arn, {})
+        return {policy_id: [dict(s) for s in statements] for policy_id, statements in policies.items()}
+
+
+def get_account_policies(account_id: str) -> Optional[PrincipalPolicies]:
+    """
+    :param account_id: The AWS account id.
+    :return: Principal ARN -> policy id -> copies of the statements for every principal in the account that has
+        policies, or None if the account is not cached.
+    """
+    with _lock:
+        account_policies = _account_policies.get(account_id)
+        if account_policies is None:
+            return None
+        return {
+            principal_arn: {policy_id: [dict(s) for s in statements] for policy_id, statements in policies.items()}
+            for principal_arn, policies in account_policies.items()
+        }
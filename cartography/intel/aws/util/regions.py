@@ -0,0 +1,104 @@
+import logging
+import threading
+from concurrent.futures import as_completed
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import TypeVar
+
+import boto3
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGION_CONCURRENCY = 8
+
+# Max number of regions fetched at the same time by fetch_and_load_regions(). Set from cartography.config via
+# set_region_concurrency().
+_region_concurrency: int = DEFAULT_REGION_CONCURRENCY
+
+T = TypeVar('T')
+
+
+def set_region_concurrency(region_concurrency: int) -> None:
+    """
+    Sets how many regions fetch_and_load_regions() fetches at the same time. 1 means regions are fetched serially.
+    """
+    if region_concurrency < 1:
+        raise ValueError(f'region_concurrency must be at least 1, got {region_concurrency}.')
+    global _region_concurrency
+    _region_concurrency = region_concurrency
+
+
+def get_region_concurrency() -> int:
+    return _region_concurrency
+
+
+class ThreadSafeBoto3Session:
+    """
+    Wraps a boto3 Session so that it can be shared across threads.
+
+    boto3 clients are thread safe but Session objects are not: creating clients from the same session in several
+    threads at once can race while resolving credentials and loading service models. This proxy serializes client and
+    resource creation and forwards everything else to the wrapped session.
+    """
+
+    def __init__(self, boto3_session: boto3.session.Session):
+        self._boto3_session = boto3_session
+        self._lock = threading.Lock()
+
+    def client(self, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            return self._boto3_session.client(*args, **kwargs)
+
+    def resource(self, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            return self._boto3_session.resource(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._boto3_session, name)
+
+
+def fetch_and_load_regions(
+    boto3_session: boto3.session.Session,
+    regions: List[str],
+    fetch_func: Callable[[boto3.session.Session, str], T],
+    load_func: Callable[[str, T], None],
+    max_workers: int = 0,
+) -> None:
+    """
+    Fetches data for all given regions concurrently on a bounded thread pool and hands each region's result to
+    `load_func` as soon as it is available.
+
+    `fetch_func` runs on worker threads and must only talk to AWS. `load_func` always runs on the calling thread, one
+    region at a time, so that Neo4j writes stay serialized on the caller's session.
+
+    If a fetch raises, regions that have not started yet are cancelled and the exception is re-raised.
+
+    :param boto3_session: The boto3 session. Worker threads receive it wrapped in a ThreadSafeBoto3Session.
+    :param regions: The AWS regions to sync.
+    :param fetch_func: Called as fetch_func(boto3_session, region); returns the data for the region.
+    :param load_func: Called as load_func(region, data) with the value returned by fetch_func.
+    :param max_workers: Max number of regions to fetch at the same time. Defaults to get_region_concurrency().
+    """
+    max_workers = max_workers or get_region_concurrency()
+    if max_workers <= 1 or len(regions) <= 1:
+        for region in regions:
+            load_func(region, fetch_func(boto3_session, region))
+        return
+
+    shared_session = ThreadSafeBoto3Session(boto3_session)
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(regions)), thread_name_prefix='aws-region')
+    try:
+        futures: Dict[Future, str] = {
+            executor.submit(fetch_func, shared_session, region): region
+            for region in regions
+        }
+        for future in as_completed(futures):
+            # Drop our reference to the future once it is loaded so that its result can be garbage collected
+            region = futures.pop(future)
+            load_func(region, future.result())
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,188 @@
+import logging
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Set
+
+from cartography.checkpoint import is_complete
+from cartography.checkpoint import mark_complete
+from cartography.client.core.driver import get_neo4j_driver
+from cartography.client.core.driver import new_neo4j_session
+from cartography.intel.aws.util.regions import ThreadSafeBoto3Session
+from cartography.profiling import profile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESOURCE_CONCURRENCY = 1
+
+# Max number of AWS resource syncs that run_resource_syncs() runs at the same time for one account. Set from
+# cartography.config via set_resource_concurrency().
+_resource_concurrency: int = DEFAULT_RESOURCE_CONCURRENCY
+
+
+def set_resource_concurrency(resource_concurrency: int) -> None:
+    """
+    Sets how many resource syncs run_resource_syncs() runs at the same time. 1 means syncs run serially.
+    """
+    if resource_concurrency < 1:
+        raise ValueError(f'resource_concurrency must be at least 1, got {resource_concurrency}.')
+    global _resource_concurrency
+    _resource_concurrency = resource_concurrency
+
+
+def get_resource_concurrency() -> int:
+    return _resource_concurrency
+
+
+def _get_requested_dependencies(
+    requested_syncs: List[str],
+    dependencies: Mapping[str, Iterable[str]],
+) -> Dict[str, Set[str]]:
+    """
+    Restricts the dependency graph to the requested syncs. If a requested sync depends on a sync that was not
+    requested, it inherits that sync's dependencies instead, so that e.g. `ec2:vpc_peering` still runs after `ec2:tgw`
+    when `ec2:vpc` is left out.
+    """
+    requested = set(requested_syncs)
+    result: Dict[str, Set[str]] = {}
+    for sync_name in requested_syncs:
+        deps: Set[str] = set()
+        seen: Set[str] = set()
+        to_visit = list(dependencies.get(sync_name, ()))
+        while to_visit:
+            dep = to_visit.pop()
+            if dep in seen:
+                continue
+            seen.add(dep)
+            if dep in requested:
+                deps.add(dep)
+            else:
+                to_visit.extend(dependencies.get(dep, ()))
+        deps.discard(sync_name)
+        result[sync_name] = deps
+    return result
+
+
+def get_sync_order(requested_syncs: List[str], dependencies: Mapping[str, Iterable[str]]) -> List[str]:
+    """
+    Returns the requested syncs in an order that respects the declared dependencies. Among syncs whose dependencies
+    are all satisfied, the one requested first goes first, so a requested list that already respects the dependencies
+    comes back unchanged.
+    :param requested_syncs: The names of the syncs to run.
+    :param dependencies: Maps a sync name to the names of the syncs that must finish before it starts.
+    :return: The requested syncs in dependency order.
+    """
+    pending = _get_requested_dependencies(requested_syncs, dependencies)
+    order: List[str] = []
+    done: Set[str] = set()
+    while len(order) < len(requested_syncs):
+        ready = next((s for s in requested_syncs if s not in done and pending[s] <= done), None)
+        if ready is None:
+            cycle = sorted(s for s in requested_syncs if s not in done)
+            raise ValueError(f'AWS sync dependencies contain a cycle between: {cycle}.')
+        order.append(ready)
+        done.add(ready)
+    return order
+
+
+def _run_sync(sync_name: str, sync_func: Callable[..., Any], sync_args: Dict[str, Any]) -> None:
+    account_id = str(sync_args.get('current_aws_account_id'))
+    if is_complete('aws', account_id, sync_name):
+        logger.info(f"Skipping {sync_name} for account {account_id}, it was completed by an earlier run.")
+        return
+    with profile(f"aws.{account_id}.{sync_name}", nested=True):
+        sync_func(**sync_args)
+    mark_complete('aws', account_id, sync_name)
+
+
+def _run_sync_in_worker(
+    sync_name: str,
+    sync_func: Callable[..., Any],
+    sync_args: Dict[str, Any],
+    boto3_session: ThreadSafeBoto3Session,
+) -> None:
+    with new_neo4j_session() as worker_session:
+        _run_sync(sync_name, sync_func, {**sync_args, 'neo4j_session': worker_session, 'boto3_session': boto3_session})
+
+
+def run_resource_syncs(
+    requested_syncs: List[str],
+    sync_functions: Mapping[str, Callable[..., Any]],
+    dependencies: Mapping[str, Iterable[str]],
+    sync_args: Dict[str, Any],
+    max_workers: int = 0,
+) -> None:
+    """
+    Runs the requested AWS resource syncs for one account, starting each one only once every sync it depends on has
+    finished.
+
+    With max_workers of 1 the syncs run one at a time on the calling thread, in get_sync_order() order. Otherwise
+    independent syncs run concurrently on a bounded thread pool. Each worker opens its own Neo4j session from the
+    current sync's driver and shares the account's boto3 session through a ThreadSafeBoto3Session. If no driver is
+    available we fall back to running serially.
+
+    If a sync raises, no further syncs are started, the ones already running are allowed to finish, and the first
+    exception is re-raised.
+
+    :param requested_syncs: The names of the syncs to run.
+    :param sync_functions: Maps a sync name to its sync function, e.g. resources.RESOURCE_FUNCTIONS.
+    :param dependencies: Maps a sync name to the names of the syncs that must finish before it starts.
+    :param sync_args: Keyword arguments passed to every sync function.
+    :param max_workers: Max number of syncs to run at the same time. Defaults to get_resource_concurrency().
+    """
+    order = get_sync_order(requested_syncs, dependencies)
+    max_workers = max_workers or get_resource_concurrency()
+    if max_workers > 1 and len(order) > 1 and get_neo4j_driver() is None:
+        logger.warning(
+            "AWS resource concurrency is set but no Neo4j driver is available to open per-worker sessions; running "
+            "AWS resource syncs serially.",
+        )
+        max_workers = 1
+
+    if max_workers <= 1 or len(order) <= 1:
+        for sync_name in order:
+            _run_sync(sync_name, sync_functions[sync_name], sync_args)
+        return
+
+    pending = _get_requested_dependencies(order, dependencies)
+    shared_session = ThreadSafeBoto3Session(sync_args['boto3_session'])
+    done: Set[str] = set()
+    not_started = list(order)
+    running: Dict[Future, str] = {}
+    first_error: Optional[BaseException] = None
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='aws-resource')
+    try:
+        while not_started or running:
+            if first_error is None:
+                for sync_name in [s for s in not_started if pending[s] <= done]:
+                    if len(running) >= max_workers:
+                        break
+                    not_started.remove(sync_name)
+                    logger.debug(f"Starting AWS sync '{sync_name}'.")
+                    future = executor.submit(
+                        _run_sync_in_worker, sync_name, sync_functions[sync_name], sync_args, shared_session,
+                    )
+                    running[future] = sync_name
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                sync_name = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    logger.error(f"AWS sync '{sync_name}' failed: {error}")
+                    first_error = first_error or error
+                else:
+                    done.add(sync_name)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    if first_error is not None:
+        raise first_error
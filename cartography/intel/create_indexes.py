@@ -1,9 +1,16 @@
+import dataclasses
+import importlib
+import inspect
 import logging
+import pkgutil
 from typing import List
 
 import neo4j
 
+import cartography.models
+from cartography.client.core.tx import ensure_indexes
 from cartography.config import Config
+from cartography.models.core.nodes import CartographyNodeSchema
 from cartography.util import load_resource_binary
 logger = logging.getLogger(__name__)
 
@@ -18,8 +25,33 @@ def get_index_statements() -> List[str]:
     return statements
 
 
+def get_all_node_schemas() -> List[CartographyNodeSchema]:
+    """
+    Imports every module under cartography.models and returns an instance of each concrete CartographyNodeSchema
+    defined there, sorted by label so that index creation order is deterministic.
+    """
+    schemas = {}
+    for module_info in pkgutil.walk_packages(cartography.models.__path__, prefix='cartography.models.'):
+        module = importlib.import_module(module_info.name)
+        for _, obj in inspect.getmembers(module, inspect.isclass):
+            if (
+                issubclass(obj, CartographyNodeSchema) and
+                obj is not CartographyNodeSchema and
+                obj.__module__ == module.__name__ and
+                dataclasses.is_dataclass(obj)
+            ):
+                schemas[f'{obj.__module__}.{obj.__name__}'] = obj()
+    return sorted(schemas.values(), key=lambda schema: schema.label)
+
+
 def run(neo4j_session: neo4j.Session, config: Config) -> None:
     logger.info("Creating indexes for cartography node types.")
     for statement in get_index_statements():
         logger.debug("Executing statement: %s", statement)
         neo4j_session.run(statement)
+
+    # Bulk-create the indexes for all schema-based models up front so that load() does not need to do it per module.
+    node_schemas = get_all_node_schemas()
+    logger.info(f"Creating indexes for {len(node_schemas)} schema-based node types.")
+    for node_schema in node_schemas:
+        ensure_indexes(neo4j_session, node_schema)
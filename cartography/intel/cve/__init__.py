@@ -1,10 +1,19 @@
 import logging
 from datetime import datetime
+from datetime import timezone
+from itertools import chain
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
 
 import neo4j
 
 from cartography.config import Config
 from cartography.intel.cve import feed
+from cartography.intel.cve.cache import CVECache
 from cartography.stats import get_stats_client
 from cartography.util import merge_module_sync_metadata
 from cartography.util import timeit
@@ -13,6 +22,65 @@ logger = logging.getLogger(__name__)
 stat_handler = get_stats_client(__name__)
 
 
+def _get_utc_now() -> str:
+    return datetime.now(tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _sync_cve_pages(
+    neo4j_session: neo4j.Session,
+    pages: Iterable[Dict[Any, Any]],
+    update_tag: int,
+    on_cves: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+) -> Optional[Dict[str, str]]:
+    """
+    Transforms and loads the CVEs of the NVD API pages as they are fetched, in chunks of at most
+    feed.CVE_CHUNK_SIZE, so that memory use does not grow with the number of CVEs.
+    :param on_cves: Called with each chunk of transformed CVEs before it is loaded, e.g. to cache them.
+    :return: The feed metadata of the first page, or None if there were no pages.
+    """
+    pages = iter(pages)
+    first_page = next(pages, None)
+    if first_page is None:
+        return None
+    feed_metadata = feed.transform_cve_feed(first_page)
+    feed.load_cve_feed(neo4j_session, [feed_metadata], update_tag)
+    for cves in feed.transform_cve_pages(chain([first_page], pages)):
+        if on_cves:
+            on_cves(cves)
+        feed.load_cves(neo4j_session, cves, feed_metadata['FEED_ID'], update_tag)
+    return feed_metadata
+
+
+def _sync_year(
+    neo4j_session: neo4j.Session,
+    config: Config,
+    year: int,
+    pacer: feed.RequestPacer,
+    cache: Optional[CVECache],
+) -> str:
+    """
+    Loads the CVEs published in the given year, from the cache if it has them and otherwise from the NVD API.
+    :return: The date from which modifications of the year's CVEs may be missing from the graph.
+    """
+    if cache and cache.has_year(year):
+        logger.info(f"Loading CVE data for year {year} from the cache in {cache.directory}")
+        feed_metadata = cache.get_feed_metadata(year)
+        feed.load_cve_feed(neo4j_session, [feed_metadata], config.update_tag)
+        for cves in cache.read_year(year, feed.CVE_CHUNK_SIZE):
+            feed.load_cves(neo4j_session, cves, feed_metadata['FEED_ID'], config.update_tag)
+        return cache.get_modified_since(year)
+
+    logger.info(f"Syncing CVE data for year {year}")
+    fetched_at = _get_utc_now()
+    pages = feed.iter_published_cve_pages_per_year(config.nist_cve_url, str(year), config.cve_api_key, pacer)
+    if cache:
+        with cache.write_year(year, modified_since=fetched_at) as writer:
+            writer.feed_metadata = _sync_cve_pages(neo4j_session, pages, config.update_tag, writer.write)
+    else:
+        _sync_cve_pages(neo4j_session, pages, config.update_tag)
+    return fetched_at
+
+
 @timeit
 def start_cve_ingestion(
     neo4j_session: neo4j.Session, config: Config,
@@ -26,19 +94,18 @@ def start_cve_ingestion(
     if not config.cve_enabled:
         return
     cve_api_key = config.cve_api_key if config.cve_api_key else None
+    # One pacer for the whole sync, since NVD's rate limit applies across all of its requests
+    pacer = feed.new_request_pacer(cve_api_key)
+    cache = CVECache(config.cve_cache_dir) if config.cve_cache_dir else None
 
     # sync CVE year archives, if not yet synced
     existing_years = feed.get_cve_sync_metadata(neo4j_session)
     current_year = datetime.now().year
+    modified_since = []
     for year in range(2002, current_year + 1):
         if year in existing_years:
             continue
-        logger.info(f"Syncing CVE data for year {year}")
-        cves = feed.get_published_cves_per_year(config.nist_cve_url, str(year), cve_api_key)
-        feed_metadata = feed.transform_cve_feed(cves)
-        feed.load_cve_feed(neo4j_session, [feed_metadata], config.update_tag)
-        published_cves = feed.transform_cves(cves)
-        feed.load_cves(neo4j_session, published_cves, feed_metadata['FEED_ID'], config.update_tag)
+        modified_since.append(_sync_year(neo4j_session, config, year, pacer, cache))
         merge_module_sync_metadata(
             neo4j_session,
             group_type='CVE',
@@ -48,21 +115,25 @@ def start_cve_ingestion(
             stat_handler=stat_handler,
         )
 
-    # sync modified data
+    # sync modified data. Years that were just synced may be missing modifications from before the most recently
+    # modified CVE in the graph, e.g. when they were loaded from an older cache, so start from the earliest date.
     logger.info("Syncing CVE data for modified data")
-    last_modified_date = feed.get_last_modified_cve_date(neo4j_session)
-    cves = feed.get_modified_cves(config.nist_cve_url, last_modified_date, cve_api_key)
-    feed_metadata = feed.transform_cve_feed(cves)
-    feed.load_cve_feed(neo4j_session, [feed_metadata], config.update_tag)
-    modified_cves = feed.transform_cves(cves)
-    feed.load_cves(neo4j_session, modified_cves, feed_metadata['FEED_ID'], config.update_tag)
-    merge_module_sync_metadata(
-        neo4j_session,
-        group_type='CVE',
-        group_id=feed_metadata['timestamp'][:4],
-        synced_type='modified',
-        update_tag=config.update_tag,
-        stat_handler=stat_handler,
+    last_modified_date = min([feed.get_last_modified_cve_date(neo4j_session), *modified_since])
+    fetched_at = _get_utc_now()
+    pages = feed.iter_modified_cve_pages(config.nist_cve_url, last_modified_date, cve_api_key, pacer)
+    feed_metadata = _sync_cve_pages(
+        neo4j_session, pages, config.update_tag, cache.append_modified if cache else None,
     )
+    if cache:
+        cache.set_modified_since(fetched_at)
+    if feed_metadata:
+        merge_module_sync_metadata(
+            neo4j_session,
+            group_type='CVE',
+            group_id=feed_metadata['timestamp'][:4],
+            synced_type='modified',
+            update_tag=config.update_tag,
+            stat_handler=stat_handler,
+        )
 
     # CVEs are never deleted, so we don't need to run a cleanup job
@@ -0,0 +1,158 @@
+import gzip
+import json
+import logging
+import os
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import fields
+from typing import Any
+from typing import Dict
+from typing import IO
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+from cartography.models.cve.cve import CVENodeProperties
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE_NAME = 'index.json'
+INDEX_VERSION = 1
+# gzip's default of 9 is several times slower to write than 6 for a few percent smaller files
+COMPRESS_LEVEL = 6
+
+# The keys of a transformed CVE that CVESchema reads. The raw API fields that transform_cves() leaves in place are
+# not cached.
+CACHED_CVE_KEYS = frozenset(f.default.name for f in fields(CVENodeProperties))
+
+
+class _YearWriter:
+    def __init__(self, year_file: IO[str]):
+        self._year_file = year_file
+        self.count = 0
+        self.feed_metadata: Optional[Dict[str, str]] = None
+
+    def write(self, cves: List[Dict[str, Any]]) -> None:
+        for cve in cves:
+            self._year_file.write(_dump_cve(cve))
+        self.count += len(cves)
+
+
+def _dump_cve(cve: Dict[str, Any]) -> str:
+    return json.dumps({k: v for k, v in cve.items() if k in CACHED_CVE_KEYS}, separators=(',', ':')) + '\n'
+
+
+class CVECache:
+    """
+    A local cache of transformed CVEs that outlives a sync, so that a new graph can be backfilled from disk instead
+    of from the rate limited NVD API.
+
+    Each year of published CVEs is a gzipped JSON lines file, written once when the year is fetched from the API.
+    CVEs that are later fetched as modified are appended to the file of the year they were published in, so a file
+    can hold several versions of a CVE; later lines supersede earlier ones. `index.json` records for each complete
+    year the feed metadata, the number of lines and the date from which modifications are not yet in the file.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, INDEX_FILE_NAME)
+        self._index: Dict[str, Any] = {'version': INDEX_VERSION, 'years': {}}
+        if os.path.exists(self._index_path):
+            with open(self._index_path) as index_file:
+                index = json.load(index_file)
+            if index.get('version') == INDEX_VERSION:
+                self._index = index
+            else:
+                logger.warning(f"Ignoring the CVE cache index {self._index_path}, it has an unsupported version.")
+
+    def _get_year_path(self, year: int) -> str:
+        return os.path.join(self.directory, f'cves-{year}.jsonl.gz')
+
+    def _save_index(self) -> None:
+        # Replace the index atomically so that a sync that dies while saving it leaves the previous one.
+        tmp_path = f'{self._index_path}.tmp'
+        with open(tmp_path, 'w') as index_file:
+            json.dump(self._index, index_file, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._index_path)
+
+    def has_year(self, year: int) -> bool:
+        return str(year) in self._index['years'] and os.path.exists(self._get_year_path(year))
+
+    def get_feed_metadata(self, year: int) -> Dict[str, str]:
+        return self._index['years'][str(year)]['feed']
+
+    def get_modified_since(self, year: int) -> str:
+        """
+        :return: The date, as `%Y-%m-%dT%H:%M:%S` in UTC, from which modifications of the year's CVEs are not in the
+            cache.
+        """
+        return self._index['years'][str(year)]['modified_since']
+
+    def read_year(self, year: int, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yields the cached CVEs of a year in chunks of at most chunk_size, in the order they were written.
+        """
+        chunk: List[Dict[str, Any]] = []
+        with gzip.open(self._get_year_path(year), 'rt', encoding='utf-8') as year_file:
+            for line in year_file:
+                chunk.append(json.loads(line))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    @contextmanager
+    def write_year(self, year: int, modified_since: str) -> Iterator[_YearWriter]:
+        """
+        Writes the CVEs of a year, replacing any cached ones. The year is only added to the index if the block
+        completes, so an interrupted fetch is fetched again by the next sync.
+        :param modified_since: When the fetch of the year started, as `%Y-%m-%dT%H:%M:%S` in UTC. CVEs that are
+            modified after that may be missing from the file.
+        """
+        path = self._get_year_path(year)
+        tmp_path = f'{path}.tmp'
+        try:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=COMPRESS_LEVEL) as year_file:
+                writer = _YearWriter(year_file)
+                yield writer
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, path)
+        self._index['years'][str(year)] = {
+            'count': writer.count,
+            'feed': writer.feed_metadata,
+            'modified_since': modified_since,
+        }
+        self._save_index()
+        logger.info(f"Cached {writer.count} CVEs published in {year} at {path}.")
+
+    def append_modified(self, cves: List[Dict[str, Any]]) -> None:
+        """
+        Appends modified CVEs to the files of the cached years they were published in. CVEs of years that are not
+        cached yet are left out; those years are fetched in full when they are synced.
+        """
+        cves_by_year: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for cve in cves:
+            year = cve['published'][:4]
+            if self.has_year(int(year)):
+                cves_by_year[year].append(cve)
+        for year, year_cves in cves_by_year.items():
+            # Appending to a gzip file adds a new member, which gzip.open() reads as part of the same stream.
+            with gzip.open(self._get_year_path(int(year)), 'at', encoding='utf-8', compresslevel=COMPRESS_LEVEL) as f:
+                f.writelines(_dump_cve(cve) for cve in year_cves)
+            self._index['years'][year]['count'] += len(year_cves)
+        if cves_by_year:
+            self._save_index()
+
+    def set_modified_since(self, modified_since: str) -> None:
+        """
+        Records that every modification up to the given date is in the cache files, once the modified CVEs up to
+        then have been appended.
+        """
+        for year_index in self._index['years'].values():
+            year_index['modified_since'] = max(year_index['modified_since'], modified_since)
+        self._save_index()
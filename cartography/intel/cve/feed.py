@@ -1,14 +1,20 @@
 import logging
 import time
+from collections import deque
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
-from functools import reduce
+from email.utils import parsedate_to_datetime
 from typing import Any
 from typing import cast
+from typing import Deque
 from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import Mapping
 from typing import Optional
+from typing import Tuple
 
 import neo4j
 import requests
@@ -28,8 +34,109 @@ CONNECT_AND_READ_TIMEOUT = (60, 60)
 CVE_FEED_ID = "NIST_NVD"
 BATCH_SIZE_DAYS = 120
 RESULTS_PER_PAGE = 2000
-DEFAULT_SLEEP_TIME = 3.0
-DELAYED_SLEEP_TIME = 6.0
+# Max number of transformed CVEs that transform_cve_pages() holds in memory and yields at a time
+CVE_CHUNK_SIZE = 2000
+# NVD allows 5 requests in a rolling 30 second window without an API key and 50 with one. See
+# https://nvd.nist.gov/developers/start-here#divRateLimits
+RATE_LIMIT_WINDOW_SECONDS = 30.0
+RATE_LIMIT_REQUESTS_WITHOUT_API_KEY = 5
+RATE_LIMIT_REQUESTS_WITH_API_KEY = 50
+# Statuses that NVD and the proxies in front of it answer with when a client goes over the rate limit
+RATE_LIMITED_STATUS_CODES = {403, 429, 503}
+
+
+class RequestPacer:
+    """
+    Spaces out requests to the NVD API. Requests are sent as soon as the rolling window rate limit allows rather than
+    after a fixed sleep, and the limit and any wait that the API asks for through the `X-RateLimit-*` and
+    `Retry-After` response headers take precedence over the documented defaults.
+    """
+
+    def __init__(self, max_requests: int, window_seconds: float = RATE_LIMIT_WINDOW_SECONDS):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self._sent: Deque[float] = deque()
+        self._not_before = 0.0
+
+    def wait(self) -> None:
+        """
+        Blocks until another request may be sent, and counts it as sent.
+        """
+        now = time.monotonic()
+        while self._sent and self._sent[0] <= now - self.window_seconds:
+            self._sent.popleft()
+        delay = self._not_before - now
+        if len(self._sent) >= self.max_requests:
+            delay = max(delay, self._sent[0] + self.window_seconds - now)
+        if delay > 0:
+            logger.debug(f"Waiting {delay:.1f}s before the next NVD API request to stay within its rate limit.")
+            time.sleep(delay)
+        self._sent.append(time.monotonic())
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> bool:
+        """
+        Applies the rate limit that a response advertises in its headers.
+        :return: True if the headers asked to wait before the next request.
+        """
+        limit = _parse_int_header(headers.get('X-RateLimit-Limit'))
+        if limit:
+            self.max_requests = limit
+        delay = None
+        if _parse_int_header(headers.get('X-RateLimit-Remaining')) == 0:
+            reset = _parse_int_header(headers.get('X-RateLimit-Reset'))
+            if reset is not None:
+                # Either an epoch timestamp or a number of seconds, depending on the server
+                delay = reset - time.time() if reset > 1_000_000_000 else reset
+        retry_after = _parse_retry_after(headers.get('Retry-After'))
+        if retry_after is not None:
+            delay = max(delay or 0, retry_after)
+        if delay is None:
+            return False
+        self._not_before = max(self._not_before, time.monotonic() + delay)
+        return True
+
+    def back_off(self) -> None:
+        """
+        Waits out a whole rate limit window before the next request, for when the API rejected a request as over the
+        limit without saying how long to wait.
+        """
+        self._not_before = max(self._not_before, time.monotonic() + self.window_seconds)
+
+
+def _parse_int_header(value: Optional[str]) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    :return: The number of seconds to wait from a Retry-After header, which is either a number of seconds or an HTTP
+        date.
+    """
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(tz=timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def new_request_pacer(api_key: Optional[str]) -> RequestPacer:
+    if api_key:
+        return RequestPacer(RATE_LIMIT_REQUESTS_WITH_API_KEY)
+    logger.warning(
+        f"No NIST NVD API key provided. NVD only allows {RATE_LIMIT_REQUESTS_WITHOUT_API_KEY} requests per "
+        f"{RATE_LIMIT_WINDOW_SECONDS:.0f} seconds without one.",
+    )
+    return RequestPacer(RATE_LIMIT_REQUESTS_WITHOUT_API_KEY)
 
 
 @timeit
@@ -56,107 +163,103 @@ def get_last_modified_cve_date(neo4j_session: neo4j.Session) -> str:
     return result.strftime("%Y-%m-%dT%H:%M:%S")
 
 
-def _map_cve_dict(cve_dict: Dict[Any, Any], data: Dict[Any, Any]) -> None:
-    cve_dict["format"] = data["format"]
-    cve_dict["version"] = data["version"]
-    cve_dict["timestamp"] = data["timestamp"]
-    cve_dict["totalResults"] = data["totalResults"]
-    cve_dict["vulnerabilities"] = cve_dict.get("vulnerabilities", []) + data.get(
-        "vulnerabilities", [],
-    )
-    cve_dict["resultsPerPage"] = data["resultsPerPage"]
-    cve_dict["startIndex"] = data["startIndex"]
-
-
-def _call_cves_api(url: str, api_key: str, params: Dict[str, Any]) -> Dict[Any, Any]:
+def _iter_cve_pages(
+    url: str, api_key: Optional[str], params: Dict[str, Any], pacer: Optional[RequestPacer] = None,
+) -> Iterator[Dict[Any, Any]]:
+    """
+    Yields each page of results of a query to the NVD CVE API as it is fetched.
+    """
     totalResults = 0
-    sleep_time = DEFAULT_SLEEP_TIME
     retries = 0
-    params["startIndex"] = 0
-    params["resultsPerPage"] = RESULTS_PER_PAGE
+    params = {**params, "startIndex": 0, "resultsPerPage": RESULTS_PER_PAGE}
     headers = {}
     headers["Content-Type"] = "application/json"
     if api_key:
         headers["apiKey"] = api_key
-    else:
-        sleep_time = DELAYED_SLEEP_TIME  # Sleep for 6 seconds between each request to avoid rate limiting
-        logger.warning(
-            f"No NIST NVD API key provided. Increasing sleep time to {sleep_time}.",
-        )
-    results: Dict[Any, Any] = dict()
+    if pacer is None:
+        pacer = new_request_pacer(api_key)
 
     while params["resultsPerPage"] > 0 or params["startIndex"] < totalResults:
+        pacer.wait()
         try:
             res = requests.get(
                 url, params=params, headers=headers, timeout=CONNECT_AND_READ_TIMEOUT,
             )
+            asked_to_wait = pacer.update_from_headers(res.headers)
             res.raise_for_status()
         except requests.exceptions.HTTPError:
             logger.error(
                 f"Failed to get CVE data from NIST NVD API {res.status_code} : {res.text}",
             )
+            if res.status_code in RATE_LIMITED_STATUS_CODES and not asked_to_wait:
+                pacer.back_off()
             retries += 1
             if retries >= MAX_RETRIES:
                 raise
             continue
         data = res.json()
-        _map_cve_dict(results, data)
+        yield data
         totalResults = data["totalResults"]
         params["resultsPerPage"] = data["resultsPerPage"]
         params["startIndex"] += data["resultsPerPage"]
         retries = 0
-        time.sleep(sleep_time)
-    return results
 
 
-def get_cves_in_batches(
-    nist_cve_url: str,
+def _iter_date_ranges(
     start_date: datetime,
     end_date: datetime,
     date_param_names: Dict[str, str],
-    api_key: str,
-) -> Dict[Any, Any]:
-    cves: Dict[Any, Any] = dict()
-    current_start_date: datetime = start_date
-    current_end_date = end_date
-    total_days = (current_end_date - current_start_date).days
-    batch_size = timedelta(days=BATCH_SIZE_DAYS)
-    if total_days < 0:
+) -> Iterator[Tuple[datetime, datetime]]:
+    """
+    Splits the given date range into the ranges of at most BATCH_SIZE_DAYS that the NVD API accepts.
+    """
+    if (end_date - start_date).days < 0:
         raise ValueError(f"Start date {start_date} must be before end date {end_date}.")
     if not date_param_names["start"] or not date_param_names["end"]:
         raise ValueError("Date parameter names 'start' and 'end' must be provided.")
+    batch_size = timedelta(days=BATCH_SIZE_DAYS)
+    current_start_date = start_date
     while current_start_date < end_date:
-        remaining = current_end_date - current_start_date
-        if remaining > batch_size:
-            current_end_date = current_start_date + batch_size
-        else:
-            current_end_date = (
-                end_date if remaining.days == 0 else current_start_date + remaining
-            )
-        params = {
-            date_param_names["start"]: current_start_date.strftime(
-                "%Y-%m-%dT%H:%M:%S",
-            ),
-            date_param_names["end"]: current_end_date.strftime("%Y-%m-%dT%H:%M:%S"),
-        }
-        logger.info(
-            f"Querying CVE data between {current_start_date} and {current_end_date}",
-        )
-        batch_cves = _call_cves_api(nist_cve_url, api_key, params)
-        _map_cve_dict(cves, batch_cves)
+        current_end_date = min(current_start_date + batch_size, end_date)
+        yield current_start_date, current_end_date
         current_start_date = current_end_date
-        new_end_date = current_start_date + batch_size
-        if new_end_date > end_date:
-            new_end_date = end_date
-        current_end_date = new_end_date
-    return cves
 
 
-def get_modified_cves(
-    nist_cve_url: str, last_modified_date: str, api_key: str,
-) -> Dict[Any, Any]:
-    cves = dict()
-    end_date = datetime.now(tz=timezone.utc)
+def _get_date_params(
+    start_date: datetime, end_date: datetime, date_param_names: Dict[str, str],
+) -> Dict[str, Any]:
+    logger.info(
+        f"Querying CVE data between {start_date} and {end_date}",
+    )
+    return {
+        date_param_names["start"]: start_date.strftime("%Y-%m-%dT%H:%M:%S"),
+        date_param_names["end"]: end_date.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def iter_cve_pages_in_batches(
+    nist_cve_url: str,
+    start_date: datetime,
+    end_date: datetime,
+    date_param_names: Dict[str, str],
+    api_key: Optional[str],
+    pacer: Optional[RequestPacer] = None,
+) -> Iterator[Dict[Any, Any]]:
+    """
+    Yields each page of CVEs between the given dates as it is fetched, so that callers can transform and load one
+    page at a time instead of holding the whole range in memory.
+    :param pacer: Paces the requests; pass the same pacer to consecutive queries so that they share the rate limit.
+    """
+    if pacer is None:
+        pacer = new_request_pacer(api_key)
+    for current_start_date, current_end_date in _iter_date_ranges(start_date, end_date, date_param_names):
+        params = _get_date_params(current_start_date, current_end_date, date_param_names)
+        yield from _iter_cve_pages(nist_cve_url, api_key, params, pacer)
+
+
+def iter_modified_cve_pages(
+    nist_cve_url: str, last_modified_date: str, api_key: Optional[str], pacer: Optional[RequestPacer] = None,
+) -> Iterator[Dict[Any, Any]]:
     start_date = datetime.strptime(last_modified_date, "%Y-%m-%dT%H:%M:%S").replace(
         tzinfo=timezone.utc,
     )
@@ -164,27 +267,23 @@ def get_modified_cves(
         "start": "lastModStartDate",
         "end": "lastModEndDate",
     }
-    cves = get_cves_in_batches(
-        nist_cve_url, start_date, end_date, date_param_names, api_key,
+    return iter_cve_pages_in_batches(
+        nist_cve_url, start_date, datetime.now(tz=timezone.utc), date_param_names, api_key, pacer,
     )
-    return cves
 
 
-def get_published_cves_per_year(
-    nist_cve_url: str, year: str, api_key: str,
-) -> Dict[Any, Any]:
-    cves = {}
+def iter_published_cve_pages_per_year(
+    nist_cve_url: str, year: str, api_key: Optional[str], pacer: Optional[RequestPacer] = None,
+) -> Iterator[Dict[Any, Any]]:
     start_of_year = datetime.strptime(f"{year}-01-01", "%Y-%m-%d")
-    next_year = int(year) + 1
-    end_of_next_year = datetime.strptime(f"{next_year}-01-01", "%Y-%m-%d")
+    end_of_next_year = datetime.strptime(f"{int(year) + 1}-01-01", "%Y-%m-%d")
     date_param_names = {
         "start": "pubStartDate",
         "end": "pubEndDate",
     }
-    cves = get_cves_in_batches(
-        nist_cve_url, start_of_year, end_of_next_year, date_param_names, api_key,
+    return iter_cve_pages_in_batches(
+        nist_cve_url, start_of_year, end_of_next_year, date_param_names, api_key, pacer,
     )
-    return cves
 
 
 def _get_primary_metric(metrics: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
@@ -213,13 +312,10 @@ def transform_cves(cve_json: Dict[Any, Any]) -> List[Dict[Any, Any]]:
             ]
             cve["references_urls"] = [url["url"] for url in cve["references"]]
             if cve.get("weaknesses"):
-                weakness_descriptions = [weakness["description"] for weakness in cve["weaknesses"]]
-                weakness_descriptions = reduce(
-                    lambda x, y: x + y, weakness_descriptions, [],
-                )
                 cve["weaknesses"] = [
                     description["value"]
-                    for description in weakness_descriptions
+                    for weakness in cve["weaknesses"]
+                    for description in weakness["description"]
                     if description["lang"] == "en"
                 ]
             cvss31_metrics = cve.get("metrics", {}).get("cvssMetricV31")
@@ -247,6 +343,23 @@ def transform_cves(cve_json: Dict[Any, Any]) -> List[Dict[Any, Any]]:
     return cves
 
 
+def transform_cve_pages(
+    pages: Iterable[Dict[Any, Any]], chunk_size: int = CVE_CHUNK_SIZE,
+) -> Iterator[List[Dict[Any, Any]]]:
+    """
+    Transforms the CVEs of each page as it is fetched and yields them in chunks of at most chunk_size, so that pages
+    that hold a few CVEs each are loaded together and no more than a page and a chunk are in memory at a time.
+    """
+    chunk: List[Dict[Any, Any]] = []
+    for page in pages:
+        chunk.extend(transform_cves(page))
+        while len(chunk) >= chunk_size:
+            yield chunk[:chunk_size]
+            chunk = chunk[chunk_size:]
+    if chunk:
+        yield chunk
+
+
 def transform_cve_feed(cve_json: Dict[Any, Any]) -> Dict[str, str]:
     """
     Extract version, timestamp, and lastupdated from the feed
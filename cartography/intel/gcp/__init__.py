@@ -1,6 +1,9 @@
 import json
 import logging
+import threading
 from collections import namedtuple
+from concurrent.futures import as_completed
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict
 from typing import List
 from typing import Set
@@ -11,6 +14,8 @@ from googleapiclient.discovery import Resource
 from oauth2client.client import ApplicationDefaultCredentialsError
 from oauth2client.client import GoogleCredentials
 
+from cartography.client.core.driver import get_neo4j_driver
+from cartography.client.core.driver import new_neo4j_session
 from cartography.config import Config
 from cartography.intel.gcp import compute
 from cartography.intel.gcp import crm
@@ -33,6 +38,9 @@ service_names = Services(
     dns='dns.googleapis.com',
 )
 
+# The API clients of the current thread, see _get_project_resources()
+_thread_resources = threading.local()
+
 
 def _get_crm_resource_v1(credentials: GoogleCredentials) -> Resource:
     """
@@ -120,7 +128,8 @@ def _initialize_resources(credentials: GoogleCredentials) -> Resource:
     return Resources(
         crm_v1=_get_crm_resource_v1(credentials),
         crm_v2=_get_crm_resource_v2(credentials),
-        serviceusage=_get_serviceusage_resource(credentials),
+        # Project syncs use the clients of their thread, see _get_project_resources()
+        serviceusage=None,
         compute=None,
         container=None,
         dns=None,
@@ -159,35 +168,36 @@ def _services_enabled_on_project(serviceusage: Resource, project_id: str) -> Set
         return set()
 
 
-def _sync_single_project_compute(
-    neo4j_session: neo4j.Session, resources: Resource, project_id: str, gcp_update_tag: int,
-    common_job_parameters: Dict,
-) -> None:
+def _get_project_resources(credentials: GoogleCredentials) -> Resources:
     """
-    Handles graph sync for a single GCP project on Compute resources.
-    :param neo4j_session: The Neo4j session
-    :param resources: namedtuple of the GCP resource objects
-    :param project_id: The project ID number to sync.  See  the `projectId` field in
-    https://cloud.google.com/resource-manager/reference/rest/v1/projects
-    :param gcp_update_tag: The timestamp value to set our new Neo4j nodes with
-    :param common_job_parameters: Other parameters sent to Neo4j
-    :return: Nothing
-    """
-    # Determine the resources available on the project.
-    enabled_services = _services_enabled_on_project(resources.serviceusage, project_id)
-    compute_cred = _get_compute_resource(get_gcp_credentials())
-    if service_names.compute in enabled_services:
-        compute.sync(neo4j_session, compute_cred, project_id, gcp_update_tag, common_job_parameters)
+    Returns the API clients that project syncs on the current thread use, building them the first time. Discovery
+    clients are not thread safe, so each worker thread gets its own, and they are reused for every project that the
+    thread syncs since building one fetches the API's discovery document.
+    :param credentials: The GoogleCredentials object
+    :return: namedtuple of the resource objects used to sync a project
+    """
+    if getattr(_thread_resources, 'credentials', None) is not credentials:
+        _thread_resources.credentials = credentials
+        _thread_resources.resources = Resources(
+            crm_v1=None,
+            crm_v2=None,
+            serviceusage=_get_serviceusage_resource(credentials),
+            compute=_get_compute_resource(credentials),
+            container=_get_container_resource(credentials),
+            dns=_get_dns_resource(credentials),
+            storage=_get_storage_resource(credentials),
+        )
+    return _thread_resources.resources
 
 
-def _sync_single_project_storage(
-    neo4j_session: neo4j.Session, resources: Resource, project_id: str, gcp_update_tag: int,
+def _sync_single_project(
+    neo4j_session: neo4j.Session, resources: Resources, project_id: str, gcp_update_tag: int,
     common_job_parameters: Dict,
 ) -> None:
     """
-    Handles graph sync for a single GCP project on Storage resources.
+    Handles graph sync for a single GCP project on Compute, Storage, GKE and DNS resources.
     :param neo4j_session: The Neo4j session
-    :param resources: namedtuple of the GCP resource objects
+    :param resources: namedtuple of the GCP resource objects, see _get_project_resources()
     :param project_id: The project ID number to sync.  See  the `projectId` field in
     https://cloud.google.com/resource-manager/reference/rest/v1/projects
     :param gcp_update_tag: The timestamp value to set our new Neo4j nodes with
@@ -196,94 +206,85 @@ def _sync_single_project_storage(
     """
     # Determine the resources available on the project.
     enabled_services = _services_enabled_on_project(resources.serviceusage, project_id)
-    storage_cred = _get_storage_resource(get_gcp_credentials())
+    if service_names.compute in enabled_services:
+        logger.info("Syncing GCP project %s for Compute.", project_id)
+        compute.sync(neo4j_session, resources.compute, project_id, gcp_update_tag, common_job_parameters)
     if service_names.storage in enabled_services:
-        storage.sync_gcp_buckets(neo4j_session, storage_cred, project_id, gcp_update_tag, common_job_parameters)
-
-
-def _sync_single_project_gke(
-    neo4j_session: neo4j.Session, resources: Resource, project_id: str, gcp_update_tag: int,
-    common_job_parameters: Dict,
-) -> None:
-    """
-    Handles graph sync for a single GCP project GKE resources.
-    :param neo4j_session: The Neo4j session
-    :param resources: namedtuple of the GCP resource objects
-    :param project_id: The project ID number to sync.  See  the `projectId` field in
-    https://cloud.google.com/resource-manager/reference/rest/v1/projects
-    :param gcp_update_tag: The timestamp value to set our new Neo4j nodes with
-    :param common_job_parameters: Other parameters sent to Neo4j
-    :return: Nothing
-    """
-    # Determine the resources available on the project.
-    enabled_services = _services_enabled_on_project(resources.serviceusage, project_id)
-    container_cred = _get_container_resource(get_gcp_credentials())
+        logger.info("Syncing GCP project %s for Storage", project_id)
+        storage.sync_gcp_buckets(neo4j_session, resources.storage, project_id, gcp_update_tag, common_job_parameters)
     if service_names.gke in enabled_services:
-        gke.sync_gke_clusters(neo4j_session, container_cred, project_id, gcp_update_tag, common_job_parameters)
+        logger.info("Syncing GCP project %s for GKE", project_id)
+        gke.sync_gke_clusters(neo4j_session, resources.container, project_id, gcp_update_tag, common_job_parameters)
+    if service_names.dns in enabled_services:
+        logger.info("Syncing GCP project %s for DNS", project_id)
+        dns.sync(neo4j_session, resources.dns, project_id, gcp_update_tag, common_job_parameters)
 
 
-def _sync_single_project_dns(
-    neo4j_session: neo4j.Session, resources: Resource, project_id: str, gcp_update_tag: int,
-    common_job_parameters: Dict,
+def _sync_project_in_worker(
+    credentials: GoogleCredentials, project_id: str, gcp_update_tag: int, common_job_parameters: Dict,
 ) -> None:
     """
-    Handles graph sync for a single GCP project DNS resources.
-    :param neo4j_session: The Neo4j session
-    :param resources: namedtuple of the GCP resource objects
-    :param project_id: The project ID number to sync.  See  the `projectId` field in
-    https://cloud.google.com/resource-manager/reference/rest/v1/projects
-    :param gcp_update_tag: The timestamp value to set our new Neo4j nodes with
-    :param common_job_parameters: Other parameters sent to Neo4j
-    :return: Nothing
+    Syncs a single project from a worker thread, using its own Neo4j session.
     """
-    # Determine the resources available on the project.
-    enabled_services = _services_enabled_on_project(resources.serviceusage, project_id)
-    dns_cred = _get_dns_resource(get_gcp_credentials())
-    if service_names.dns in enabled_services:
-        dns.sync(neo4j_session, dns_cred, project_id, gcp_update_tag, common_job_parameters)
+    with new_neo4j_session() as worker_session:
+        _sync_single_project(
+            worker_session, _get_project_resources(credentials), project_id, gcp_update_tag, common_job_parameters,
+        )
 
 
 def _sync_multiple_projects(
-    neo4j_session: neo4j.Session, resources: Resource, projects: List[Dict],
-    gcp_update_tag: int, common_job_parameters: Dict,
+    neo4j_session: neo4j.Session, credentials: GoogleCredentials, projects: List[Dict],
+    gcp_update_tag: int, common_job_parameters: Dict, project_concurrency: int = 1,
 ) -> None:
     """
     Handles graph sync for multiple GCP projects.
     :param neo4j_session: The Neo4j session
-    :param resources: namedtuple of the GCP resource objects
+    :param credentials: The GoogleCredentials object used to build the API clients of each project sync
     :param: projects: A list of projects. At minimum, this list should contain a list of dicts with the key "projectId"
      defined; so it would look like this: [{"projectId": "my-project-id-12345"}].
     This is the returned data from `crm.get_gcp_projects()`.
     See https://cloud.google.com/resource-manager/reference/rest/v1/projects.
     :param gcp_update_tag: The timestamp value to set our new Neo4j nodes with
     :param common_job_parameters: Other parameters sent to Neo4j
+    :param project_concurrency: Max number of projects to sync at the same time. Each runs on a worker thread with its
+    own Neo4j session and API clients.
     :return: Nothing
     """
     logger.info("Syncing %d GCP projects.", len(projects))
     crm.sync_gcp_projects(neo4j_session, projects, gcp_update_tag, common_job_parameters)
-    # Compute data sync
-    for project in projects:
-        project_id = project['projectId']
-        logger.info("Syncing GCP project %s for Compute.", project_id)
-        _sync_single_project_compute(neo4j_session, resources, project_id, gcp_update_tag, common_job_parameters)
-
-    # Storage data sync
-    for project in projects:
-        project_id = project['projectId']
-        logger.info("Syncing GCP project %s for Storage", project_id)
-        _sync_single_project_storage(neo4j_session, resources, project_id, gcp_update_tag, common_job_parameters)
-
-    # GKE data sync
-    for project in projects:
-        project_id = project['projectId']
-        logger.info("Syncing GCP project %s for GKE", project_id)
-        _sync_single_project_gke(neo4j_session, resources, project_id, gcp_update_tag, common_job_parameters)
 
-    # DNS data sync
-    for project in projects:
-        project_id = project['projectId']
-        logger.info("Syncing GCP project %s for DNS", project_id)
-        _sync_single_project_dns(neo4j_session, resources, project_id, gcp_update_tag, common_job_parameters)
+    if project_concurrency > 1 and len(projects) > 1 and get_neo4j_driver() is None:
+        logger.warning(
+            "gcp_project_concurrency is set but no Neo4j driver is available to open per-worker sessions; syncing GCP "
+            "projects one at a time.",
+        )
+        project_concurrency = 1
+
+    if project_concurrency <= 1 or len(projects) <= 1:
+        for project in projects:
+            _sync_single_project(
+                neo4j_session,
+                _get_project_resources(credentials),
+                project['projectId'],
+                gcp_update_tag,
+                common_job_parameters,
+            )
+        return
+
+    logger.info(f"Syncing {len(projects)} GCP projects with up to {project_concurrency} in parallel.")
+    executor = ThreadPoolExecutor(max_workers=project_concurrency, thread_name_prefix='gcp-project')
+    try:
+        futures = [
+            executor.submit(
+                _sync_project_in_worker, credentials, project['projectId'], gcp_update_tag, common_job_parameters,
+            )
+            for project in projects
+        ]
+        for future in as_completed(futures):
+            future.result()
+    finally:
+        # If we are raising, don't start any project syncs that have not begun yet.
+        executor.shutdown(wait=True, cancel_futures=True)
 
 
 @timeit
@@ -336,7 +337,14 @@ def start_gcp_ingestion(neo4j_session: neo4j.Session, config: Config) -> None:
 
     projects = crm.get_gcp_projects(resources.crm_v1)
 
-    _sync_multiple_projects(neo4j_session, resources, projects, config.update_tag, common_job_parameters)
+    _sync_multiple_projects(
+        neo4j_session,
+        credentials,
+        projects,
+        config.update_tag,
+        common_job_parameters,
+        config.gcp_project_concurrency or 1,
+    )
 
     run_analysis_job(
         'gcp_compute_asset_inet_exposure.json',
@@ -14,6 +14,7 @@ import neo4j
 from googleapiclient.discovery import HttpError
 from googleapiclient.discovery import Resource
 
+from cartography.client.core.tx import load_graph_data
 from cartography.util import run_cleanup_job
 from cartography.util import timeit
 
@@ -496,6 +497,118 @@ def _parse_port_string_to_rule(port: Optional[str], protocol: str, fw_partial_ur
     }
 
 
+def _transform_instance_tags(instances: List[Dict]) -> List[Dict]:
+    """
+    Flatten the network tags of GCP instances into one dict per instance, tag and VPC that the instance has a NIC in.
+    A tag is scoped to a VPC, so an instance with NICs in two VPCs has two tags for each of its tag values.
+    :param instances: The output of transform_gcp_instances()
+    :return: A list of dicts with the InstanceId, TagId, TagValue and VpcPartialUri of each tag
+    """
+    return [
+        {
+            'InstanceId': instance['partial_uri'],
+            'TagId': _create_gcp_network_tag_id(nic['vpc_partial_uri'], tag),
+            'TagValue': tag,
+            'VpcPartialUri': nic['vpc_partial_uri'],
+        }
+        for instance in instances
+        for tag in instance.get('tags', {}).get('items', [])
+        for nic in instance.get('networkInterfaces', [])
+    ]
+
+
+def _create_gcp_nic_id(instance: Dict, nic: Dict) -> str:
+    # Make an ID for GCPNetworkInterface nodes because GCP doesn't define one but we need to uniquely identify them
+    return f"{instance['partial_uri']}/networkinterfaces/{nic['name']}"
+
+
+def _transform_gcp_nics(instances: List[Dict]) -> List[Dict]:
+    """
+    Flatten the network interfaces of GCP instances into one dict per NIC.
+    :param instances: The output of transform_gcp_instances()
+    :return: A list of dicts with the InstanceId, NicId, NetworkIP, NicName and SubnetPartialUri of each NIC
+    """
+    return [
+        {
+            'InstanceId': instance['partial_uri'],
+            'NicId': _create_gcp_nic_id(instance, nic),
+            'NetworkIP': nic.get('networkIP'),
+            'NicName': nic['name'],
+            'SubnetPartialUri': nic['subnet_partial_uri'],
+        }
+        for instance in instances
+        for nic in instance.get('networkInterfaces', [])
+    ]
+
+
+def _transform_gcp_nic_access_configs(instances: List[Dict]) -> List[Dict]:
+    """
+    Flatten the access configs of the network interfaces of GCP instances into one dict per access config.
+    :param instances: The output of transform_gcp_instances()
+    :return: A list of dicts with the NicId and AccessConfigId of each access config, along with its fields
+    """
+    access_configs = []
+    for instance in instances:
+        for nic in instance.get('networkInterfaces', []):
+            nic_id = _create_gcp_nic_id(instance, nic)
+            for ac in nic.get('accessConfigs', []):
+                access_configs.append({
+                    'NicId': nic_id,
+                    # Make an ID for GCPNicAccessConfig nodes because GCP doesn't define one but we need to uniquely
+                    # identify them
+                    'AccessConfigId': f"{nic_id}/accessconfigs/{ac['type']}",
+                    'Type': ac['type'],
+                    'Name': ac['name'],
+                    'NatIP': ac.get('natIP', None),
+                    'SetPublicPtr': ac.get('setPublicPtr', None),
+                    'PublicPtrDomainName': ac.get('publicPtrDomainName', None),
+                    'NetworkTier': ac.get('networkTier', None),
+                })
+    return access_configs
+
+
+def _transform_firewall_rules(fw_list: List[Dict], list_type: str) -> List[Dict]:
+    """
+    Flatten the rules of GCP firewalls into one dict per rule and source IP range.
+    It is possible for sourceRanges to not be specified for a firewall. If sourceRanges is not specified then the
+    firewall must specify sourceTags. Since an IP range cannot have a tag applied to it, it is ok if we don't ingest
+    the rules of such firewalls.
+    :param fw_list: The output of transform_gcp_firewall()
+    :param list_type: Either `transformed_allow_list` or `transformed_deny_list`
+    :return: A list of dicts with the FwPartialUri, RuleId, Protocol, FromPort, ToPort and Range of each rule
+    """
+    return [
+        {
+            'FwPartialUri': fw['id'],
+            'RuleId': rule['ruleid'],
+            'Protocol': rule['protocol'],
+            'FromPort': rule.get('fromport'),
+            'ToPort': rule.get('toport'),
+            'Range': ip_range,
+        }
+        for fw in fw_list
+        for rule in fw[list_type]
+        for ip_range in fw.get('sourceRanges', [])
+    ]
+
+
+def _transform_target_tags(fw_list: List[Dict]) -> List[Dict]:
+    """
+    Flatten the target tags of GCP firewalls into one dict per firewall and tag.
+    :param fw_list: The output of transform_gcp_firewall()
+    :return: A list of dicts with the FwPartialUri, TagId and TagValue of each target tag
+    """
+    return [
+        {
+            'FwPartialUri': fw['id'],
+            'TagId': _create_gcp_network_tag_id(fw['vpc_partial_uri'], tag),
+            'TagValue': tag,
+        }
+        for fw in fw_list
+        for tag in fw.get('targetTags', [])
+    ]
+
+
 @timeit
 def load_gcp_instances(neo4j_session: neo4j.Session, data: List[Dict], gcp_update_tag: int) -> None:
     """
@@ -507,19 +620,20 @@ def load_gcp_instances(neo4j_session: neo4j.Session, data: List[Dict], gcp_updat
     :return: Nothing
     """
     query = """
-    MERGE (p:GCPProject{id:$ProjectId})
+    UNWIND $DictList AS instance
+    MERGE (p:GCPProject{id:instance.ProjectId})
     ON CREATE SET p.firstseen = timestamp()
     SET p.lastupdated = $gcp_update_tag
 
-    MERGE (i:Instance:GCPInstance{id:$PartialUri})
+    MERGE (i:Instance:GCPInstance{id:instance.PartialUri})
     ON CREATE SET i.firstseen = timestamp(),
-    i.partial_uri = $PartialUri
-    SET i.self_link = $SelfLink,
-    i.instancename = $InstanceName,
-    i.hostname = $Hostname,
-    i.zone_name = $ZoneName,
-    i.project_id = $ProjectId,
-    i.status = $Status,
+    i.partial_uri = instance.PartialUri
+    SET i.self_link = instance.SelfLink,
+    i.instancename = instance.InstanceName,
+    i.hostname = instance.Hostname,
+    i.zone_name = instance.ZoneName,
+    i.project_id = instance.ProjectId,
+    i.status = instance.Status,
     i.lastupdated = $gcp_update_tag
     WITH i, p
 
@@ -527,21 +641,27 @@ def load_gcp_instances(neo4j_session: neo4j.Session, data: List[Dict], gcp_updat
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = $gcp_update_tag
     """
-    for instance in data:
-        neo4j_session.run(
-            query,
-            ProjectId=instance['project_id'],
-            PartialUri=instance['partial_uri'],
-            SelfLink=instance['selfLink'],
-            InstanceName=instance['name'],
-            ZoneName=instance['zone_name'],
-            Hostname=instance.get('hostname', None),
-            Status=instance['status'],
-            gcp_update_tag=gcp_update_tag,
-        )
-        _attach_instance_tags(neo4j_session, instance, gcp_update_tag)
-        _attach_gcp_nics(neo4j_session, instance, gcp_update_tag)
-        _attach_gcp_vpc(neo4j_session, instance['partial_uri'], gcp_update_tag)
+    load_graph_data(
+        neo4j_session,
+        query,
+        [
+            {
+                'ProjectId': instance['project_id'],
+                'PartialUri': instance['partial_uri'],
+                'SelfLink': instance['selfLink'],
+                'InstanceName': instance['name'],
+                'ZoneName': instance['zone_name'],
+                'Hostname': instance.get('hostname', None),
+                'Status': instance['status'],
+            }
+            for instance in data
+        ],
+        gcp_update_tag=gcp_update_tag,
+        operation_name=f'{__name__}.load_gcp_instances',
+    )
+    _attach_instance_tags(neo4j_session, data, gcp_update_tag)
+    _attach_gcp_nics(neo4j_session, data, gcp_update_tag)
+    _attach_gcp_vpc(neo4j_session, [instance['partial_uri'] for instance in data], gcp_update_tag)
 
 
 @timeit
@@ -742,20 +862,21 @@ def _attach_fwd_rule_to_vpc(neo4j_session: neo4j.Session, fwd: Dict, gcp_update_
 
 
 @timeit
-def _attach_instance_tags(neo4j_session: neo4j.Session, instance: Resource, gcp_update_tag: int) -> None:
+def _attach_instance_tags(neo4j_session: neo4j.Session, instances: List[Dict], gcp_update_tag: int) -> None:
     """
-    Attach tags to GCP instance and to the VPCs that they are defined in.
+    Attach tags to GCP instances and to the VPCs that they are defined in.
     :param neo4j_session: The session
-    :param instance: The instance object
+    :param instances: The instance objects
     :param gcp_update_tag: The timestamp
     :return: Nothing
     """
     query = """
-    MATCH (i:GCPInstance{id:$InstanceId})
+    UNWIND $DictList AS tag
+    MATCH (i:GCPInstance{id:tag.InstanceId})
 
-    MERGE (t:GCPNetworkTag{id:$TagId})
-    ON CREATE SET t.tag_id = $TagId,
-    t.value = $TagValue,
+    MERGE (t:GCPNetworkTag{id:tag.TagId})
+    ON CREATE SET t.tag_id = tag.TagId,
+    t.value = tag.TagValue,
     t.firstseen = timestamp()
     SET t.lastupdated = $gcp_update_tag
 
@@ -763,138 +884,114 @@ def _attach_instance_tags(neo4j_session: neo4j.Session, instance: Resource, gcp_
     ON CREATE SET h.firstseen = timestamp()
     SET h.lastupdated = $gcp_update_tag
 
-    WITH t
-    MATCH (vpc:GCPVpc{id:$VpcPartialUri})
+    WITH t, tag
+    MATCH (vpc:GCPVpc{id:tag.VpcPartialUri})
 
     MERGE (vpc)<-[d:DEFINED_IN]-(t)
     ON CREATE SET d.firstseen = timestamp()
     SET d.lastupdated = $gcp_update_tag
     """
-    for tag in instance.get('tags', {}).get('items', []):
-        for nic in instance.get('networkInterfaces', []):
-            tag_id = _create_gcp_network_tag_id(nic['vpc_partial_uri'], tag)
-            neo4j_session.run(
-                query,
-                InstanceId=instance['partial_uri'],
-                TagId=tag_id,
-                TagValue=tag,
-                VpcPartialUri=nic['vpc_partial_uri'],
-                gcp_update_tag=gcp_update_tag,
-            )
+    load_graph_data(
+        neo4j_session, query, _transform_instance_tags(instances), gcp_update_tag=gcp_update_tag,
+        operation_name=f'{__name__}._attach_instance_tags',
+    )
 
 
 @timeit
-def _attach_gcp_nics(neo4j_session: neo4j.Session, instance: Resource, gcp_update_tag: int) -> None:
+def _attach_gcp_nics(neo4j_session: neo4j.Session, instances: List[Dict], gcp_update_tag: int) -> None:
     """
-    Attach GCP Network Interfaces to GCP Instances and GCP Subnets.
-    Then, attach GCP Instances directly to VPCs.
+    Attach GCP Network Interfaces to GCP Instances and GCP Subnets, along with the NICs' access configs.
     :param neo4j_session: The Neo4j session
-    :param instance: The GCP instance
+    :param instances: The GCP instances
     :param gcp_update_tag: Timestamp to set the nodes
     :return: Nothing
     """
     query = """
-    MATCH (i:GCPInstance{id:$InstanceId})
-    MERGE (nic:GCPNetworkInterface:NetworkInterface{id:$NicId})
+    UNWIND $DictList AS nic_data
+    MATCH (i:GCPInstance{id:nic_data.InstanceId})
+    MERGE (nic:GCPNetworkInterface:NetworkInterface{id:nic_data.NicId})
     ON CREATE SET nic.firstseen = timestamp(),
-    nic.nic_id = $NicId
-    SET nic.private_ip = $NetworkIP,
-    nic.name = $NicName,
+    nic.nic_id = nic_data.NicId
+    SET nic.private_ip = nic_data.NetworkIP,
+    nic.name = nic_data.NicName,
     nic.lastupdated = $gcp_update_tag
 
     MERGE (i)-[r:NETWORK_INTERFACE]->(nic)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = $gcp_update_tag
 
-    MERGE (subnet:GCPSubnet{id:$SubnetPartialUri})
+    MERGE (subnet:GCPSubnet{id:nic_data.SubnetPartialUri})
     ON CREATE SET subnet.firstseen = timestamp(),
-    subnet.partial_uri = $SubnetPartialUri
+    subnet.partial_uri = nic_data.SubnetPartialUri
     SET subnet.lastupdated = $gcp_update_tag
 
     MERGE (nic)-[p:PART_OF_SUBNET]->(subnet)
     ON CREATE SET p.firstseen = timestamp()
     SET p.lastupdated = $gcp_update_tag
     """
-    for nic in instance.get('networkInterfaces', []):
-        # Make an ID for GCPNetworkInterface nodes because GCP doesn't define one but we need to uniquely identify them
-        nic_id = f"{instance['partial_uri']}/networkinterfaces/{nic['name']}"
-        neo4j_session.run(
-            query,
-            InstanceId=instance['partial_uri'],
-            NicId=nic_id,
-            NetworkIP=nic.get('networkIP'),
-            NicName=nic['name'],
-            gcp_update_tag=gcp_update_tag,
-            SubnetPartialUri=nic['subnet_partial_uri'],
-        )
-        _attach_gcp_nic_access_configs(neo4j_session, nic_id, nic, gcp_update_tag)
+    load_graph_data(
+        neo4j_session, query, _transform_gcp_nics(instances), gcp_update_tag=gcp_update_tag,
+        operation_name=f'{__name__}._attach_gcp_nics',
+    )
+    _attach_gcp_nic_access_configs(neo4j_session, instances, gcp_update_tag)
 
 
 @timeit
-def _attach_gcp_nic_access_configs(
-    neo4j_session: neo4j.Session, nic_id: str, nic: Resource, gcp_update_tag: int,
-) -> None:
+def _attach_gcp_nic_access_configs(neo4j_session: neo4j.Session, instances: List[Dict], gcp_update_tag: int) -> None:
     """
-    Attach an access configuration to the GCP NIC.
+    Attach access configurations to the NICs of the GCP instances.
     :param neo4j_session: The Neo4j session
-    :param instance: The GCP instance
+    :param instances: The GCP instances
     :param gcp_update_tag: The timestamp to set updated nodes to
     :return: Nothing
     """
     query = """
-    MATCH (nic{id:$NicId})
-    MERGE (ac:GCPNicAccessConfig{id:$AccessConfigId})
+    UNWIND $DictList AS ac_data
+    MATCH (nic:GCPNetworkInterface{id:ac_data.NicId})
+    MERGE (ac:GCPNicAccessConfig{id:ac_data.AccessConfigId})
     ON CREATE SET ac.firstseen = timestamp(),
-    ac.access_config_id = $AccessConfigId
-    SET ac.type=$Type,
-    ac.name = $Name,
-    ac.public_ip = $NatIP,
-    ac.set_public_ptr = $SetPublicPtr,
-    ac.public_ptr_domain_name = $PublicPtrDomainName,
-    ac.network_tier = $NetworkTier,
+    ac.access_config_id = ac_data.AccessConfigId
+    SET ac.type = ac_data.Type,
+    ac.name = ac_data.Name,
+    ac.public_ip = ac_data.NatIP,
+    ac.set_public_ptr = ac_data.SetPublicPtr,
+    ac.public_ptr_domain_name = ac_data.PublicPtrDomainName,
+    ac.network_tier = ac_data.NetworkTier,
     ac.lastupdated = $gcp_update_tag
 
     MERGE (nic)-[r:RESOURCE]->(ac)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = $gcp_update_tag
     """
-    for ac in nic.get('accessConfigs', []):
-        # Make an ID for GCPNicAccessConfig nodes because GCP doesn't define one but we need to uniquely identify them
-        access_config_id = f"{nic_id}/accessconfigs/{ac['type']}"
-        neo4j_session.run(
-            query,
-            NicId=nic_id,
-            AccessConfigId=access_config_id,
-            Type=ac['type'],
-            Name=ac['name'],
-            NatIP=ac.get('natIP', None),
-            SetPublicPtr=ac.get('setPublicPtr', None),
-            PublicPtrDomainName=ac.get('publicPtrDomainName', None),
-            NetworkTier=ac.get('networkTier', None),
-            gcp_update_tag=gcp_update_tag,
-        )
+    load_graph_data(
+        neo4j_session, query, _transform_gcp_nic_access_configs(instances), gcp_update_tag=gcp_update_tag,
+        operation_name=f'{__name__}._attach_gcp_nic_access_configs',
+    )
 
 
 @timeit
-def _attach_gcp_vpc(neo4j_session: neo4j.Session, instance_id: str, gcp_update_tag: int) -> None:
+def _attach_gcp_vpc(neo4j_session: neo4j.Session, instance_ids: List[str], gcp_update_tag: int) -> None:
     """
-    Attach a GCP instance directly to a VPC
+    Attach GCP instances directly to the VPCs of their NICs' subnets
     :param neo4j_session: neo4j_session
-    :param instance: The GCP instance object
+    :param instance_ids: The partial URIs of the GCP instances
     :param gcp_update_tag:
     :return: Nothing
     """
     query = """
-    MATCH (i:GCPInstance{id:$InstanceId})-[:NETWORK_INTERFACE]->(nic:GCPNetworkInterface)
+    UNWIND $DictList AS instance
+    MATCH (i:GCPInstance{id:instance.InstanceId})-[:NETWORK_INTERFACE]->(nic:GCPNetworkInterface)
           -[p:PART_OF_SUBNET]->(sn:GCPSubnet)<-[r:RESOURCE]-(vpc:GCPVpc)
     MERGE (i)-[m:MEMBER_OF_GCP_VPC]->(vpc)
     ON CREATE SET m.firstseen = timestamp()
     SET m.lastupdated = $gcp_update_tag
     """
-    neo4j_session.run(
+    load_graph_data(
+        neo4j_session,
         query,
-        InstanceId=instance_id,
+        [{'InstanceId': instance_id} for instance_id in instance_ids],
         gcp_update_tag=gcp_update_tag,
+        operation_name=f'{__name__}._attach_gcp_vpc',
     )
 
 
@@ -906,129 +1003,122 @@ def load_gcp_ingress_firewalls(neo4j_session: neo4j.Session, fw_list: List[Resou
     :return: Nothing
     """
     query = """
-    MERGE (fw:GCPFirewall{id:$FwPartialUri})
+    UNWIND $DictList AS fw_data
+    MERGE (fw:GCPFirewall{id:fw_data.FwPartialUri})
     ON CREATE SET fw.firstseen = timestamp(),
-    fw.partial_uri = $FwPartialUri
-    SET fw.direction = $Direction,
-    fw.disabled = $Disabled,
-    fw.name = $Name,
-    fw.priority = $Priority,
-    fw.self_link = $SelfLink,
-    fw.has_target_service_accounts = $HasTargetServiceAccounts,
+    fw.partial_uri = fw_data.FwPartialUri
+    SET fw.direction = fw_data.Direction,
+    fw.disabled = fw_data.Disabled,
+    fw.name = fw_data.Name,
+    fw.priority = fw_data.Priority,
+    fw.self_link = fw_data.SelfLink,
+    fw.has_target_service_accounts = fw_data.HasTargetServiceAccounts,
     fw.lastupdated = $gcp_update_tag
 
-    MERGE (vpc:GCPVpc{id:$VpcPartialUri})
+    MERGE (vpc:GCPVpc{id:fw_data.VpcPartialUri})
     ON CREATE SET vpc.firstseen = timestamp(),
-    vpc.partial_uri = $VpcPartialUri
+    vpc.partial_uri = fw_data.VpcPartialUri
     SET vpc.lastupdated = $gcp_update_tag
 
     MERGE (vpc)-[r:RESOURCE]->(fw)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = $gcp_update_tag
     """
-    for fw in fw_list:
-        neo4j_session.run(
-            query,
-            FwPartialUri=fw['id'],
-            Direction=fw['direction'],
-            Disabled=fw['disabled'],
-            Name=fw['name'],
-            Priority=fw['priority'],
-            SelfLink=fw['selfLink'],
-            VpcPartialUri=fw['vpc_partial_uri'],
-            HasTargetServiceAccounts=fw['has_target_service_accounts'],
-            gcp_update_tag=gcp_update_tag,
-        )
-        _attach_firewall_rules(neo4j_session, fw, gcp_update_tag)
-        _attach_target_tags(neo4j_session, fw, gcp_update_tag)
+    load_graph_data(
+        neo4j_session,
+        query,
+        [
+            {
+                'FwPartialUri': fw['id'],
+                'Direction': fw['direction'],
+                'Disabled': fw['disabled'],
+                'Name': fw['name'],
+                'Priority': fw['priority'],
+                'SelfLink': fw['selfLink'],
+                'VpcPartialUri': fw['vpc_partial_uri'],
+                'HasTargetServiceAccounts': fw['has_target_service_accounts'],
+            }
+            for fw in fw_list
+        ],
+        gcp_update_tag=gcp_update_tag,
+        operation_name=f'{__name__}.load_gcp_ingress_firewalls',
+    )
+    _attach_firewall_rules(neo4j_session, fw_list, gcp_update_tag)
+    _attach_target_tags(neo4j_session, fw_list, gcp_update_tag)
 
 
 @timeit
-def _attach_firewall_rules(neo4j_session: neo4j.Session, fw: Resource, gcp_update_tag: int) -> None:
+def _attach_firewall_rules(neo4j_session: neo4j.Session, fw_list: List[Resource], gcp_update_tag: int) -> None:
     """
-    Attach the allow_rules to the Firewall object
+    Attach the allow and deny rules to the Firewall objects
     :param neo4j_session: The Neo4j session
-    :param fw: The Firewall object
+    :param fw_list: The Firewall objects
     :param gcp_update_tag: The timestamp
     :return: Nothing
     """
     template = Template("""
-    MATCH (fw:GCPFirewall{id:$FwPartialUri})
+    UNWIND $$DictList AS rule_data
+    MATCH (fw:GCPFirewall{id:rule_data.FwPartialUri})
 
-    MERGE (rule:IpRule:IpPermissionInbound:GCPIpRule{id:$RuleId})
+    MERGE (rule:IpRule:IpPermissionInbound:GCPIpRule{id:rule_data.RuleId})
     ON CREATE SET rule.firstseen = timestamp(),
-    rule.ruleid = $RuleId
-    SET rule.protocol = $Protocol,
-    rule.fromport = $FromPort,
-    rule.toport = $ToPort,
-    rule.lastupdated = $gcp_update_tag
+    rule.ruleid = rule_data.RuleId
+    SET rule.protocol = rule_data.Protocol,
+    rule.fromport = rule_data.FromPort,
+    rule.toport = rule_data.ToPort,
+    rule.lastupdated = $$gcp_update_tag
 
-    MERGE (rng:IpRange{id:$Range})
+    MERGE (rng:IpRange{id:rule_data.Range})
     ON CREATE SET rng.firstseen = timestamp(),
-    rng.range = $Range
-    SET rng.lastupdated = $gcp_update_tag
+    rng.range = rule_data.Range
+    SET rng.lastupdated = $$gcp_update_tag
 
     MERGE (rng)-[m:MEMBER_OF_IP_RULE]->(rule)
     ON CREATE SET m.firstseen = timestamp()
-    SET m.lastupdated = $gcp_update_tag
+    SET m.lastupdated = $$gcp_update_tag
 
     MERGE (fw)<-[r:$fw_rule_relationship_label]-(rule)
     ON CREATE SET r.firstseen = timestamp()
-    SET r.lastupdated = $gcp_update_tag
+    SET r.lastupdated = $$gcp_update_tag
     """)
-    for list_type in 'transformed_allow_list', 'transformed_deny_list':
-        if list_type == 'transformed_allow_list':
-            label = "ALLOWED_BY"
-        else:
-            label = "DENIED_BY"
-        for rule in fw[list_type]:
-            # It is possible for sourceRanges to not be specified for this rule
-            # If sourceRanges is not specified then the rule must specify sourceTags.
-            # Since an IP range cannot have a tag applied to it, it is ok if we don't ingest this rule.
-            for ip_range in fw.get('sourceRanges', []):
-                neo4j_session.run(
-                    template.safe_substitute(fw_rule_relationship_label=label),
-                    FwPartialUri=fw['id'],
-                    RuleId=rule['ruleid'],
-                    Protocol=rule['protocol'],
-                    FromPort=rule.get('fromport'),
-                    ToPort=rule.get('toport'),
-                    Range=ip_range,
-                    gcp_update_tag=gcp_update_tag,
-                )
+    # Relationship types can't be query parameters, so allow and deny rules are loaded by separate queries.
+    for list_type, label in ('transformed_allow_list', 'ALLOWED_BY'), ('transformed_deny_list', 'DENIED_BY'):
+        load_graph_data(
+            neo4j_session,
+            template.substitute(fw_rule_relationship_label=label),
+            _transform_firewall_rules(fw_list, list_type),
+            gcp_update_tag=gcp_update_tag,
+            operation_name=f'{__name__}._attach_firewall_rules.{label}',
+        )
 
 
 @timeit
-def _attach_target_tags(neo4j_session: neo4j.Session, fw: Resource, gcp_update_tag: int) -> None:
+def _attach_target_tags(neo4j_session: neo4j.Session, fw_list: List[Resource], gcp_update_tag: int) -> None:
     """
-    Attach target tags to the firewall object
+    Attach target tags to the firewall objects
     :param neo4j_session: The neo4j session
-    :param fw: The firewall object
+    :param fw_list: The firewall objects
     :param gcp_update_tag: The timestamp
     :return: Nothing
     """
     query = """
-    MATCH (fw:GCPFirewall{id:$FwPartialUri})
+    UNWIND $DictList AS tag
+    MATCH (fw:GCPFirewall{id:tag.FwPartialUri})
 
-    MERGE (t:GCPNetworkTag{id:$TagId})
+    MERGE (t:GCPNetworkTag{id:tag.TagId})
     ON CREATE SET t.firstseen = timestamp(),
-    t.tag_id = $TagId,
-    t.value = $TagValue
+    t.tag_id = tag.TagId,
+    t.value = tag.TagValue
     SET t.lastupdated = $gcp_update_tag
 
     MERGE (fw)-[h:TARGET_TAG]->(t)
     ON CREATE SET h.firstseen = timestamp()
     SET h.lastupdated = $gcp_update_tag
     """
-    for tag in fw.get('targetTags', []):
-        tag_id = _create_gcp_network_tag_id(fw['vpc_partial_uri'], tag)
-        neo4j_session.run(
-            query,
-            FwPartialUri=fw['id'],
-            TagId=tag_id,
-            TagValue=tag,
-            gcp_update_tag=gcp_update_tag,
-        )
+    load_graph_data(
+        neo4j_session, query, _transform_target_tags(fw_list), gcp_update_tag=gcp_update_tag,
+        operation_name=f'{__name__}._attach_target_tags',
+    )
 
 
 @timeit
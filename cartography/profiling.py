@@ -0,0 +1,210 @@
+import cProfile
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; max RSS is then left out of the summary.
+    resource = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Number of allocation sites written to each profile's allocations file.
+TOP_ALLOCATIONS = 25
+
+SUMMARY_FILE_NAME = 'summary.txt'
+
+# Directory that profile() writes to, or None to not profile. Set from cartography.config via configure().
+_profile_dir: Optional[str] = None
+# Whether nested profiles, e.g. of each AWS resource sync within the aws stage, are recorded too.
+_profile_nested: bool = False
+
+
+@dataclass
+class ProfileResult:
+    """
+    What profile() measured for one block.
+    :param name: The name given to profile().
+    :param wall_seconds: Wall time of the block.
+    :param cpu_seconds: CPU time used by the whole process during the block.
+    :param peak_traced_bytes: Peak size of the memory blocks traced by tracemalloc during the block.
+    :param net_traced_bytes: Size of the memory blocks that were allocated during the block and are still allocated
+        at the end of it.
+    :param max_rss_bytes: The process's max resident set size at the end of the block, if known.
+    """
+    name: str
+    wall_seconds: float
+    cpu_seconds: float
+    peak_traced_bytes: int
+    net_traced_bytes: int
+    max_rss_bytes: Optional[int]
+
+
+@dataclass
+class _ActiveProfile:
+    peak_traced_bytes: int = 0
+
+
+# Results of the profiles recorded during this process so far, in the order they finished. See _write_summary().
+_results: List[ProfileResult] = []
+# Profiles that are running on any thread. tracemalloc's peak is process-wide, so nested and concurrent profiles
+# carry the peak forward for each other before resetting it.
+_active: List[_ActiveProfile] = []
+_lock = threading.Lock()
+_started_tracemalloc = False
+# The cProfile profiler that is enabled on each thread, so that nested profiles know which one to pause.
+_thread_profilers = threading.local()
+
+
+def configure(profile_dir: Optional[str], profile_nested: bool = False) -> None:
+    """
+    Turns profiling on or off.
+    :param profile_dir: Directory to write a cProfile dump, the top tracemalloc allocations and a summary table to for
+        each profiled block, or None to not profile.
+    :param profile_nested: If True, nested blocks such as each AWS resource sync are profiled in addition to each sync
+        stage.
+    """
+    global _profile_dir, _profile_nested
+    _profile_dir = profile_dir
+    _profile_nested = profile_nested
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        _results.clear()
+
+
+def _get_max_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def _to_file_name(name: str) -> str:
+    return re.sub(r'[^\w\-.]', '_', name)
+
+
+@contextmanager
+def profile(name: str, nested: bool = False) -> Iterator[None]:
+    """
+    Profiles the enclosed block if a profile directory is configured. Writes `<n>-<name>.prof`, a cProfile dump that
+    can be read with pstats or snakeviz, and `<n>-<name>.allocations.txt`, the allocation sites that grew the most
+    during the block, and then rewrites the summary table of every block profiled so far.
+
+    Python only allows one cProfile profiler per thread, so a nested profile pauses the one of the enclosing block,
+    and time spent in the nested block only shows up in its own dump. Profiles that run concurrently on other threads
+    may fail to start a profiler, in which case only their memory is recorded. tracemalloc measures the whole process,
+    so the memory of concurrent blocks includes each other's allocations.
+
+    :param name: The name of the block, e.g. the name of the sync stage.
+    :param nested: True for blocks that run within another profiled block. These are only profiled when
+        configure() was called with profile_nested=True.
+    """
+    if not _profile_dir or (nested and not _profile_nested):
+        yield
+        return
+
+    global _started_tracemalloc
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracemalloc = True
+        traced_bytes = tracemalloc.get_traced_memory()[1]
+        for active in _active:
+            active.peak_traced_bytes = max(active.peak_traced_bytes, traced_bytes)
+        tracemalloc.reset_peak()
+        this = _ActiveProfile()
+        _active.append(this)
+        start_snapshot = tracemalloc.take_snapshot()
+        start_traced_bytes = tracemalloc.get_traced_memory()[0]
+
+    outer_profiler: Optional[cProfile.Profile] = getattr(_thread_profilers, 'profiler', None)
+    if outer_profiler:
+        outer_profiler.disable()
+    profiler: Optional[cProfile.Profile] = cProfile.Profile()
+    try:
+        profiler.enable()  # type: ignore
+    except ValueError as e:
+        logger.warning(f"Not recording a cProfile dump for '{name}': {e}")
+        profiler = None
+    _thread_profilers.profiler = profiler
+    start_wall = time.monotonic()
+    start_cpu = time.process_time()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+        wall_seconds = time.monotonic() - start_wall
+        cpu_seconds = time.process_time() - start_cpu
+        _thread_profilers.profiler = outer_profiler
+        if outer_profiler:
+            outer_profiler.enable()
+
+        with _lock:
+            traced_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            end_snapshot = tracemalloc.take_snapshot()
+            _active.remove(this)
+            result = ProfileResult(
+                name=name,
+                wall_seconds=wall_seconds,
+                cpu_seconds=cpu_seconds,
+                peak_traced_bytes=max(this.peak_traced_bytes, peak_bytes),
+                net_traced_bytes=traced_bytes - start_traced_bytes,
+                max_rss_bytes=_get_max_rss_bytes(),
+            )
+            _results.append(result)
+            file_prefix = os.path.join(_profile_dir, f'{len(_results):03d}-{_to_file_name(name)}')
+            if not _active and _started_tracemalloc:
+                tracemalloc.stop()
+                _started_tracemalloc = False
+
+        if profiler:
+            profiler.dump_stats(f'{file_prefix}.prof')
+        _write_allocations(f'{file_prefix}.allocations.txt', end_snapshot, start_snapshot)
+        _write_summary()
+
+
+def _write_allocations(path: str, end_snapshot: tracemalloc.Snapshot, start_snapshot: tracemalloc.Snapshot) -> None:
+    with open(path, 'w') as allocations_file:
+        allocations_file.write(f'Top {TOP_ALLOCATIONS} allocation sites by growth during the block:\n')
+        for stat in end_snapshot.compare_to(start_snapshot, 'lineno')[:TOP_ALLOCATIONS]:
+            allocations_file.write(f'{stat}\n')
+
+
+def _format_mib(num_bytes: Optional[int]) -> str:
+    return f'{num_bytes / 1024 / 1024:.1f}' if num_bytes is not None else '-'
+
+
+def _write_summary() -> None:
+    """
+    Rewrites the summary table with every profile recorded so far, so that a sync that dies part way through still
+    leaves a summary of the blocks that finished.
+    """
+    assert _profile_dir
+    rows = [('name', 'wall s', 'cpu s', 'peak traced MiB', 'net traced MiB', 'max rss MiB')]
+    with _lock:
+        for result in _results:
+            rows.append((
+                result.name,
+                f'{result.wall_seconds:.1f}',
+                f'{result.cpu_seconds:.1f}',
+                _format_mib(result.peak_traced_bytes),
+                _format_mib(result.net_traced_bytes),
+                _format_mib(result.max_rss_bytes),
+            ))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    with open(os.path.join(_profile_dir, SUMMARY_FILE_NAME), 'w') as summary_file:
+        for row in rows:
+            summary_file.write('  '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip() + '\n')
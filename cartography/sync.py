@@ -30,10 +30,33 @@ import cartography.intel.oci
 import cartography.intel.okta
 import cartography.intel.semgrep
 import cartography.intel.snipeit
+from cartography.checkpoint import CheckpointStore
+from cartography.checkpoint import get_checkpoint_store
+from cartography.checkpoint import is_complete
+from cartography.checkpoint import mark_complete
+from cartography.checkpoint import set_checkpoint_store
+from cartography.client.core.driver import set_neo4j_driver
+from cartography.client.core.tx import LoadBatchBounds
+from cartography.client.core.tx import reset_index_state
+from cartography.client.core.tx import set_load_batch_bounds
 from cartography.config import Config
+from cartography.graph.job import DEFAULT_JOB_CONCURRENCY
+from cartography.graph.job import set_job_concurrency
+from cartography.graph.statement import set_cleanup_batch_size
+from cartography.graph.statement import set_iteration_size_bounds
+from cartography.instrumentation import configure as configure_instrumentation
+from cartography.instrumentation import operation
+from cartography.instrumentation import reset_run_report
+from cartography.instrumentation import write_run_report
+from cartography.profiling import configure as configure_profiling
+from cartography.profiling import profile
 from cartography.stats import set_stats_client
 from cartography.util import STATUS_FAILURE
 from cartography.util import STATUS_SUCCESS
+from cartography.util.concurrency import DEFAULT_MAX_WORKERS
+from cartography.util.concurrency import parse_rate_limit
+from cartography.util.concurrency import set_max_workers
+from cartography.util.concurrency import set_rate_limit
 
 logger = logging.getLogger(__name__)
 
@@ -106,18 +129,38 @@ class Sync:
         :param config: Configuration for the sync run.
         """
         logger.info("Starting sync with update tag '%d'", config.update_tag)
-        with neo4j_driver.session(database=config.neo4j_database) as neo4j_session:
-            for stage_name, stage_func in self._stages.items():
-                logger.info("Starting sync stage '%s'", stage_name)
-                try:
-                    stage_func(neo4j_session, config)
-                except (KeyboardInterrupt, SystemExit):
-                    logger.warning("Sync interrupted during stage '%s'.", stage_name)
-                    raise
-                except Exception:
-                    logger.exception("Unhandled exception during sync stage '%s'", stage_name)
-                    raise  # TODO this should be configurable
-                logger.info("Finishing sync stage '%s'", stage_name)
+        # Indexes are only ensured once per sync; forget what a previous sync in this process already created.
+        reset_index_state()
+        reset_run_report()
+        # Allow stages that do work concurrently to open their own sessions from the driver's connection pool
+        set_neo4j_driver(neo4j_driver, config.neo4j_database)
+        try:
+            with neo4j_driver.session(database=config.neo4j_database) as neo4j_session:
+                for stage_name, stage_func in self._stages.items():
+                    if is_complete(stage_name):
+                        logger.info("Skipping sync stage '%s', it was completed by an earlier run.", stage_name)
+                        continue
+                    logger.info("Starting sync stage '%s'", stage_name)
+                    try:
+                        with operation('stage', stage_name), profile(stage_name):
+                            stage_func(neo4j_session, config)
+                    except (KeyboardInterrupt, SystemExit):
+                        logger.warning("Sync interrupted during stage '%s'.", stage_name)
+                        raise
+                    except Exception:
+                        logger.exception("Unhandled exception during sync stage '%s'", stage_name)
+                        raise  # TODO this should be configurable
+                    mark_complete(stage_name)
+                    logger.info("Finishing sync stage '%s'", stage_name)
+        finally:
+            # Also write the report for failed syncs; it shows how far the sync got and where the time went.
+            if config.run_report_path:
+                write_run_report(config.run_report_path)
+        checkpoint_store = get_checkpoint_store()
+        if checkpoint_store:
+            # Every unit is in the graph and every cleanup has run; a rerun with this update tag starts over, and
+            # the checkpoints of earlier failed syncs are no longer needed.
+            checkpoint_store.clear()
         logger.info("Finishing sync with update tag '%d'", config.update_tag)
         return STATUS_SUCCESS
 
@@ -144,6 +187,39 @@ def run_with_config(sync: Sync, config: Union[Config, argparse.Namespace]) -> in
             ),
         )
 
+    # Configure the bounds used to adaptively size Neo4j load transactions
+    # When only a max is given, the default min is lowered to it rather than rejected as larger than the max.
+    default_bounds = LoadBatchBounds()
+    load_batch_max_size = config.neo4j_load_batch_max_size or default_bounds.max_size
+    set_load_batch_bounds(
+        LoadBatchBounds(
+            min_size=config.neo4j_load_batch_min_size or min(default_bounds.min_size, load_batch_max_size),
+            max_size=load_batch_max_size,
+            target_seconds=config.neo4j_load_batch_target_seconds or default_bounds.target_seconds,
+        ),
+    )
+    set_cleanup_batch_size(config.neo4j_cleanup_batch_size)
+    if config.neo4j_cleanup_iteration_target_seconds:
+        cleanup_iteration_max_size = config.neo4j_cleanup_iteration_max_size or 10000
+        set_iteration_size_bounds(
+            LoadBatchBounds(
+                min_size=config.neo4j_cleanup_iteration_min_size or min(100, cleanup_iteration_max_size),
+                max_size=cleanup_iteration_max_size,
+                target_seconds=config.neo4j_cleanup_iteration_target_seconds,
+            ),
+        )
+    else:
+        set_iteration_size_bounds(None)
+    set_job_concurrency(config.neo4j_job_concurrency or DEFAULT_JOB_CONCURRENCY)
+    set_max_workers(config.api_concurrency or DEFAULT_MAX_WORKERS)
+    for rate_limit in config.api_rate_limits or []:
+        set_rate_limit(*parse_rate_limit(rate_limit))
+    configure_instrumentation(
+        profile_queries=bool(config.neo4j_profile_queries),
+        tracing=bool(config.otel_tracing),
+    )
+    configure_profiling(config.profile_dir, profile_nested=bool(config.profile_aws_resource_syncs))
+
     neo4j_auth = None
     if config.neo4j_user or config.neo4j_password:
         neo4j_auth = (config.neo4j_user, config.neo4j_password)
@@ -188,6 +264,11 @@ def run_with_config(sync: Sync, config: Union[Config, argparse.Namespace]) -> in
     default_update_tag = int(time.time())
     if not config.update_tag:
         config.update_tag = default_update_tag
+    # Checkpoints are keyed by update tag, so they can only be opened once the tag is known.
+    if config.checkpoint_path:
+        set_checkpoint_store(CheckpointStore(config.checkpoint_path, config.update_tag))
+    else:
+        set_checkpoint_store(None)
     return sync.run(neo4j_driver, config)
 
 
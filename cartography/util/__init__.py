@@ -1,17 +1,16 @@
-import asyncio
 import logging
 import re
 import sys
-from functools import partial
 from functools import wraps
+from itertools import islice
 from string import Template
 from typing import Any
-from typing import Awaitable
 from typing import BinaryIO
 from typing import Callable
 from typing import cast
 from typing import Dict
 from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import Optional
 from typing import Set
@@ -172,7 +171,6 @@ def load_resource_binary(package: str, resource_name: str) -> BinaryIO:
     return open_binary(package, resource_name)
 
 
-R = TypeVar('R')
 F = TypeVar('F', bound=Callable[..., Any])
 
 
@@ -325,11 +323,24 @@ def batch(items: Iterable, size: int = DEFAULT_BATCH_SIZE) -> List[List]:
     x = [1,2,3,4,5,6,7,8]
     batch(x, size=3) -> [[1, 2, 3], [4, 5, 6], [7, 8]]
     '''
-    items = list(items)
-    return [
-        items[i: i + size]
-        for i in range(0, len(items), size)
-    ]
+    return list(iter_batches(items, size))
+
+
+def iter_batches(items: Iterable, size: int = DEFAULT_BATCH_SIZE) -> Iterator[List]:
+    '''
+    Lazy version of `batch()`: takes an Iterable (including generators) of items and yields lists of at most `size`
+    items without ever materializing the whole input in memory.
+
+    Use:
+    x = (i for i in range(1, 9))
+    list(iter_batches(x, size=3)) -> [[1, 2, 3], [4, 5, 6], [7, 8]]
+    '''
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
 
 
 def is_throttling_exception(exc: Exception) -> bool:
@@ -345,79 +356,3 @@ def is_throttling_exception(exc: Exception) -> bool:
     # if isinstance(exc, google.api_core.exceptions.TooManyRequests):
     #     return True
     return False
-
-
-def to_asynchronous(func: Callable[..., R], *args: Any, **kwargs: Any) -> Awaitable[R]:
-    '''
-    Returns a Future that will run a function and its arguments in the default threadpool.
-    Helper until we start using python 3.9's asyncio.to_thread
-
-    Calls are also wrapped within a backoff decorator to handle throttling errors.
-
-    :param func: the function to be wrapped by the Future
-    :param args: a series of arguments to be passed into func
-    :param kwargs: a series of keyword arguments to be passed into func
-
-    example:
-    def my_func(arg1, arg2, kwarg1):
-        return arg1 + arg2 + kwarg1
-
-    # normal synchronous call:
-    result = my_func(1, 2, kwarg1=3)
-
-    # asynchronous call:
-    future = to_asynchronous(my_func, 1, 2, kwarg1=3)
-
-    # the result is stored in the future, and can be retrieved
-    # from within another async function with:
-    await future
-
-    # or from within a synchronous function with our helper:
-    to_synchronous(future)
-
-    NOTE: to use this in a Jupyter notebook, you need to do:
-    # import nest_asyncio
-    # nest_asyncio.apply()
-    '''
-    CartographyThrottlingException = type('CartographyThrottlingException', (Exception,), {})
-
-    @wraps(func)
-    def wrapper(*args: Any, **kwargs: Any) -> R:
-        try:
-            return func(*args, **kwargs)
-        except Exception as exc:
-            if is_throttling_exception(exc):
-                raise CartographyThrottlingException from exc
-            raise
-
-    # don't use @backoff as decorator, to preserve typing
-    wrapped = backoff.on_exception(backoff.expo, CartographyThrottlingException)(wrapper)
-    call = partial(wrapped, *args, **kwargs)
-    return asyncio.get_event_loop().run_in_executor(None, call)
-
-
-def to_synchronous(*awaitables: Awaitable[Any]) -> List[Any]:
-    '''
-    Synchronously waits for the Awaitable(s) to complete and returns their result(s).
-    See https://docs.python.org/3.8/library/asyncio-task.html#asyncio-awaitables
-
-    :param awaitables: a series of Awaitable objects, with each object being its own argument.
-        i.e., not a single list of Awaitables
-
-    example:
-    async def my_async_func(my_arg):
-        return my_arg
-
-    async def another_async_func(my_arg2):
-        return my_arg2
-
-    remember that an invocation of an async function returns a Future (Awaitable),
-    which needs to be awaited to get the result. You cannot await a Future from within
-    a non-async function, so you could use this helper to get the result from a Future
-
-    future_1 = my_async_func(1)
-    future_2 = another_async_func(2)
-
-    results = to_synchronous(future_1, future_2)
-    '''
-    return asyncio.get_event_loop().run_until_complete(asyncio.gather(*awaitables))
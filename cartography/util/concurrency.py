@@ -0,0 +1,278 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from functools import partial
+from itertools import islice
+from typing import Any
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import TypeVar
+
+import backoff
+
+from cartography.util import backoff_handler
+from cartography.util import is_throttling_exception
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 32
+# How long call_with_retry() keeps retrying a throttled call before giving up and raising
+DEFAULT_RETRY_MAX_TIME = 600
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# Size of the thread pool shared by every map_bounded() and as_completed() call. Set from cartography.config via
+# set_max_workers().
+_max_workers: int = DEFAULT_MAX_WORKERS
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+# Marks the shared pool's worker threads, see _run_in_worker()
+_worker_state = threading.local()
+
+
+class RateLimiter:
+    """
+    A token bucket that allows `requests_per_second` calls on average and bursts of up to `burst` calls. acquire()
+    blocks until a token is available. Shared by every thread that calls the same service.
+    """
+
+    def __init__(self, requests_per_second: float, burst: Optional[int] = None):
+        if requests_per_second <= 0:
+            raise ValueError(f'requests_per_second must be positive, got {requests_per_second}.')
+        self.requests_per_second = requests_per_second
+        self.burst = burst or max(1, int(requests_per_second))
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.requests_per_second)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.requests_per_second
+            time.sleep(wait_seconds)
+
+
+# Rate limiters by service name, e.g. 's3'. Services without one are not rate limited. Set from cartography.config via
+# set_rate_limit().
+_rate_limiters: Dict[str, RateLimiter] = {}
+
+
+def set_max_workers(max_workers: int) -> None:
+    """
+    Sets the size of the shared thread pool. The current pool, if any, is replaced once its queued calls finish.
+    """
+    if max_workers < 1:
+        raise ValueError(f'max_workers must be at least 1, got {max_workers}.')
+    global _max_workers, _executor
+    with _executor_lock:
+        _max_workers = max_workers
+        old_executor, _executor = _executor, None
+    if old_executor is not None:
+        old_executor.shutdown(wait=False)
+
+
+def get_max_workers() -> int:
+    return _max_workers
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool shared by the intel modules, creating it on first use.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix='cartography-api')
+        return _executor
+
+
+def set_rate_limit(service: str, requests_per_second: Optional[float], burst: Optional[int] = None) -> None:
+    """
+    Limits how often call_with_retry() calls the given service, across all threads. None removes the limit.
+    """
+    if requests_per_second is None:
+        _rate_limiters.pop(service, None)
+    else:
+        _rate_limiters[service] = RateLimiter(requests_per_second, burst)
+
+
+def get_rate_limiter(service: str) -> Optional[RateLimiter]:
+    return _rate_limiters.get(service)
+
+
+def parse_rate_limit(spec: str) -> Tuple[str, float]:
+    """
+    Parses a rate limit given as `SERVICE=REQUESTS_PER_SECOND`, e.g. `kms=20`.
+    """
+    service, _, requests_per_second = spec.partition('=')
+    try:
+        rps = float(requests_per_second)
+    except ValueError:
+        rps = 0
+    if not service.strip() or rps <= 0:
+        raise ValueError(f'Invalid rate limit "{spec}", expected SERVICE=REQUESTS_PER_SECOND with a positive rate.')
+    return service.strip(), rps
+
+
+def call_with_retry(
+    func: Callable[..., R],
+    *args: Any,
+    service: Optional[str] = None,
+    max_time: float = DEFAULT_RETRY_MAX_TIME,
+    **kwargs: Any,
+) -> R:
+    """
+    Calls func(*args, **kwargs). Each attempt first takes a token from the service's rate limiter, if it has one.
+    Calls that fail with a throttling error (see cartography.util.is_throttling_exception()) are retried with
+    exponential backoff for up to `max_time` seconds; other errors are raised right away.
+    """
+    rate_limiter = get_rate_limiter(service) if service else None
+
+    def _attempt() -> R:
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        return func(*args, **kwargs)
+
+    # don't use @backoff as decorator, to preserve typing
+    retrying = backoff.on_exception(
+        backoff.expo,
+        Exception,
+        giveup=lambda e: not is_throttling_exception(e),
+        max_time=max_time,
+        on_backoff=backoff_handler,
+    )(_attempt)
+    result: R = retrying()
+    return result
+
+
+def _run_in_worker(func: Callable[[], R]) -> R:
+    _worker_state.in_pool = True
+    try:
+        return func()
+    finally:
+        _worker_state.in_pool = False
+
+
+def _call(func: Callable[[T], R], item: T, service: Optional[str], retry: bool) -> R:
+    if retry:
+        return call_with_retry(func, item, service=service)
+    return func(item)
+
+
+def _submit(func: Callable[[T], R], item: T, service: Optional[str], retry: bool) -> Future:
+    return get_executor().submit(_run_in_worker, partial(_call, func, item, service, retry))
+
+
+def _iter_futures(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_concurrency: Optional[int],
+    service: Optional[str],
+    retry: bool,
+) -> Iterator[Tuple[T, Future]]:
+    """
+    Submits func(item) to the shared pool for each item, keeping at most `max_concurrency` calls in flight, and yields
+    each (item, future) once the future is done. A new call is only submitted when one completes, so a consumer that
+    falls behind holds back the calls instead of piling up results. If the consumer stops early or a call raises,
+    calls that have not started yet are cancelled.
+    """
+    limit = max(1, max_concurrency or get_max_workers())
+    remaining = iter(items)
+    pending: Dict[Future, T] = {}
+    try:
+        for item in islice(remaining, limit):
+            pending[_submit(func, item, service, retry)] = item
+        while pending:
+            done: Set[Future]
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            # Keep the pool busy while the caller handles the completed calls
+            for item in islice(remaining, len(done)):
+                pending[_submit(func, item, service, retry)] = item
+            for future in done:
+                yield pending.pop(future), future
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _should_run_inline(max_concurrency: Optional[int]) -> bool:
+    # Calls made from the shared pool's own workers run inline: waiting on the pool from inside it could deadlock once
+    # every worker is waiting.
+    return max_concurrency == 1 or get_max_workers() == 1 or getattr(_worker_state, 'in_pool', False)
+
+
+def map_bounded(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_concurrency: Optional[int] = None,
+    service: Optional[str] = None,
+    retry: bool = True,
+) -> Iterator[R]:
+    """
+    Like map(func, items), but runs the calls on the shared thread pool, at most `max_concurrency` at a time (defaults
+    to the pool size), through call_with_retry() with the given service's rate limit. Results are yielded in the order
+    of `items`. Pass retry=False to call func only once per item, without a rate limit, when func already makes each
+    of its API calls through call_with_retry(): retrying the whole func would repeat its calls that succeeded.
+
+    Example:
+        keys = list(map_bounded(partial(describe_key, client), key_ids, max_concurrency=8, service='kms'))
+    """
+    if _should_run_inline(max_concurrency):
+        for item in items:
+            yield _call(func, item, service, retry)
+        return
+
+    limit = max(1, max_concurrency or get_max_workers())
+    remaining = iter(items)
+    # Futures in the order of their items. The next item is only submitted once the oldest call has completed, so at
+    # most `limit` calls are in flight or waiting to be consumed.
+    in_order: Deque[Future] = deque()
+    try:
+        for item in islice(remaining, limit):
+            in_order.append(_submit(func, item, service, retry))
+        while in_order:
+            result = in_order.popleft().result()
+            for item in islice(remaining, 1):
+                in_order.append(_submit(func, item, service, retry))
+            yield result
+    finally:
+        for future in in_order:
+            future.cancel()
+
+
+def as_completed(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_concurrency: Optional[int] = None,
+    service: Optional[str] = None,
+    retry: bool = True,
+) -> Iterator[Tuple[T, R]]:
+    """
+    Like map_bounded(), but yields (item, result) pairs in the order the calls complete, so that the caller can process
+    each result as soon as it is available.
+    """
+    if _should_run_inline(max_concurrency):
+        for item in items:
+            yield item, _call(func, item, service, retry)
+        return
+
+    for item, future in _iter_futures(func, items, max_concurrency, service, retry):
+        yield item, future.result()
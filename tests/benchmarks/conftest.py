@@ -0,0 +1,122 @@
+import json
+import platform
+import statistics
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Optional
+
+import pytest
+
+# Benchmark name -> timings, for every benchmark that ran in this session. Written by pytest_sessionfinish().
+_results: Dict[str, Dict[str, Any]] = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('cartography benchmarks')
+    group.addoption(
+        '--benchmark-scale',
+        type=float,
+        default=0.1,
+        help='Fraction of the realistic data sizes in tests/benchmarks/synthetic.py to benchmark with. Default = 0.1.',
+    )
+    group.addoption(
+        '--benchmark-rounds',
+        type=int,
+        default=3,
+        help='Number of times each benchmark is run. The median is compared against baselines. Default = 3.',
+    )
+    group.addoption(
+        '--benchmark-save',
+        default=None,
+        help='Write the results of this run as a JSON baseline to this path.',
+    )
+    group.addoption(
+        '--benchmark-compare',
+        default=None,
+        help='Fail benchmarks that are slower than in this JSON baseline by more than --benchmark-max-regression.',
+    )
+    group.addoption(
+        '--benchmark-max-regression',
+        type=float,
+        default=1.5,
+        help='Max allowed ratio between a benchmark\'s median time and its baseline. Default = 1.5.',
+    )
+    group.addoption(
+        '--benchmark-neo4j',
+        action='store_true',
+        help='Also run the end-to-end load benchmarks against the Neo4j instance at NEO4J_URL.',
+    )
+
+
+def _get_option(config, name: str, default: Any) -> Any:
+    # The options are only registered when this conftest is loaded at startup, i.e. when tests/benchmarks is targeted.
+    return config.getoption(name, default=default)
+
+
+@pytest.fixture(scope='session')
+def benchmark_scale(request) -> float:
+    return _get_option(request.config, '--benchmark-scale', 0.1)
+
+
+@pytest.fixture(scope='session')
+def _benchmark_baseline(request) -> Optional[Dict[str, Any]]:
+    path = _get_option(request.config, '--benchmark-compare', None)
+    if not path:
+        return None
+    with open(path) as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline['scale'] != _get_option(request.config, '--benchmark-scale', 0.1):
+        pytest.fail(f"Baseline {path} was recorded with --benchmark-scale {baseline['scale']}.")
+    return baseline
+
+
+@pytest.fixture
+def benchmark(request, _benchmark_baseline) -> Callable[..., Any]:
+    """
+    Times a function. Call as benchmark(name, func, setup=None, **info): `setup` is called before every round to
+    build fresh arguments for functions that modify their input, and `info` is stored with the result, e.g. the number
+    of items processed. Returns the value of the last call to `func`.
+    """
+    rounds = _get_option(request.config, '--benchmark-rounds', 3)
+    max_regression = _get_option(request.config, '--benchmark-max-regression', 1.5)
+
+    def run(name: str, func: Callable[..., Any], setup: Optional[Callable[[], tuple]] = None, **info) -> Any:
+        timings = []
+        value = None
+        for _ in range(rounds):
+            args = setup() if setup else ()
+            start = time.perf_counter()
+            value = func(*args)
+            timings.append(time.perf_counter() - start)
+        median = statistics.median(timings)
+        _results[name] = {'median': median, 'min': min(timings), 'max': max(timings), 'rounds': rounds, **info}
+        print(f"\n{name}: median {median:.4f}s, min {min(timings):.4f}s over {rounds} rounds")
+
+        if _benchmark_baseline and name in _benchmark_baseline['results']:
+            baseline_median = _benchmark_baseline['results'][name]['median']
+            assert median <= baseline_median * max_regression, (
+                f"{name} took {median:.4f}s, more than {max_regression}x its baseline of {baseline_median:.4f}s."
+            )
+        return value
+
+    return run
+
+
+def pytest_sessionfinish(session, exitstatus):
+    path = _get_option(session.config, '--benchmark-save', None)
+    if not path or not _results:
+        return
+    with open(path, 'w') as baseline_file:
+        json.dump(
+            {
+                'scale': _get_option(session.config, '--benchmark-scale', 0.1),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': _results,
+            },
+            baseline_file,
+            indent=2,
+            sort_keys=True,
+        )
@@ -0,0 +1,222 @@
+"""
+Deterministic generators of synthetic data shaped like the responses of the APIs that cartography syncs. The default
+sizes match a large real deployment; the benchmarks scale them down with --benchmark-scale.
+"""
+import datetime
+import random
+from typing import Any
+from typing import Dict
+from typing import List
+
+ACCOUNT_ID = '000000000000'
+REGION = 'us-east-1'
+
+NUM_EC2_INSTANCES = 50000
+NUM_IAM_ROLES = 10000
+NUM_TAGS = 200000
+NUM_CVES = 250000
+NUM_S3_BUCKETS = 5000
+
+_SERVICES = ['s3', 'ec2', 'iam', 'kms', 'sqs', 'sns', 'dynamodb', 'lambda', 'rds', 'secretsmanager']
+_VERBS = ['Get', 'List', 'Describe', 'Put', 'Create', 'Delete', 'Update', 'Tag']
+_NOUNS = ['Object', 'Bucket', 'Instance', 'Key', 'Queue', 'Topic', 'Table', 'Function', 'Secret', 'Policy']
+
+
+def scaled(count: int, scale: float) -> int:
+    return max(1, int(count * scale))
+
+
+def ec2_reservations(num_instances: int, instances_per_reservation: int = 2) -> List[Dict[str, Any]]:
+    """
+    :return: Reservations as returned by ec2:DescribeInstances.
+    """
+    rng = random.Random(0)
+    launch_time = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+    reservations = []
+    for r in range(0, num_instances, instances_per_reservation):
+        instances = []
+        for i in range(r, min(r + instances_per_reservation, num_instances)):
+            subnet_id = f'subnet-{i % 200:08x}'
+            group_ids = [f'sg-{(i + j) % 500:08x}' for j in range(rng.randint(1, 3))]
+            instances.append({
+                'InstanceId': f'i-{i:017x}',
+                'ImageId': f'ami-{i % 50:08x}',
+                'InstanceType': rng.choice(['t3.micro', 'm5.large', 'c5.xlarge', 'r5.2xlarge']),
+                'KeyName': f'key-{i % 20}',
+                'LaunchTime': launch_time + datetime.timedelta(minutes=i),
+                'Monitoring': {'State': 'disabled'},
+                'Placement': {'AvailabilityZone': f'{REGION}{"abc"[i % 3]}', 'Tenancy': 'default'},
+                'PrivateDnsName': f'ip-10-0-{i // 256 % 256}-{i % 256}.ec2.internal',
+                'PrivateIpAddress': f'10.0.{i // 256 % 256}.{i % 256}',
+                'PublicDnsName': '',
+                'State': {'Code': 16, 'Name': 'running'},
+                'SubnetId': subnet_id,
+                'VpcId': f'vpc-{i % 10:08x}',
+                'Architecture': 'x86_64',
+                'BlockDeviceMappings': [
+                    {'DeviceName': '/dev/xvda', 'Ebs': {'VolumeId': f'vol-{i:017x}', 'DeleteOnTermination': True}},
+                ],
+                'EbsOptimized': False,
+                'IamInstanceProfile': {'Arn': f'arn:aws:iam::{ACCOUNT_ID}:instance-profile/profile-{i % 30}'},
+                'NetworkInterfaces': [{
+                    'NetworkInterfaceId': f'eni-{i:017x}',
+                    'Status': 'in-use',
+                    'MacAddress': f'0e:00:00:{i // 65536 % 256:02x}:{i // 256 % 256:02x}:{i % 256:02x}',
+                    'Description': '',
+                    'PrivateDnsName': f'ip-10-0-{i // 256 % 256}-{i % 256}.ec2.internal',
+                    'PrivateIpAddress': f'10.0.{i // 256 % 256}.{i % 256}',
+                    'SubnetId': subnet_id,
+                    'Groups': [{'GroupId': group_id, 'GroupName': group_id} for group_id in group_ids],
+                }],
+                'SecurityGroups': [{'GroupId': group_id, 'GroupName': group_id} for group_id in group_ids],
+                'Tags': [{'Key': 'Name', 'Value': f'instance-{i}'}],
+            })
+        reservations.append({
+            'ReservationId': f'r-{r:017x}',
+            'OwnerId': ACCOUNT_ID,
+            'RequesterId': ACCOUNT_ID,
+            'Groups': [],
+            'Instances': instances,
+        })
+    return reservations
+
+
+def _statement(rng: random.Random, num_actions: int, resource_arns: List[str]) -> Dict[str, Any]:
+    actions = []
+    for _ in range(num_actions):
+        service = rng.choice(_SERVICES)
+        if rng.random() < 0.1:
+            actions.append(f'{service}:*')
+        else:
+            actions.append(f'{service}:{rng.choice(_VERBS)}{rng.choice(_NOUNS)}')
+    if rng.random() < 0.2:
+        resources = ['*']
+    else:
+        resources = [
+            arn if rng.random() < 0.7 else f'{arn[:-3]}*'
+            for arn in rng.sample(resource_arns, min(len(resource_arns), rng.randint(1, 10)))
+        ]
+    return {
+        'effect': 'Deny' if rng.random() < 0.05 else 'Allow',
+        'action': actions,
+        'resource': resources,
+    }
+
+
+def iam_role_policies(
+    num_roles: int,
+    resource_arns: List[str],
+    policies_per_role: int = 3,
+    statements_per_policy: int = 10,
+) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+    """
+    :return: Principal ARN -> policy id -> uncompiled statements, in the shape read by
+        cartography.intel.aws.permission_relationships.get_principals_for_account().
+    """
+    rng = random.Random(1)
+    principals = {}
+    for r in range(num_roles):
+        role_arn = f'arn:aws:iam::{ACCOUNT_ID}:role/role-{r}'
+        principals[role_arn] = {
+            f'{role_arn}/inline_policy/policy-{p}': [
+                _statement(rng, rng.randint(1, 20), resource_arns) for _ in range(statements_per_policy)
+            ]
+            for p in range(policies_per_role)
+        }
+    return principals
+
+
+def s3_bucket_arns(num_buckets: int) -> List[str]:
+    return [f'arn:aws:s3:::bucket-{b:06d}' for b in range(num_buckets)]
+
+
+def tags(num_tags: int) -> List[Dict[str, Any]]:
+    """
+    :return: Tag rows in the shape loaded by cartography.intel.aws.resourcegroupstaggingapi.
+    """
+    return [
+        {
+            'resource_id': f'i-{t // 4:017x}',
+            'Key': f'key-{t % 4}',
+            'Value': f'value-{t}',
+        }
+        for t in range(num_tags)
+    ]
+
+
+def cve_feed(num_cves: int) -> Dict[str, Any]:
+    """
+    :return: A response of the NVD CVE API 2.0 with all the CVEs in one page.
+    """
+    rng = random.Random(2)
+    vulnerabilities = []
+    for c in range(num_cves):
+        vulnerabilities.append({
+            'cve': {
+                'id': f'CVE-{2000 + c % 24}-{c:06d}',
+                'sourceIdentifier': 'cve@mitre.org',
+                'published': '2024-01-05T02:15:07.147',
+                'lastModified': '2024-01-10T15:10:40.807',
+                'vulnStatus': 'Analyzed',
+                'descriptions': [
+                    {'lang': 'en', 'value': f'Synthetic vulnerability {c} allows remote attackers to do things.'},
+                    {'lang': 'es', 'value': f'Vulnerabilidad sintetica {c}.'},
+                ],
+                'metrics': {
+                    'cvssMetricV31': [{
+                        'source': 'nvd@nist.gov',
+                        'type': 'Primary',
+                        'cvssData': {
+                            'version': '3.1',
+                            'vectorString': 'CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H',
+                            'attackVector': 'NETWORK',
+                            'attackComplexity': 'LOW',
+                            'privilegesRequired': 'NONE',
+                            'userInteraction': 'NONE',
+                            'scope': 'UNCHANGED',
+                            'confidentialityImpact': 'HIGH',
+                            'integrityImpact': 'HIGH',
+                            'availabilityImpact': 'HIGH',
+                            'baseScore': round(rng.uniform(0, 10), 1),
+                            'baseSeverity': 'CRITICAL',
+                        },
+                        'exploitabilityScore': 3.9,
+                        'impactScore': 5.9,
+                    }],
+                },
+                'weaknesses': [{
+                    'source': 'nvd@nist.gov',
+                    'type': 'Primary',
+                    'description': [{'lang': 'en', 'value': f'CWE-{rng.randint(1, 1000)}'}],
+                }],
+                'references': [
+                    {'url': f'https://example.com/advisories/{c}/{r}', 'source': 'cve@mitre.org'} for r in range(3)
+                ],
+            },
+        })
+    return {
+        'resultsPerPage': num_cves,
+        'startIndex': 0,
+        'totalResults': num_cves,
+        'format': 'NVD_CVE',
+        'version': '2.0',
+        'timestamp': '2024-01-10T19:30:07.520',
+        'vulnerabilities': vulnerabilities,
+    }
+
+
+def cve_pages(num_cves: int, page_size: int = 2000) -> List[Dict[str, Any]]:
+    """
+    :return: The pages of the NVD CVE API 2.0, as yielded by cartography.intel.cve.feed.iter_cve_pages_in_batches().
+    """
+    vulnerabilities = cve_feed(num_cves)['vulnerabilities']
+    return [
+        {
+            **cve_feed(0),
+            'resultsPerPage': len(vulnerabilities[start:start + page_size]),
+            'startIndex': start,
+            'totalResults': num_cves,
+            'vulnerabilities': vulnerabilities[start:start + page_size],
+        }
+        for start in range(0, num_cves, page_size)
+    ]
@@ -0,0 +1,114 @@
+import copy
+
+from cartography.graph.querybuilder import build_ingestion_query
+from cartography.intel.aws.ec2.instances import transform_ec2_instances
+from cartography.intel.aws.permission_relationships import calculate_permission_relationships
+from cartography.intel.aws.permission_relationships import compile_statement
+from cartography.intel.create_indexes import get_all_node_schemas
+from cartography.intel.cve.feed import transform_cve_pages
+from cartography.intel.cve.feed import transform_cves
+from cartography.util import batch
+from tests.benchmarks import synthetic
+
+
+def test_build_ingestion_query(benchmark):
+    schemas = get_all_node_schemas()
+
+    queries = benchmark(
+        'build_ingestion_query',
+        lambda: [build_ingestion_query(schema) for schema in schemas],
+        num_schemas=len(schemas),
+    )
+
+    assert len(queries) == len(schemas)
+
+
+def test_transform_ec2_instances(benchmark, benchmark_scale):
+    num_instances = synthetic.scaled(synthetic.NUM_EC2_INSTANCES, benchmark_scale)
+    reservations = synthetic.ec2_reservations(num_instances)
+
+    ec2_data = benchmark(
+        'transform_ec2_instances',
+        lambda: transform_ec2_instances(reservations, synthetic.REGION, synthetic.ACCOUNT_ID),
+        num_instances=num_instances,
+    )
+
+    assert len(ec2_data.instance_list) == num_instances
+
+
+def test_transform_cves(benchmark, benchmark_scale):
+    num_cves = synthetic.scaled(synthetic.NUM_CVES, benchmark_scale)
+    feed = synthetic.cve_feed(num_cves)
+
+    # transform_cves() modifies the feed in place, so every round gets a fresh copy
+    cves = benchmark(
+        'transform_cves',
+        transform_cves,
+        setup=lambda: (copy.deepcopy(feed),),
+        num_cves=num_cves,
+    )
+
+    assert len(cves) == num_cves
+
+
+def test_transform_cve_pages(benchmark, benchmark_scale):
+    num_cves = synthetic.scaled(synthetic.NUM_CVES, benchmark_scale)
+    pages = synthetic.cve_pages(num_cves)
+
+    # Consumes the pipeline the way the CVE sync does, one bounded chunk at a time
+    num_transformed = benchmark(
+        'transform_cve_pages',
+        lambda fresh_pages: sum(len(chunk) for chunk in transform_cve_pages(iter(fresh_pages))),
+        setup=lambda: (copy.deepcopy(pages),),
+        num_cves=num_cves,
+    )
+
+    assert num_transformed == num_cves
+
+
+def test_compile_statement(benchmark, benchmark_scale):
+    num_roles = synthetic.scaled(synthetic.NUM_IAM_ROLES, benchmark_scale)
+    resource_arns = synthetic.s3_bucket_arns(synthetic.scaled(synthetic.NUM_S3_BUCKETS, benchmark_scale))
+    principals = synthetic.iam_role_policies(num_roles, resource_arns)
+    statements = [statement for policies in principals.values() for policy in policies.values() for statement in policy]
+
+    # compile_statement() modifies the statements in place, so every round gets a fresh copy
+    compiled = benchmark(
+        'compile_statement',
+        compile_statement,
+        setup=lambda: (copy.deepcopy(statements),),
+        num_statements=len(statements),
+    )
+
+    assert len(compiled) == len(statements)
+
+
+def test_calculate_permission_relationships(benchmark, benchmark_scale):
+    num_roles = synthetic.scaled(synthetic.NUM_IAM_ROLES, benchmark_scale)
+    resource_arns = synthetic.s3_bucket_arns(synthetic.scaled(synthetic.NUM_S3_BUCKETS, benchmark_scale))
+    principals = {
+        principal_arn: {policy_id: compile_statement(statements) for policy_id, statements in policies.items()}
+        for principal_arn, policies in synthetic.iam_role_policies(num_roles, resource_arns).items()
+    }
+
+    allowed = benchmark(
+        'calculate_permission_relationships',
+        lambda: calculate_permission_relationships(principals, resource_arns, ['S3:GetObject']),
+        num_principals=num_roles,
+        num_resources=len(resource_arns),
+    )
+
+    assert allowed
+
+
+def test_batch(benchmark, benchmark_scale):
+    num_tags = synthetic.scaled(synthetic.NUM_TAGS, benchmark_scale)
+    tags = synthetic.tags(num_tags)
+
+    batches = benchmark(
+        'batch',
+        lambda: batch(tags, size=1000),
+        num_items=num_tags,
+    )
+
+    assert sum(len(b) for b in batches) == num_tags
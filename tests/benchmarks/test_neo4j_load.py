@@ -0,0 +1,48 @@
+import neo4j
+import pytest
+
+from cartography.intel.aws.ec2.instances import load_ec2_instance_data
+from cartography.intel.aws.ec2.instances import transform_ec2_instances
+from tests.benchmarks import synthetic
+from tests.integration import settings
+
+TEST_UPDATE_TAG = 123456789
+
+
+@pytest.fixture(scope='module')
+def neo4j_session(request):
+    if not request.config.getoption('--benchmark-neo4j', default=False):
+        pytest.skip('End-to-end load benchmarks only run with --benchmark-neo4j.')
+    driver = neo4j.GraphDatabase.driver(settings.get("NEO4J_URL"))
+    with driver.session() as session:
+        yield session
+        session.run("MATCH (n) DETACH DELETE n;")
+    driver.close()
+
+
+def test_load_ec2_instances(neo4j_session, benchmark, benchmark_scale):
+    num_instances = synthetic.scaled(synthetic.NUM_EC2_INSTANCES, benchmark_scale)
+    ec2_data = transform_ec2_instances(
+        synthetic.ec2_reservations(num_instances), synthetic.REGION, synthetic.ACCOUNT_ID,
+    )
+    neo4j_session.run("MERGE (:AWSAccount{id: $AccountId})", AccountId=synthetic.ACCOUNT_ID)
+
+    benchmark(
+        'neo4j_load_ec2_instances',
+        lambda: load_ec2_instance_data(
+            neo4j_session,
+            synthetic.REGION,
+            synthetic.ACCOUNT_ID,
+            TEST_UPDATE_TAG,
+            ec2_data.reservation_list,
+            ec2_data.instance_list,
+            ec2_data.subnet_list,
+            ec2_data.sg_list,
+            ec2_data.keypair_list,
+            ec2_data.network_interface_list,
+            ec2_data.instance_ebs_volumes_list,
+        ),
+        num_instances=num_instances,
+    )
+
+    assert neo4j_session.run("MATCH (n:EC2Instance) RETURN count(n)").single()[0] == num_instances
@@ -78,6 +78,62 @@ def test_sync_multiple_accounts(
     assert mock_cleanup.call_count == 1
 
 
+@mock.patch.object(cartography.intel.aws.organizations, 'sync', return_value=None)
+@mock.patch('cartography.intel.aws.boto3.Session')
+@mock.patch.object(cartography.intel.aws, 'get_neo4j_driver')
+@mock.patch.object(cartography.intel.aws, 'new_neo4j_session')
+@mock.patch.object(cartography.intel.aws, '_sync_one_account', return_value=None)
+@mock.patch.object(cartography.intel.aws, '_autodiscover_accounts', return_value=None)
+@mock.patch.object(cartography.intel.aws, 'run_cleanup_job', return_value=None)
+def test_sync_multiple_accounts_concurrently(
+    mock_cleanup, mock_autodiscover, mock_sync_one, mock_new_session, mock_get_driver, mock_boto3_session,
+    mock_sync_orgs, neo4j_session,
+):
+    common_job_parameters = {'UPDATE_TAG': TEST_UPDATE_TAG}
+
+    cartography.intel.aws._sync_multiple_accounts(
+        neo4j_session, TEST_ACCOUNTS, TEST_UPDATE_TAG, common_job_parameters, False, aws_account_concurrency=3,
+    )
+
+    # Each account is synced on its own worker session with its own copy of the job parameters
+    worker_session = mock_new_session.return_value.__enter__.return_value
+    assert mock_new_session.call_count == len(TEST_ACCOUNTS)
+    for account_id in TEST_ACCOUNTS.values():
+        mock_sync_one.assert_any_call(
+            worker_session, mock_boto3_session(), account_id, TEST_UPDATE_TAG,
+            {'UPDATE_TAG': TEST_UPDATE_TAG, 'AWS_ID': account_id},
+            aws_requested_syncs=[],
+        )
+    assert 'AWS_ID' not in common_job_parameters
+    assert mock_cleanup.call_count == 1
+
+
+@mock.patch.object(cartography.intel.aws.organizations, 'sync', return_value=None)
+@mock.patch('cartography.intel.aws.boto3.Session')
+@mock.patch.object(cartography.intel.aws, 'get_neo4j_driver')
+@mock.patch.object(cartography.intel.aws, 'new_neo4j_session')
+@mock.patch.object(cartography.intel.aws, '_sync_one_account', return_value=None)
+@mock.patch.object(cartography.intel.aws, '_autodiscover_accounts', return_value=None)
+@mock.patch.object(cartography.intel.aws, 'run_cleanup_job', return_value=None)
+def test_sync_multiple_accounts_concurrently_aggregates_exceptions_with_aws_best_effort_mode(
+    mock_cleanup, mock_autodiscover, mock_sync_one, mock_new_session, mock_get_driver, mock_boto3_session,
+    mock_sync_orgs, neo4j_session,
+):
+    mock_sync_one.side_effect = KeyError('foo')
+
+    with raises(Exception) as e:
+        cartography.intel.aws._sync_multiple_accounts(
+            neo4j_session, TEST_ACCOUNTS, TEST_UPDATE_TAG, {'UPDATE_TAG': TEST_UPDATE_TAG}, True,
+            aws_account_concurrency=2,
+        )
+
+    message = str(e.value)
+    assert message.count('KeyError') == len(TEST_ACCOUNTS)
+    for account_id in TEST_ACCOUNTS.values():
+        assert account_id in message
+    assert mock_cleanup.call_count == 0
+
+
 @mock.patch('cartography.intel.aws.boto3.Session')
 @mock.patch('cartography.intel.aws.organizations')
 @mock.patch.object(cartography.intel.aws, '_sync_multiple_accounts', return_value=True)
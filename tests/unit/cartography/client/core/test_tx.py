@@ -0,0 +1,95 @@
+from unittest import mock
+
+from cartography.client.core.tx import AdaptiveBatchSizer
+from cartography.client.core.tx import ensure_indexes
+from cartography.client.core.tx import load_graph_data
+from cartography.client.core.tx import LoadBatchBounds
+from cartography.client.core.tx import reset_index_state
+from cartography.graph.querybuilder import build_create_index_queries
+from tests.data.graph.querybuilder.sample_models.interesting_asset import InterestingAssetSchema
+
+
+def test_adaptive_batch_sizer_shrinks_on_slow_transactions():
+    sizer = AdaptiveBatchSizer(LoadBatchBounds(min_size=10, max_size=1000, target_seconds=1.0))
+    assert sizer.size == 1000
+
+    # 1000 items took 4 seconds, so we should aim for 250 items to hit the 1 second target.
+    sizer.record(1000, 4.0, 0)
+    assert sizer.size == 250
+
+    # Never shrink below the minimum.
+    sizer.record(250, 1000.0, 0)
+    assert sizer.size == 10
+
+
+def test_adaptive_batch_sizer_grows_gradually_up_to_max():
+    sizer = AdaptiveBatchSizer(LoadBatchBounds(min_size=10, max_size=1000, target_seconds=1.0))
+    sizer.size = 100
+
+    # Very fast transactions are allowed to at most double the batch size each time.
+    sizer.record(100, 0.001, 0)
+    assert sizer.size == 200
+    for _ in range(10):
+        sizer.record(sizer.size, 0.001, 0)
+    assert sizer.size == 1000
+
+
+def test_adaptive_batch_sizer_respects_max_bytes():
+    sizer = AdaptiveBatchSizer(LoadBatchBounds(min_size=1, max_size=1000, target_seconds=1.0, max_bytes=1000))
+
+    # 1000 items of ~100 bytes each is 100x over the byte budget.
+    sizer.record(1000, 0.5, 100000)
+    assert sizer.size == 10
+
+
+def test_adaptive_batch_sizer_initial_size_and_shrink():
+    sizer = AdaptiveBatchSizer(LoadBatchBounds(min_size=10, max_size=1000, target_seconds=1.0), initial_size=100)
+    assert sizer.size == 100
+
+    assert sizer.shrink()
+    assert sizer.size == 50
+    sizer.size = 15
+    assert sizer.shrink()
+    assert sizer.size == 10
+    # Already at the minimum
+    assert not sizer.shrink()
+
+
+def test_load_graph_data_streams_generators():
+    neo4j_session = mock.MagicMock()
+    consumed = []
+    consumed_at_write = []
+    neo4j_session.write_transaction.side_effect = lambda *args, **kwargs: consumed_at_write.append(len(consumed))
+
+    def _gen():
+        for i in range(25):
+            consumed.append(i)
+            yield {'id': i}
+
+    with mock.patch(
+        'cartography.client.core.tx.get_load_batch_bounds',
+        return_value=LoadBatchBounds(min_size=10, max_size=10),
+    ):
+        load_graph_data(neo4j_session, 'UNWIND $DictList AS item RETURN item', _gen(), UPDATE_TAG=1)
+
+    batches = [c.kwargs['DictList'] for c in neo4j_session.write_transaction.call_args_list]
+    assert [len(b) for b in batches] == [10, 10, 5]
+    assert [item['id'] for b in batches for item in b] == list(range(25))
+    # The generator is only advanced one batch ahead of each write.
+    assert consumed_at_write == [10, 20, 25]
+    assert all(c.kwargs['UPDATE_TAG'] == 1 for c in neo4j_session.write_transaction.call_args_list)
+
+
+def test_ensure_indexes_runs_each_statement_once_per_sync():
+    reset_index_state()
+    neo4j_session = mock.MagicMock()
+    expected = build_create_index_queries(InterestingAssetSchema())
+
+    ensure_indexes(neo4j_session, InterestingAssetSchema())
+    ensure_indexes(neo4j_session, InterestingAssetSchema())
+    assert [c.args[0] for c in neo4j_session.run.call_args_list] == expected
+
+    # A new sync runs the statements again.
+    reset_index_state()
+    ensure_indexes(neo4j_session, InterestingAssetSchema())
+    assert neo4j_session.run.call_count == 2 * len(expected)
@@ -1,4 +1,12 @@
+import json
+from importlib.resources import read_text
+from unittest import mock
+
+from cartography.graph.job import _get_stages
+from cartography.graph.job import DEFAULT_JOB_CONCURRENCY
 from cartography.graph.job import GraphJob
+from cartography.graph.job import set_job_concurrency
+from cartography.graph.statement import GraphStatement
 from tests.data.jobs.sample import SAMPLE_CLEANUP_JOB
 
 
@@ -10,3 +18,62 @@ def test_graphjob_from_json():
     assert job.name == "cleanup stale resources"
     assert len(job.statements) == 3
     assert job.short_name is None
+
+
+def test_graphjob_stages():
+    statements = [
+        GraphStatement('q1'),
+        GraphStatement('q2', group='a'),
+        GraphStatement('q3', group='b'),
+        GraphStatement('q4', group='a'),
+        GraphStatement('q5'),
+    ]
+
+    stages = _get_stages(statements)
+
+    assert [[[s.query for s in group] for group in stage] for stage in stages] == [
+        [['q1']],
+        [['q2', 'q4'], ['q3']],
+        [['q5']],
+    ]
+
+
+def test_aws_tags_cleanup_deletes_shared_tag_nodes_serially():
+    blob = read_text('cartography.data.jobs.cleanup', 'aws_import_tags_cleanup.json')
+    job = GraphJob.from_json(blob)
+
+    stages = _get_stages(job.statements)
+
+    # AWSTag nodes are shared across resource types, so only the per-label relationship deletes run concurrently
+    for stage in stages:
+        if len(stage) > 1:
+            assert all('DETACH DELETE' not in s.query for group in stage for s in group)
+    assert sum(len(stage) > 1 for stage in stages) == 1
+
+
+@mock.patch('cartography.graph.job.new_neo4j_session')
+@mock.patch('cartography.graph.job.get_neo4j_driver', return_value=mock.MagicMock())
+def test_graphjob_runs_groups_on_worker_sessions(mock_get_driver, mock_new_session):
+    job: GraphJob = GraphJob.from_json(
+        json.dumps({
+            'name': 'grouped job',
+            'statements': [
+                {'query': 'q1', 'group': 'a'},
+                {'query': 'q2', 'group': 'b'},
+                {'query': 'q3'},
+            ],
+        }),
+    )
+    worker_session = mock_new_session.return_value.__enter__.return_value
+    neo4j_session = mock.MagicMock()
+
+    set_job_concurrency(4)
+    try:
+        job.run(neo4j_session)
+    finally:
+        set_job_concurrency(DEFAULT_JOB_CONCURRENCY)
+
+    # Each group runs on its own session, and the ungrouped statement runs on the job's session afterwards
+    assert mock_new_session.call_count == 2
+    assert worker_session.write_transaction.call_count == 2
+    assert neo4j_session.write_transaction.call_count == 1
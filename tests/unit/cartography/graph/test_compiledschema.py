@@ -0,0 +1,46 @@
+from unittest import mock
+
+import pytest
+
+from cartography.graph import compiledschema
+from cartography.graph.cleanupbuilder import build_cleanup_queries
+from cartography.graph.compiledschema import clear_compiled_schemas
+from cartography.graph.compiledschema import get_compiled_schema
+from cartography.graph.querybuilder import build_create_index_queries
+from cartography.graph.querybuilder import build_ingestion_query
+from tests.data.graph.querybuilder.sample_models.interesting_asset import InterestingAssetSchema
+from tests.data.graph.querybuilder.sample_models.simple_node import SimpleNodeSchema
+
+
+def test_compiled_schema_matches_builders():
+    clear_compiled_schemas()
+    schema = InterestingAssetSchema()
+
+    compiled = get_compiled_schema(schema)
+
+    assert compiled.ingestion_query == build_ingestion_query(schema)
+    assert list(compiled.index_queries) == build_create_index_queries(schema)
+    assert list(compiled.cleanup_queries) == build_cleanup_queries(schema)
+    assert compiled.cleanup_parameters == {'UPDATE_TAG', 'sub_resource_id', 'LIMIT_SIZE'}
+
+
+def test_compiled_schema_is_built_once_per_class():
+    clear_compiled_schemas()
+    with mock.patch.object(
+        compiledschema, 'build_ingestion_query', wraps=compiledschema.build_ingestion_query,
+    ) as mock_build:
+        first = get_compiled_schema(InterestingAssetSchema())
+        second = get_compiled_schema(InterestingAssetSchema())
+
+    assert first is second
+    assert mock_build.call_count == 1
+
+
+def test_compiled_schema_cleanup_is_lazy():
+    clear_compiled_schemas()
+    # SimpleNodeSchema has no sub resource relationship, so it can be loaded but not auto-cleaned up.
+    compiled = get_compiled_schema(SimpleNodeSchema())
+    assert compiled.ingestion_query
+
+    with pytest.raises(ValueError):
+        compiled.cleanup_queries
@@ -0,0 +1,144 @@
+import json
+from pathlib import Path
+from unittest import mock
+
+import neo4j.exceptions
+
+from cartography.client.core.tx import LoadBatchBounds
+from cartography.graph.cleanupbuilder import build_cleanup_queries
+from cartography.graph.statement import GraphStatement
+from cartography.graph.statement import set_cleanup_batch_size
+from cartography.graph.statement import set_iteration_size_bounds
+from cartography.graph.statement import to_single_pass_delete
+from cartography.models.aws.emr import EMRClusterSchema
+
+CLEANUP_JOBS_DIR = Path(__file__).parents[4] / 'cartography' / 'data' / 'jobs' / 'cleanup'
+
+
+def test_to_single_pass_delete():
+    query = """
+        MATCH (n:EMRCluster)<-[s:RESOURCE]-(:AWSAccount{id: $AWS_ID})
+        WHERE n.lastupdated <> $UPDATE_TAG
+        WITH n LIMIT $LIMIT_SIZE
+        DETACH DELETE n;
+        """
+    assert to_single_pass_delete(query, 1000) == (
+        """
+        MATCH (n:EMRCluster)<-[s:RESOURCE]-(:AWSAccount{id: $AWS_ID})
+        WHERE n.lastupdated <> $UPDATE_TAG
+        WITH DISTINCT n
+CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 1000 ROWS"""
+    )
+    assert to_single_pass_delete(
+        "MATCH ()-[r:X]->() WHERE r.lastupdated <> $UPDATE_TAG WITH r LIMIT $LIMIT_SIZE delete (r) "
+        "return COUNT(*) as TotalCompleted",
+        1000,
+    ) == (
+        "MATCH ()-[r:X]->() WHERE r.lastupdated <> $UPDATE_TAG WITH DISTINCT r\n"
+        "CALL { WITH r DELETE r } IN TRANSACTIONS OF 1000 ROWS"
+    )
+    # Statements that do something other than delete the limited variable keep running iteratively
+    assert to_single_pass_delete("MATCH (s) WITH s LIMIT $LIMIT_SIZE REMOVE s.anonymous_access", 1000) is None
+    assert to_single_pass_delete("MATCH (n) WITH distinct r LIMIT $LIMIT_SIZE DELETE (r)", 1000) is None
+
+
+def test_to_single_pass_delete_covers_generated_and_json_cleanup_jobs():
+    for query in build_cleanup_queries(EMRClusterSchema()):
+        assert to_single_pass_delete(query, 1000)
+
+    iterative_queries = [
+        statement['query']
+        for job_file in CLEANUP_JOBS_DIR.glob('*.json')
+        for statement in json.loads(job_file.read_text())['statements']
+        if statement.get('iterative')
+    ]
+    converted = [query for query in iterative_queries if to_single_pass_delete(query, 1000)]
+    assert len(converted) > 0.95 * len(iterative_queries)
+
+
+def test_run_iterative_single_pass():
+    session = mock.MagicMock()
+    statement = GraphStatement(
+        "MATCH (n:X) WHERE n.lastupdated <> $UPDATE_TAG WITH n LIMIT $LIMIT_SIZE DETACH DELETE (n)",
+        {'UPDATE_TAG': 1},
+        iterative=True,
+        iterationsize=100,
+    )
+    set_cleanup_batch_size(5000)
+    try:
+        statement.run(session)
+    finally:
+        set_cleanup_batch_size(None)
+
+    session.write_transaction.assert_not_called()
+    session.run.assert_called_once_with(
+        "MATCH (n:X) WHERE n.lastupdated <> $UPDATE_TAG WITH DISTINCT n\n"
+        "CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 5000 ROWS",
+        {'UPDATE_TAG': 1, 'LIMIT_SIZE': 100},
+    )
+
+
+@mock.patch('cartography.graph.statement.time.monotonic')
+def test_run_iterative_adaptive(mock_monotonic):
+    # Each transaction takes 0.5 seconds against a 1 second target
+    mock_monotonic.side_effect = [float(i) / 2 for i in range(100)]
+    out_of_memory = neo4j.exceptions.TransientError()
+    out_of_memory.code = 'Neo.TransientError.General.MemoryPoolOutOfMemoryError'
+    limit_sizes = []
+
+    def write_transaction(func):
+        limit_sizes.append(statement.parameters['LIMIT_SIZE'])
+        if len(limit_sizes) == 3:
+            raise out_of_memory
+        result = mock.MagicMock()
+        result.consume.return_value.counters.contains_updates = len(limit_sizes) < 5
+        return result
+
+    session = mock.MagicMock()
+    session.write_transaction.side_effect = write_transaction
+    statement = GraphStatement(
+        "MATCH (n:X) WHERE n.lastupdated <> $UPDATE_TAG WITH n LIMIT $LIMIT_SIZE DETACH DELETE (n)",
+        {'UPDATE_TAG': 1},
+        iterative=True,
+        iterationsize=100,
+    )
+    set_iteration_size_bounds(LoadBatchBounds(min_size=50, max_size=1000, target_seconds=1.0))
+    try:
+        statement.run(session)
+    finally:
+        set_iteration_size_bounds(None)
+
+    # Starts from the statement's iterationsize, doubles while transactions are fast and halves when out of memory
+    assert limit_sizes == [100, 200, 400, 200, 400]
+
+
+@mock.patch('time.sleep')
+def test_run_iterative_single_pass_retries_transient_errors(mock_sleep):
+    deadlock = neo4j.exceptions.TransientError()
+    deadlock.code = 'Neo.TransientError.Transaction.DeadlockDetected'
+    session = mock.MagicMock()
+    session.run.return_value.consume.side_effect = [deadlock, mock.MagicMock()]
+    statement = GraphStatement(
+        "MATCH (n:X) WHERE n.lastupdated <> $UPDATE_TAG WITH n LIMIT $LIMIT_SIZE DETACH DELETE (n)",
+        {'UPDATE_TAG': 1},
+        iterative=True,
+        iterationsize=100,
+    )
+    set_cleanup_batch_size(5000)
+    try:
+        statement.run(session)
+    finally:
+        set_cleanup_batch_size(None)
+
+    assert session.run.call_count == 2
+
+
+def test_statements_do_not_share_the_callers_parameters():
+    common_job_parameters = {'UPDATE_TAG': 1, 'AWS_ID': '1234'}
+
+    first = GraphStatement('q1', common_job_parameters, iterative=True, iterationsize=100)
+    second = GraphStatement('q2', common_job_parameters, iterative=True, iterationsize=200)
+
+    assert first.parameters['LIMIT_SIZE'] == 100
+    assert second.parameters['LIMIT_SIZE'] == 200
+    assert 'LIMIT_SIZE' not in common_job_parameters
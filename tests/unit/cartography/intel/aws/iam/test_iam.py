@@ -116,3 +116,44 @@ def test_transform_policy_data_correctly_creates_lists_of_statements():
 
     # Assert that we correctly converted the statement to a list
     assert isinstance(pol_statement_map['some-arn']['pol-name'], list)
+
+
+def test_transform_roles():
+    roles = [
+        {
+            "Arn": "arn:aws:iam::000000000000:role/example-role-0",
+            "RoleId": "AROA00000000000000000",
+            "CreateDate": "2019-01-01 00:00:00",
+            "RoleName": "example-role-0",
+            "Path": "/",
+            "AssumeRolePolicyDocument": {
+                "Statement": [
+                    {"Principal": {"AWS": "arn:aws:iam::111111111111:root"}},
+                    # Duplicate trust entries are only loaded once
+                    {"Principal": {"AWS": ["arn:aws:iam::111111111111:root"], "Service": "ec2.amazonaws.com"}},
+                ],
+            },
+        },
+    ]
+    role_data, trust_data, spn_account_data = iam.transform_roles(roles)
+    assert role_data == [{
+        'Arn': "arn:aws:iam::000000000000:role/example-role-0",
+        'RoleId': "AROA00000000000000000",
+        'CreateDate': "2019-01-01 00:00:00",
+        'RoleName': "example-role-0",
+        'Path': "/",
+    }]
+    assert trust_data == [
+        {
+            'SpnArn': "arn:aws:iam::111111111111:root",
+            'SpnType': "AWS",
+            'RoleArn': "arn:aws:iam::000000000000:role/example-role-0",
+        },
+        {
+            'SpnArn': "ec2.amazonaws.com",
+            'SpnType': "Service",
+            'RoleArn': "arn:aws:iam::000000000000:role/example-role-0",
+        },
+    ]
+    # Service principals do not belong to an account
+    assert spn_account_data == [{'SpnArn': "arn:aws:iam::111111111111:root", 'SpnAccountId': "111111111111"}]
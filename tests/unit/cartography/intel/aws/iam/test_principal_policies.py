@@ -1,19 +1,21 @@
 from unittest import mock
-from unittest.mock import call
 from unittest.mock import MagicMock
 
 import cartography.intel.aws.iam
 from cartography.intel.aws.iam import PolicyType
+from cartography.intel.aws.iam import sync_group_memberships
 from cartography.intel.aws.iam import sync_user_managed_policies
+from cartography.intel.aws.permission_relationships import principal_allowed_on_resource
+from cartography.intel.aws.util import policy_cache
 from tests.data.aws.iam.user_policies import GET_USER_LIST_DATA
 from tests.data.aws.iam.user_policies import GET_USER_MANAGED_POLS_SAMPLE
 
 AWS_UPDATE_TAG = 111111
 
 
-@mock.patch.object(cartography.intel.aws.iam, 'load_policy')
+@mock.patch.object(cartography.intel.aws.iam, 'load_policies')
 @mock.patch.object(cartography.intel.aws.iam, 'get_user_managed_policy_data', return_value=GET_USER_MANAGED_POLS_SAMPLE)
-def test_sync_user_managed_policies(mock_get_user_pols: MagicMock, mock_load_pol: MagicMock):
+def test_sync_user_managed_policies(mock_get_user_pols: MagicMock, mock_load_pols: MagicMock):
     # Arrange
     boto3_session = mock.MagicMock()
     neo4j_session = mock.MagicMock()
@@ -21,41 +23,103 @@ def test_sync_user_managed_policies(mock_get_user_pols: MagicMock, mock_load_pol
     # Act
     sync_user_managed_policies(boto3_session, GET_USER_LIST_DATA, neo4j_session, AWS_UPDATE_TAG)
 
-    # Assert that we attempt to create policies with expected values for ids.
-    mock_load_pol.assert_has_calls(
-        [
-            call(
-                neo4j_session,
-                'arn:aws:iam::1234:policy/user1-user-policy',
-                'user1-user-policy',
-                PolicyType.managed.value,
-                'arn:aws:iam::1234:user/user1',
-                AWS_UPDATE_TAG,
-            ),
-            call(
-                neo4j_session,
-                'arn:aws:iam::aws:policy/AmazonS3FullAccess',
-                'AmazonS3FullAccess',
-                PolicyType.managed.value,
-                'arn:aws:iam::1234:user/user1',
-                AWS_UPDATE_TAG,
-            ),
-            call(
-                neo4j_session,
-                'arn:aws:iam::aws:policy/AWSLambda_FullAccess',
-                'AWSLambda_FullAccess',
-                PolicyType.managed.value,
-                'arn:aws:iam::1234:user/user1',
-                AWS_UPDATE_TAG,
-            ),
-            call(
-                neo4j_session,
-                'arn:aws:iam::aws:policy/AdministratorAccess',
-                'AdministratorAccess',
-                PolicyType.managed.value,
-                'arn:aws:iam::1234:user/user3',
-                AWS_UPDATE_TAG,
-            ),
-        ],
-        any_order=False,
-    )
+    # Assert that we create all policies in one batch with expected values for ids.
+    mock_load_pols.assert_called_once()
+    loaded_neo4j_session, policies, update_tag = mock_load_pols.call_args[0]
+    assert loaded_neo4j_session is neo4j_session
+    assert update_tag == AWS_UPDATE_TAG
+    assert [
+        (p['PolicyId'], p['PolicyName'], p['PolicyType'], p['PrincipalArn']) for p in policies
+    ] == [
+        (
+            'arn:aws:iam::1234:policy/user1-user-policy',
+            'user1-user-policy',
+            PolicyType.managed.value,
+            'arn:aws:iam::1234:user/user1',
+        ),
+        (
+            'arn:aws:iam::aws:policy/AmazonS3FullAccess',
+            'AmazonS3FullAccess',
+            PolicyType.managed.value,
+            'arn:aws:iam::1234:user/user1',
+        ),
+        (
+            'arn:aws:iam::aws:policy/AWSLambda_FullAccess',
+            'AWSLambda_FullAccess',
+            PolicyType.managed.value,
+            'arn:aws:iam::1234:user/user1',
+        ),
+        (
+            'arn:aws:iam::aws:policy/AdministratorAccess',
+            'AdministratorAccess',
+            PolicyType.managed.value,
+            'arn:aws:iam::1234:user/user3',
+        ),
+    ]
+    assert policies[0]['Statements'][0]['id'] == 'arn:aws:iam::1234:policy/user1-user-policy/statement/VisualEditor0'
+
+
+@mock.patch.object(cartography.intel.aws.iam, 'load_policies')
+@mock.patch.object(cartography.intel.aws.iam, 'get_user_managed_policy_data', return_value=GET_USER_MANAGED_POLS_SAMPLE)
+def test_sync_user_managed_policies_populates_policy_cache(mock_get_user_pols: MagicMock, mock_load_pols: MagicMock):
+    # Nothing is cached for accounts that have not been started
+    sync_user_managed_policies(mock.MagicMock(), GET_USER_LIST_DATA, mock.MagicMock(), AWS_UPDATE_TAG)
+    assert policy_cache.get_account_policies('1234') is None
+    assert policy_cache.get_principal_policies('arn:aws:iam::1234:user/user1') is None
+
+    policy_cache.start_account('1234')
+    try:
+        sync_user_managed_policies(mock.MagicMock(), GET_USER_LIST_DATA, mock.MagicMock(), AWS_UPDATE_TAG)
+        policies = policy_cache.get_principal_policies('arn:aws:iam::1234:user/user1')
+        assert policies is not None
+        assert policies['arn:aws:iam::1234:policy/user1-user-policy'][1] == {
+            'id': 'arn:aws:iam::1234:policy/user1-user-policy/statement/VisualEditor1',
+            'sid': 'VisualEditor1',
+            'effect': 'Allow',
+            'action': ['iam:PutRolePolicy'],
+            'resource': ['arn:aws:iam::1234:role/lambda-user1-exec'],
+        }
+        account_policies = policy_cache.get_account_policies('1234')
+        assert account_policies is not None
+        assert set(account_policies) == {
+            'arn:aws:iam::1234:user/user1', 'arn:aws:iam::1234:user/user3',
+        }
+        # Principals without policies have an empty cache entry rather than none
+        assert policy_cache.get_principal_policies('arn:aws:iam::1234:user/user2') == {}
+    finally:
+        policy_cache.clear_account('1234')
+    assert policy_cache.get_account_policies('1234') is None
+
+
+@mock.patch.object(cartography.intel.aws.iam, 'run_cleanup_job')
+@mock.patch.object(cartography.intel.aws.iam, 'load_group_memberships')
+@mock.patch.object(cartography.intel.aws.iam, 'get_group_membership_data')
+def test_sync_group_memberships_gives_users_their_groups_cached_policies(
+    mock_get_membership: MagicMock, mock_load_memberships: MagicMock, mock_cleanup: MagicMock,
+):
+    group_arn = 'arn:aws:iam::1234:group/admins'
+    user_arn = 'arn:aws:iam::1234:user/user1'
+    role_arn = 'arn:aws:iam::1234:role/admin'
+    mock_get_membership.return_value = {'Users': [{'Arn': user_arn}]}
+    neo4j_session = mock.MagicMock()
+    neo4j_session.run.return_value = [{'name': 'admins', 'arn': group_arn}]
+    group_policies = {
+        group_arn: {'assume-admin': [{'Effect': 'Allow', 'Action': 'sts:AssumeRole', 'Resource': role_arn}]},
+    }
+
+    policy_cache.start_account('1234')
+    try:
+        cartography.intel.aws.iam.transform_policy_data(group_policies, PolicyType.inline.value)
+        cartography.intel.aws.iam.cache_policy_data(group_policies, PolicyType.inline.value)
+        # The user has no policies of its own
+        assert policy_cache.get_principal_policies(user_arn) == {}
+
+        sync_group_memberships(neo4j_session, mock.MagicMock(), '1234', AWS_UPDATE_TAG, {})
+
+        # Like the (user)-[:POLICY]->(policy) relationships in the graph, the user now has the group's policy
+        user_policies = policy_cache.get_principal_policies(user_arn)
+        assert user_policies is not None
+        assert set(user_policies) == {f'{group_arn}/inline_policy/assume-admin'}
+        assert principal_allowed_on_resource(user_policies, role_arn, ['sts:AssumeRole'])
+    finally:
+        policy_cache.clear_account('1234')
@@ -0,0 +1,49 @@
+from unittest import mock
+
+from cartography.intel.aws.ec2 import security_groups
+from tests.data.aws.ec2.security_groups import DESCRIBE_SGS
+
+
+def test_transform_ec2_security_group_data():
+    sg_data = security_groups.transform_ec2_security_group_data(DESCRIBE_SGS)
+
+    assert {group['GroupId'] for group in sg_data.groups} == {
+        'sg-0fd4fff275d63600f',
+        'sg-028e2522c72719996',
+        'sg-06c795c66be8937be',
+        'sg-053dba35430032a0d',
+    }
+    assert sg_data.groups[0] == {
+        'GroupId': 'sg-028e2522c72719996',
+        'GroupName': 'sq-vpc2-id1',
+        'Description': 'security group vpc2-id1',
+        'VpcId': 'vpc-05326141848d1c681',
+    }
+
+    assert len(sg_data.inbound_rules) == 6
+    assert len(sg_data.egress_rules) == 8
+    assert sg_data.inbound_rules[0] == {
+        'RuleId': 'sg-028e2522c72719996/IpPermissions/8080tcp',
+        'GroupId': 'sg-028e2522c72719996',
+        'FromPort': 80,
+        'ToPort': 80,
+        'Protocol': 'tcp',
+    }
+    assert all('/IpPermissionsEgress/' in rule['RuleId'] for rule in sg_data.egress_rules)
+
+    # One entry per rule and CIDR range, pointing back at the rule
+    rule_ids = {rule['RuleId'] for rule in sg_data.inbound_rules + sg_data.egress_rules}
+    assert len(sg_data.ip_ranges) == 12
+    assert {ip_range['RuleId'] for ip_range in sg_data.ip_ranges} <= rule_ids
+    assert sg_data.ip_ranges[0] == {'RangeId': '203.0.113.0/24', 'RuleId': 'sg-028e2522c72719996/IpPermissions/8080tcp'}
+
+
+@mock.patch.object(security_groups, 'load_graph_data')
+def test_load_ec2_security_groupinfo_batches_queries(mock_load_graph_data):
+    neo4j_session = mock.MagicMock()
+
+    security_groups.load_ec2_security_groupinfo(neo4j_session, DESCRIBE_SGS, 'eu-north-1', '000000000000', 1)
+
+    # One load each for the groups, inbound rules, egress rules and IP ranges, however many there are of each
+    assert [len(call.args[2]) for call in mock_load_graph_data.call_args_list] == [4, 6, 8, 12]
+    neo4j_session.run.assert_not_called()
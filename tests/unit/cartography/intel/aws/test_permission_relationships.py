@@ -1,3 +1,6 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
 from cartography.intel.aws import permission_relationships
 
 
@@ -464,3 +467,99 @@ def test_permissions_list():
         assert False
     except ValueError:
         assert True
+
+
+def test_calculate_permission_relationships_matches_pairwise_evaluation():
+    principals = {
+        "admin": {
+            "AdminAccess": permission_relationships.compile_statement([{
+                "action": ["*"],
+                "resource": ["*"],
+                "effect": "Allow",
+            }]),
+        },
+        "reader": {
+            "Read": permission_relationships.compile_statement([{
+                "action": ["s3:Get*"],
+                "resource": ["arn:aws:s3:::test*"],
+                "notresource": ["arn:aws:s3:::testsecret"],
+                "effect": "Allow",
+            }]),
+        },
+        "denied": {
+            "Read": permission_relationships.compile_statement([{
+                "action": ["s3:Get*"],
+                "resource": ["arn:aws:s3:::test*"],
+                "effect": "Allow",
+            }]),
+            "Deny": permission_relationships.compile_statement([{
+                "action": ["s3:GetObject"],
+                "resource": ["arn:aws:s3:::testbucket"],
+                "effect": "Deny",
+            }]),
+        },
+        "other_service": {
+            "Dynamo": permission_relationships.compile_statement([{
+                "action": ["dynamodb:*"],
+                "resource": ["arn:aws:s3:::*"],
+                "effect": "Allow",
+            }]),
+        },
+    }
+    resource_arns = [
+        "arn:aws:s3:::testbucket", "arn:aws:s3:::testsecret", "arn:aws:s3:::otherbucket",
+        "arn:aws:dynamodb:us-east-1:1234:table/test",
+    ]
+    permissions = ["S3:GetObject"]
+
+    expected = [
+        {"principal_arn": principal_arn, "resource_arn": resource_arn}
+        for resource_arn in resource_arns
+        for principal_arn, policies in principals.items()
+        if permission_relationships.principal_allowed_on_resource(policies, resource_arn, permissions)
+    ]
+    assert expected == permission_relationships.calculate_permission_relationships(
+        principals, resource_arns, permissions,
+    )
+    assert {"principal_arn": "reader", "resource_arn": "arn:aws:s3:::testbucket"} in expected
+    assert {"principal_arn": "denied", "resource_arn": "arn:aws:s3:::testsecret"} in expected
+    assert {"principal_arn": "denied", "resource_arn": "arn:aws:s3:::testbucket"} not in expected
+
+
+def test_get_literal_prefix():
+    compile_regex = permission_relationships.compile_regex
+    assert permission_relationships._get_literal_prefix(compile_regex("arn:aws:S3:::test*")) == "arn:aws:s3:::test"
+    assert permission_relationships._get_literal_prefix(compile_regex("s3:?et*")) == "s3:"
+    assert permission_relationships._get_literal_prefix(compile_regex("*")) == ""
+    assert permission_relationships._get_literal_prefix(compile_regex("a|b")) == ""
+
+
+def test_calculate_permission_relationships_process_pool():
+    principals = {
+        f"principal{i}": {
+            "Read": permission_relationships.compile_statement([{
+                "action": ["s3:Get*"],
+                "resource": [f"arn:aws:s3:::bucket{i % 3}*"],
+                "effect": "Allow",
+            }]),
+            "Deny": permission_relationships.compile_statement([{
+                "action": ["s3:GetObject"],
+                "resource": ["arn:aws:s3:::bucket1"],
+                "effect": "Deny",
+            }]),
+        }
+        for i in range(10)
+    }
+    resource_arns = ["arn:aws:s3:::bucket0", "arn:aws:s3:::bucket1", "arn:aws:s3:::bucket2.example"]
+    picklable = permission_relationships.to_picklable_policies(principals["principal0"])
+    assert pickle.loads(pickle.dumps(picklable)) == picklable
+    assert permission_relationships.from_picklable_policies(picklable)["Read"][0]["action"][0].fullmatch("S3:getobject")
+
+    expected = permission_relationships.calculate_permission_relationships(
+        principals, resource_arns, ["S3:GetObject"],
+    )
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        assert expected == permission_relationships.calculate_permission_relationships(
+            principals, resource_arns, ["S3:GetObject"], executor=executor, num_shards=3,
+        )
+    assert len(expected) == 7
@@ -1,4 +1,8 @@
 import copy
+from unittest import mock
+
+import botocore
+import pytest
 
 import cartography.intel.aws.resourcegroupstaggingapi as rgta
 import tests.data.aws.resourcegroupstaggingapi as test_data
@@ -44,3 +48,146 @@ def test_transform_tags():
     assert 'resource_id' not in get_resources_response[0]
     rgta.transform_tags(get_resources_response, 'ec2:instance')
     assert 'resource_id' in get_resources_response[0]
+
+
+def test_get_resource_type_from_arn():
+    resource_types = rgta.TAG_RESOURCE_TYPE_MAPPINGS.keys()
+    ec2_arn = 'arn:aws:ec2:us-east-1:1234:instance/i-abcd'
+    assert 'ec2:instance' == rgta.get_resource_type_from_arn(ec2_arn, resource_types)
+    assert 's3' == rgta.get_resource_type_from_arn('arn:aws:s3:::bucket_name', resource_types)
+    assert 'rds:db' == rgta.get_resource_type_from_arn('arn:aws:rds:us-east-1:1234:db:rds-db-1', resource_types)
+    assert 'sqs' == rgta.get_resource_type_from_arn('arn:aws:sqs:us-east-1:1234:my-queue', resource_types)
+    assert 'elasticloadbalancing:loadbalancer' == rgta.get_resource_type_from_arn(
+        'arn:aws:elasticloadbalancing:us-east-1:1234:loadbalancer/foo', resource_types,
+    )
+    assert 'elasticloadbalancing:loadbalancer/app' == rgta.get_resource_type_from_arn(
+        'arn:aws:elasticloadbalancing:us-east-1:1234:loadbalancer/app/foo/abdc123', resource_types,
+    )
+    assert 'autoscaling:autoScalingGroup' == rgta.get_resource_type_from_arn(
+        'arn:aws:autoscaling:us-east-1:1234:autoScalingGroup:uuid:autoScalingGroupName/asg', resource_types,
+    )
+    assert rgta.get_resource_type_from_arn('arn:aws:sns:us-east-1:1234:my-topic', resource_types) is None
+    assert rgta.get_resource_type_from_arn(ec2_arn, ['ec2:vpc']) is None
+
+
+# A real ARN of every resource type in TAG_RESOURCE_TYPE_MAPPINGS, in the form that get_resources returns
+ARNS_BY_RESOURCE_TYPE = {
+    'autoscaling:autoScalingGroup': (
+        'arn:aws:autoscaling:us-east-1:1234:autoScalingGroup:8d3d1e9a-1f6b-4e2b-9f8e-2c6e4c1d3b5a:'
+        'autoScalingGroupName/my-asg'
+    ),
+    'dynamodb:table': 'arn:aws:dynamodb:us-east-1:1234:table/my-table',
+    'ec2:instance': 'arn:aws:ec2:us-east-1:1234:instance/i-0123456789abcdef0',
+    'ec2:internet-gateway': 'arn:aws:ec2:us-east-1:1234:internet-gateway/igw-0123456789abcdef0',
+    'ec2:key-pair': 'arn:aws:ec2:us-east-1:1234:key-pair/key-0123456789abcdef0',
+    'ec2:network-interface': 'arn:aws:ec2:us-east-1:1234:network-interface/eni-0123456789abcdef0',
+    'ecr:repository': 'arn:aws:ecr:us-east-1:1234:repository/team/my-repo',
+    'ec2:security-group': 'arn:aws:ec2:us-east-1:1234:security-group/sg-0123456789abcdef0',
+    'ec2:subnet': 'arn:aws:ec2:us-east-1:1234:subnet/subnet-0123456789abcdef0',
+    'ec2:transit-gateway': 'arn:aws:ec2:us-east-1:1234:transit-gateway/tgw-0123456789abcdef0',
+    'ec2:transit-gateway-attachment': (
+        'arn:aws:ec2:us-east-1:1234:transit-gateway-attachment/tgw-attach-0123456789abcdef0'
+    ),
+    'ec2:vpc': 'arn:aws:ec2:us-east-1:1234:vpc/vpc-0123456789abcdef0',
+    'ec2:volume': 'arn:aws:ec2:us-east-1:1234:volume/vol-0123456789abcdef0',
+    'ec2:elastic-ip-address': 'arn:aws:ec2:us-east-1:1234:elastic-ip/eipalloc-0123456789abcdef0',
+    'ecs:cluster': 'arn:aws:ecs:us-east-1:1234:cluster/my-cluster',
+    'ecs:container': 'arn:aws:ecs:us-east-1:1234:container/my-cluster/0123456789abcdef/0a1b2c3d-4e5f',
+    'ecs:container-instance': 'arn:aws:ecs:us-east-1:1234:container-instance/my-cluster/0123456789abcdef',
+    'ecs:task': 'arn:aws:ecs:us-east-1:1234:task/my-cluster/0123456789abcdef',
+    'ecs:task-definition': 'arn:aws:ecs:us-east-1:1234:task-definition/my-family:3',
+    'eks:cluster': 'arn:aws:eks:us-east-1:1234:cluster/my-cluster',
+    'elasticache:cluster': 'arn:aws:elasticache:us-east-1:1234:cluster:my-cluster',
+    'elasticloadbalancing:loadbalancer': 'arn:aws:elasticloadbalancing:us-east-1:1234:loadbalancer/my-elb',
+    'elasticloadbalancing:loadbalancer/app': (
+        'arn:aws:elasticloadbalancing:us-east-1:1234:loadbalancer/app/my-alb/50dc6c495c0c9188'
+    ),
+    'elasticloadbalancing:loadbalancer/net': (
+        'arn:aws:elasticloadbalancing:us-east-1:1234:loadbalancer/net/my-nlb/50dc6c495c0c9188'
+    ),
+    'elasticmapreduce:cluster': 'arn:aws:elasticmapreduce:us-east-1:1234:cluster/j-0123456789ABC',
+    'es:domain': 'arn:aws:es:us-east-1:1234:domain/my-domain',
+    'kms:key': 'arn:aws:kms:us-east-1:1234:key/1234abcd-12ab-34cd-56ef-1234567890ab',
+    'iam:group': 'arn:aws:iam::1234:group/division/my-group',
+    'iam:role': 'arn:aws:iam::1234:role/service-role/my-role',
+    'iam:user': 'arn:aws:iam::1234:user/my-user',
+    'lambda:function': 'arn:aws:lambda:us-east-1:1234:function:my-function',
+    'redshift:cluster': 'arn:aws:redshift:us-east-1:1234:cluster:my-cluster',
+    'rds:db': 'arn:aws:rds:us-east-1:1234:db:my-db',
+    'rds:subgrp': 'arn:aws:rds:us-east-1:1234:subgrp:my-subnet-group',
+    'rds:cluster': 'arn:aws:rds:us-east-1:1234:cluster:my-cluster',
+    'rds:snapshot': 'arn:aws:rds:us-east-1:1234:snapshot:rds:my-db-2023-01-01-00-00',
+    's3': 'arn:aws:s3:::my-bucket',
+    'secretsmanager:secret': 'arn:aws:secretsmanager:us-east-1:1234:secret:my-secret-AbCdEf',
+    'sqs': 'arn:aws:sqs:us-east-1:1234:my-queue',
+}
+
+
+def test_arns_by_resource_type_cover_every_mapping():
+    assert ARNS_BY_RESOURCE_TYPE.keys() == rgta.TAG_RESOURCE_TYPE_MAPPINGS.keys()
+
+
+@pytest.mark.parametrize('resource_type,arn', ARNS_BY_RESOURCE_TYPE.items())
+def test_get_resource_type_from_real_arn(resource_type, arn):
+    assert resource_type == rgta.get_resource_type_from_arn(arn, rgta.TAG_RESOURCE_TYPE_MAPPINGS.keys())
+
+
+def test_group_tags_by_resource_type():
+    get_resources_response = copy.deepcopy(test_data.GET_RESOURCES_RESPONSE)
+    tags_by_type = rgta.group_tags_by_resource_type(get_resources_response, ['ec2:instance', 's3', 'ec2:vpc'])
+    assert list(tags_by_type.keys()) == ['ec2:instance', 's3', 'ec2:vpc']
+    assert tags_by_type['ec2:instance'] == [get_resources_response[0]]
+    assert tags_by_type['s3'] == [get_resources_response[1]]
+    assert tags_by_type['ec2:vpc'] == []
+
+
+@mock.patch.object(rgta, 'cleanup')
+@mock.patch.object(rgta, 'load_tags')
+@mock.patch.object(rgta, 'get_iam_role_tags', return_value=[])
+def test_sync_calls_get_resources_once_per_region(mock_get_iam_role_tags, mock_load_tags, mock_cleanup):
+    boto3_session = mock.MagicMock()
+    paginator = boto3_session.client.return_value.get_paginator.return_value
+    paginator.paginate.return_value = [{'ResourceTagMappingList': copy.deepcopy(test_data.GET_RESOURCES_RESPONSE)}]
+    regions = ['us-east-1', 'us-west-2']
+
+    rgta.sync(mock.MagicMock(), boto3_session, regions, '1234', 1, {})
+
+    assert paginator.paginate.call_count == len(regions)
+    filters = paginator.paginate.call_args.kwargs['ResourceTypeFilters']
+    assert 'iam:role' not in filters
+    assert len(filters) == len(rgta.TAG_RESOURCE_TYPE_MAPPINGS) - 1
+    mock_get_iam_role_tags.assert_called_once()
+
+    # Every mapped type is loaded for every region, each with only the tags of its own resources
+    assert mock_load_tags.call_count == len(regions) * len(rgta.TAG_RESOURCE_TYPE_MAPPINGS)
+    loaded = {
+        (call.kwargs['region'], call.kwargs['resource_type']): call.kwargs['tag_data']
+        for call in mock_load_tags.call_args_list
+    }
+    assert [t['resource_id'] for t in loaded[('us-east-1', 'ec2:instance')]] == ['i-01']
+    assert [t['resource_id'] for t in loaded[('us-west-2', 's3')]] == ['bucket-1']
+    assert loaded[('us-east-1', 'ec2:vpc')] == []
+
+
+def _invalid_parameter_error():
+    return botocore.exceptions.ClientError(
+        {'Error': {'Code': 'InvalidParameterException', 'Message': 'Unsupported resource type'}},
+        'GetResources',
+    )
+
+
+def test_get_tags_skips_only_rejected_resource_types():
+    boto3_session = mock.MagicMock()
+    paginator = boto3_session.client.return_value.get_paginator.return_value
+
+    def _paginate(ResourceTypeFilters):
+        if 'ec2:transit-gateway' in ResourceTypeFilters:
+            raise _invalid_parameter_error()
+        return [{'ResourceTagMappingList': [{'ResourceARN': ARNS_BY_RESOURCE_TYPE[ResourceTypeFilters[0]]}]}]
+    paginator.paginate.side_effect = _paginate
+
+    resources = rgta.get_tags(boto3_session, ['ec2:instance', 'ec2:transit-gateway', 's3'], 'us-east-1')
+
+    assert [resource['ResourceARN'] for resource in resources] == [
+        ARNS_BY_RESOURCE_TYPE['ec2:instance'], ARNS_BY_RESOURCE_TYPE['s3'],
+    ]
@@ -0,0 +1,44 @@
+from unittest import mock
+
+import pytest
+
+from cartography.intel.aws import s3
+
+
+def test_get_s3_bucket_details_uses_one_client_per_region():
+    boto3_session = mock.MagicMock()
+    buckets = [
+        {'Name': 'bucket-1', 'Region': 'eu-west-1'},
+        {'Name': 'bucket-2', 'Region': 'eu-west-1'},
+        {'Name': 'bucket-3', 'Region': None},
+    ]
+
+    with mock.patch.object(s3, 'get_s3_concurrency', return_value=4):
+        details = list(s3.get_s3_bucket_details(boto3_session, {'Buckets': buckets}))
+
+    assert sorted(detail[0] for detail in details) == ['bucket-1', 'bucket-2', 'bucket-3']
+    assert sorted(
+        (call.kwargs['region_name'] or '') for call in boto3_session.client.call_args_list
+    ) == ['', 'eu-west-1']
+
+
+def test_get_s3_bucket_list_sets_bucket_regions():
+    boto3_session = mock.MagicMock()
+    client = boto3_session.client.return_value
+    client.list_buckets.return_value = {'Buckets': [{'Name': 'bucket-1'}, {'Name': 'bucket-2'}]}
+    client.get_bucket_location.side_effect = lambda Bucket: {
+        'LocationConstraint': 'eu-west-1' if Bucket == 'bucket-1' else None,
+    }
+
+    with mock.patch.object(s3, 'get_s3_concurrency', return_value=4):
+        bucket_data = s3.get_s3_bucket_list(boto3_session)
+
+    assert bucket_data['Buckets'] == [
+        {'Name': 'bucket-1', 'Region': 'eu-west-1'},
+        {'Name': 'bucket-2', 'Region': None},
+    ]
+
+
+def test_set_s3_concurrency_rejects_values_below_one():
+    with pytest.raises(ValueError):
+        s3.set_s3_concurrency(0)
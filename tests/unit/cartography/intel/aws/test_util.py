@@ -1,6 +1,16 @@
+import threading
+from unittest import mock
+
 import pytest
 
+from cartography.checkpoint import CheckpointStore
+from cartography.checkpoint import set_checkpoint_store
 from cartography.intel.aws.util.common import parse_and_validate_aws_requested_syncs
+from cartography.intel.aws.resources import RESOURCE_DEPENDENCIES
+from cartography.intel.aws.resources import RESOURCE_FUNCTIONS
+from cartography.intel.aws.util.regions import fetch_and_load_regions
+from cartography.intel.aws.util.scheduler import get_sync_order
+from cartography.intel.aws.util.scheduler import run_resource_syncs
 
 
 def test_parse_and_validate_requested_syncs():
@@ -17,3 +27,128 @@ def test_parse_and_validate_requested_syncs():
     absolute_garbage = '#@$@#RDFFHKjsdfkjsd,KDFJHW#@,'
     with pytest.raises(ValueError):
         parse_and_validate_aws_requested_syncs(absolute_garbage)
+
+
+def test_fetch_and_load_regions_loads_on_calling_thread():
+    regions = ['us-east-1', 'us-west-2', 'eu-west-1', 'ap-south-1']
+    boto3_session = mock.MagicMock()
+    fetch_threads = set()
+    loaded = {}
+
+    def _fetch(session, region):
+        fetch_threads.add(threading.get_ident())
+        session.client('ec2', region_name=region)
+        return f'data-{region}'
+
+    def _load(region, data):
+        assert threading.get_ident() == threading.main_thread().ident
+        loaded[region] = data
+
+    fetch_and_load_regions(boto3_session, regions, _fetch, _load, max_workers=4)
+
+    assert loaded == {region: f'data-{region}' for region in regions}
+    assert threading.main_thread().ident not in fetch_threads
+    assert boto3_session.client.call_count == len(regions)
+
+
+def test_fetch_and_load_regions_raises_fetch_errors():
+    def _fetch(session, region):
+        if region == 'us-west-2':
+            raise KeyError(region)
+        return region
+
+    with pytest.raises(KeyError):
+        fetch_and_load_regions(mock.MagicMock(), ['us-east-1', 'us-west-2'], _fetch, lambda r, d: None, max_workers=2)
+
+
+def test_fetch_and_load_regions_serial():
+    boto3_session = mock.MagicMock()
+    fetch = mock.MagicMock(side_effect=lambda session, region: region)
+    load = mock.MagicMock()
+
+    fetch_and_load_regions(boto3_session, ['us-east-1', 'us-west-2'], fetch, load, max_workers=1)
+
+    # The unwrapped session is passed through and regions are processed in order
+    assert fetch.call_args_list == [mock.call(boto3_session, 'us-east-1'), mock.call(boto3_session, 'us-west-2')]
+    assert load.call_args_list == [mock.call('us-east-1', 'us-east-1'), mock.call('us-west-2', 'us-west-2')]
+
+
+def test_get_sync_order_default_order_is_unchanged():
+    # The default sync list already respects the declared dependencies, except that perm rels and tags go last.
+    order = get_sync_order(list(RESOURCE_FUNCTIONS.keys()), RESOURCE_DEPENDENCIES)
+    assert order[-2:] == ['permission_relationships', 'resourcegroupstaggingapi']
+    assert order[:-2] == [
+        s for s in RESOURCE_FUNCTIONS if s not in ('permission_relationships', 'resourcegroupstaggingapi')
+    ]
+    for sync_name, deps in RESOURCE_DEPENDENCIES.items():
+        assert sync_name in RESOURCE_FUNCTIONS
+        for dep in deps:
+            assert order.index(dep) < order.index(sync_name)
+
+
+def test_get_sync_order_reorders_and_skips_unrequested():
+    deps = {'b': ['a'], 'c': ['b']}
+    assert get_sync_order(['c', 'x', 'a'], deps) == ['x', 'a', 'c']
+
+    with pytest.raises(ValueError):
+        get_sync_order(['a', 'b'], {'a': ['b'], 'b': ['a']})
+
+
+@mock.patch('cartography.intel.aws.util.scheduler.get_neo4j_driver', return_value=mock.MagicMock())
+@mock.patch('cartography.intel.aws.util.scheduler.new_neo4j_session')
+def test_run_resource_syncs_concurrent(mock_new_session, mock_get_driver):
+    finished = []
+    lock = threading.Lock()
+    a_started = threading.Event()
+    b_started = threading.Event()
+
+    def make_sync(name, started=None, wait_for=None):
+        def sync(**kwargs):
+            if started:
+                started.set()
+            if wait_for:
+                # Independent syncs run at the same time
+                assert wait_for.wait(5)
+            with lock:
+                finished.append(name)
+        return sync
+
+    sync_functions = {
+        'a': make_sync('a', a_started, b_started),
+        'b': make_sync('b', b_started, a_started),
+        'c': make_sync('c'),
+    }
+    run_resource_syncs(
+        ['a', 'b', 'c'], sync_functions, {'c': ['a', 'b']}, {'boto3_session': mock.MagicMock()}, max_workers=4,
+    )
+    assert sorted(finished[:2]) == ['a', 'b']
+    assert finished[2] == 'c'
+    assert mock_new_session.call_count == 3
+
+
+@mock.patch('cartography.intel.aws.util.scheduler.get_neo4j_driver', return_value=mock.MagicMock())
+@mock.patch('cartography.intel.aws.util.scheduler.new_neo4j_session')
+def test_run_resource_syncs_stops_after_error(mock_new_session, mock_get_driver):
+    sync_functions = {
+        'a': mock.MagicMock(side_effect=RuntimeError('boom')),
+        'b': mock.MagicMock(),
+    }
+    with pytest.raises(RuntimeError):
+        run_resource_syncs(['a', 'b'], sync_functions, {'b': ['a']}, {'boto3_session': mock.MagicMock()}, max_workers=2)
+    sync_functions['b'].assert_not_called()
+
+
+def test_run_resource_syncs_skips_completed_syncs(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'checkpoints.sqlite'), update_tag=1)
+    store.mark_complete('aws', '123456789012', 'a')
+    set_checkpoint_store(store)
+    try:
+        sync_functions = {'a': mock.MagicMock(), 'b': mock.MagicMock()}
+        run_resource_syncs(
+            ['a', 'b'], sync_functions, {'b': ['a']}, {'current_aws_account_id': '123456789012'}, max_workers=1,
+        )
+        sync_functions['a'].assert_not_called()
+        sync_functions['b'].assert_called_once()
+        assert store.is_complete('aws', '123456789012', 'b')
+    finally:
+        set_checkpoint_store(None)
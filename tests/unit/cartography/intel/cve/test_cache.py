@@ -0,0 +1,105 @@
+import copy
+from unittest import mock
+
+from cartography.config import Config
+from cartography.intel.cve import start_cve_ingestion
+from cartography.intel.cve.cache import CVECache
+from cartography.intel.cve.feed import transform_cves
+from tests.data.cve.feed import GET_CVE_API_DATA
+
+FEED_METADATA = {
+    "FEED_ID": "NIST_NVD",
+    "format": "NVD_CVE",
+    "version": "2.0",
+    "timestamp": "2024-01-10T19:30:07.520",
+}
+
+
+def _transformed_cves():
+    # transform_cves() modifies the API data in place
+    return transform_cves(copy.deepcopy(GET_CVE_API_DATA))
+
+
+def test_cache_round_trip(tmp_path):
+    cves = _transformed_cves()
+    cache = CVECache(str(tmp_path))
+    with cache.write_year(2024, modified_since="2024-01-10T00:00:00") as writer:
+        writer.write(cves[:2])
+        writer.write(cves[2:])
+        writer.feed_metadata = FEED_METADATA
+
+    # A new cache object reads the index written by the previous one
+    cache = CVECache(str(tmp_path))
+    assert cache.has_year(2024)
+    assert not cache.has_year(2023)
+    assert cache.get_feed_metadata(2024) == FEED_METADATA
+    assert cache.get_modified_since(2024) == "2024-01-10T00:00:00"
+    chunks = list(cache.read_year(2024, chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    cached = [cve for chunk in chunks for cve in chunk]
+    assert [cve["id"] for cve in cached] == [cve["id"] for cve in cves]
+    # Only the properties that are loaded are cached
+    assert cached[0]["baseScore"] == cves[0]["baseScore"]
+    assert "metrics" not in cached[0]
+
+
+def test_cache_discards_interrupted_year(tmp_path):
+    cache = CVECache(str(tmp_path))
+    try:
+        with cache.write_year(2024, modified_since="2024-01-10T00:00:00") as writer:
+            writer.write(_transformed_cves())
+            raise RuntimeError("NVD went away")
+    except RuntimeError:
+        pass
+
+    assert not cache.has_year(2024)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cache_appends_modified_cves_to_cached_years(tmp_path):
+    cves = _transformed_cves()
+    cache = CVECache(str(tmp_path))
+    with cache.write_year(2024, modified_since="2024-01-10T00:00:00") as writer:
+        writer.write(cves)
+        writer.feed_metadata = FEED_METADATA
+
+    modified = dict(cves[0], lastModified="2024-02-01T00:00:00.000")
+    not_cached = dict(cves[1], id="CVE-2023-0001", published="2023-05-01T00:00:00.000")
+    cache.append_modified([modified, not_cached])
+    cache.set_modified_since("2024-02-02T00:00:00")
+
+    cached = [cve for chunk in cache.read_year(2024, chunk_size=100) for cve in chunk]
+    assert len(cached) == len(cves) + 1
+    assert cached[-1]["id"] == cves[0]["id"]
+    assert cached[-1]["lastModified"] == "2024-02-01T00:00:00.000"
+    assert not cache.has_year(2023)
+    assert CVECache(str(tmp_path)).get_modified_since(2024) == "2024-02-02T00:00:00"
+
+
+@mock.patch('cartography.intel.cve.merge_module_sync_metadata')
+@mock.patch('cartography.intel.cve.feed')
+def test_start_cve_ingestion_loads_cached_years_from_disk(mock_feed, mock_merge_metadata, tmp_path):
+    cves = _transformed_cves()
+    cache = CVECache(str(tmp_path))
+    with cache.write_year(2024, modified_since="2024-01-10T00:00:00") as writer:
+        writer.write(cves)
+        writer.feed_metadata = FEED_METADATA
+    mock_feed.CVE_CHUNK_SIZE = 2000
+    mock_feed.get_cve_sync_metadata.return_value = [year for year in range(2002, 2100) if year != 2024]
+    mock_feed.get_last_modified_cve_date.return_value = "2024-03-01T00:00:00"
+    mock_feed.iter_modified_cve_pages.return_value = iter([])
+    config = Config(
+        neo4j_uri='bolt://localhost:7687',
+        update_tag=1,
+        cve_enabled=True,
+        nist_cve_url='https://nvd',
+        cve_cache_dir=str(tmp_path),
+    )
+
+    start_cve_ingestion(mock.MagicMock(), config)
+
+    mock_feed.iter_published_cve_pages_per_year.assert_not_called()
+    loaded_ids = [cve['id'] for c in mock_feed.load_cves.call_args_list for cve in c.args[1]]
+    assert loaded_ids == [cve['id'] for cve in cves]
+    # Modifications since the cache was written are fetched, not just those after the newest CVE in the graph
+    assert mock_feed.iter_modified_cve_pages.call_args.args[1] == "2024-01-10T00:00:00"
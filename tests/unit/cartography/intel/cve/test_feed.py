@@ -6,11 +6,12 @@ from unittest.mock import patch
 
 import requests
 
-from cartography.intel.cve.feed import _call_cves_api
-from cartography.intel.cve.feed import _map_cve_dict
-from cartography.intel.cve.feed import get_cves_in_batches
-from cartography.intel.cve.feed import get_modified_cves
-from cartography.intel.cve.feed import get_published_cves_per_year
+from cartography.intel.cve.feed import _iter_cve_pages
+from cartography.intel.cve.feed import iter_cve_pages_in_batches
+from cartography.intel.cve.feed import iter_modified_cve_pages
+from cartography.intel.cve.feed import iter_published_cve_pages_per_year
+from cartography.intel.cve.feed import RequestPacer
+from cartography.intel.cve.feed import transform_cve_pages
 from tests.data.cve.feed import GET_CVE_API_DATA
 from tests.data.cve.feed import GET_CVE_API_DATA_BATCH_2
 
@@ -18,12 +19,12 @@ NIST_CVE_URL = "https://services.nvd.nist.gov/rest/json/cves/2.0/"
 API_KEY = "nvd_api_key"
 
 
-@patch("cartography.intel.cve.feed.DEFAULT_SLEEP_TIME", 0)
 @patch("cartography.intel.cve.feed.requests.get")
-def test_call_cves_api(mock_get: Mock):
+def test_iter_cve_pages(mock_get: Mock):
     # Arrange
     mock_response_1 = Mock()
     mock_response_1.status_code = 200
+    mock_response_1.headers = {}
     mock_response_1.json.return_value = {
         "resultsPerPage": 2000,
         "startIndex": 0,
@@ -51,6 +52,7 @@ def test_call_cves_api(mock_get: Mock):
     }
     mock_response_2 = Mock()
     mock_response_2.status_code = 200
+    mock_response_2.headers = {}
     mock_response_2.json.return_value = {
         "resultsPerPage": 2000,
         "startIndex": 2000,
@@ -78,6 +80,7 @@ def test_call_cves_api(mock_get: Mock):
     }
     mock_response_3 = Mock()
     mock_response_3.status_code = 200
+    mock_response_3.headers = {}
     mock_response_3.json.return_value = {
         "resultsPerPage": 0,
         "startIndex": 4000,
@@ -90,61 +93,23 @@ def test_call_cves_api(mock_get: Mock):
 
     mock_get.side_effect = [mock_response_1, mock_response_2, mock_response_3]
     params = {"start": "2024-01-10T00:00:00Z", "end": "2024-01-10T23:59:59Z"}
-    expected_result = {
-        "resultsPerPage": 0,
-        "startIndex": 4000,
-        "totalResults": 4000,
-        "format": "NVD_CVE",
-        "version": "2.0",
-        "timestamp": "2024-01-10T19:30:07.520",
-        "vulnerabilities": [
-            {
-                "cve": {
-                    "id": "CVE-2024-001",
-                },
-            },
-            {
-                "cve": {
-                    "id": "CVE-2024-002",
-                },
-            },
-            {
-                "cve": {
-                    "id": "CVE-2024-003",
-                },
-            },
-            {
-                "cve": {
-                    "id": "CVE-2024-004",
-                },
-            },
-            {
-                "cve": {
-                    "id": "CVE-2024-005",
-                },
-            },
-            {
-                "cve": {
-                    "id": "CVE-2024-006",
-                },
-            },
-        ],
-    }
+    expected_ids = [f"CVE-2024-00{i}" for i in range(1, 7)]
 
     # Act
-    result = _call_cves_api(NIST_CVE_URL, API_KEY, params)
+    pages = list(_iter_cve_pages(NIST_CVE_URL, API_KEY, params))
 
     # Assert
     assert mock_get.call_count == 3
-    assert result == expected_result
+    assert len(pages) == 3
+    assert [v["cve"]["id"] for page in pages for v in page["vulnerabilities"]] == expected_ids
 
 
-@patch("cartography.intel.cve.feed.DEFAULT_SLEEP_TIME", 0)
 @patch("cartography.intel.cve.feed.requests.get")
-def test_call_cves_api_with_error(mock_get: Mock):
+def test_iter_cve_pages_with_error(mock_get: Mock):
     # Arrange
     mock_response = Mock()
     mock_response.status_code = 404
+    mock_response.headers = {}
     mock_response.message = "Data error"
     mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(
         response=mock_response,
@@ -154,21 +119,21 @@ def test_call_cves_api_with_error(mock_get: Mock):
 
     # Act
     try:
-        _call_cves_api(NIST_CVE_URL, API_KEY, params)
+        list(_iter_cve_pages(NIST_CVE_URL, API_KEY, params))
     except requests.exceptions.HTTPError as err:
         assert err.response == mock_response
     assert mock_get.call_count == 3
 
 
-@patch("cartography.intel.cve.feed._call_cves_api")
-def test_get_cves_in_batches(mock_call_cves_api: Mock):
+@patch("cartography.intel.cve.feed._iter_cve_pages")
+def test_iter_cve_pages_in_batches(mock_iter_cve_pages: Mock):
     """
-    Ensure that we get the correct number of CVEs in batches of 120 days
+    Ensure that we get the pages of CVEs in batches of 120 days, as they are fetched
     """
     # Arrange
-    mock_call_cves_api.side_effect = [
-        GET_CVE_API_DATA,
-        GET_CVE_API_DATA_BATCH_2,
+    mock_iter_cve_pages.side_effect = [
+        iter([GET_CVE_API_DATA]),
+        iter([GET_CVE_API_DATA_BATCH_2]),
     ]
     start_date = datetime.strptime("2024-01-01T00:00:00Z", "%Y-%m-%dT%H:%M:%SZ")
     end_date = datetime.strptime("2024-05-01T00:00:00Z", "%Y-%m-%dT%H:%M:%SZ")
@@ -176,21 +141,22 @@ def test_get_cves_in_batches(mock_call_cves_api: Mock):
         "start": "startDate",
         "end": "endDate",
     }
-    excepted_cves = GET_CVE_API_DATA.copy()
-    _map_cve_dict(excepted_cves, GET_CVE_API_DATA_BATCH_2)
     # Act
-    cves = get_cves_in_batches(
+    pages = iter_cve_pages_in_batches(
         NIST_CVE_URL, start_date, end_date, date_param_names, API_KEY,
     )
     # Assert
-    assert mock_call_cves_api.call_count == 2
-    assert cves == excepted_cves
+    assert next(pages) is GET_CVE_API_DATA
+    # The second batch is only fetched once the first one has been consumed
+    assert mock_iter_cve_pages.call_count == 1
+    assert list(pages) == [GET_CVE_API_DATA_BATCH_2]
+    assert mock_iter_cve_pages.call_count == 2
 
 
-@patch("cartography.intel.cve.feed._call_cves_api")
-def test_get_modified_cves(mock_call_cves_api: Mock):
+@patch("cartography.intel.cve.feed._iter_cve_pages")
+def test_iter_modified_cve_pages(mock_iter_cve_pages: Mock):
     # Arrange
-    mock_call_cves_api.side_effect = [GET_CVE_API_DATA]
+    mock_iter_cve_pages.side_effect = [iter([GET_CVE_API_DATA])]
     last_modified_date = datetime.now(tz=timezone.utc) + timedelta(days=-1)
     last_modified_date_iso8601 = last_modified_date.strftime("%Y-%m-%dT%H:%M:%S")
     current_date_iso8601 = datetime.now(tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
@@ -199,29 +165,88 @@ def test_get_modified_cves(mock_call_cves_api: Mock):
         "lastModEndDate": current_date_iso8601,
     }
     # Act
-    cves = get_modified_cves(NIST_CVE_URL, last_modified_date_iso8601, API_KEY)
+    pages = list(iter_modified_cve_pages(NIST_CVE_URL, last_modified_date_iso8601, API_KEY))
     # Assert
-    mock_call_cves_api.assert_called_once_with(NIST_CVE_URL, API_KEY, expected_params)
-    assert cves == GET_CVE_API_DATA
+    mock_iter_cve_pages.assert_called_once()
+    assert mock_iter_cve_pages.call_args.args[:3] == (NIST_CVE_URL, API_KEY, expected_params)
+    assert pages == [GET_CVE_API_DATA]
+
+
+def test_transform_cve_pages_yields_bounded_chunks():
+    pages = [
+        {
+            "vulnerabilities": [
+                {"cve": {"id": f"CVE-2024-{p}{i}", "descriptions": [], "references": []}} for i in range(n)
+            ],
+        }
+        for p, n in enumerate([3, 0, 1, 4])
+    ]
 
+    chunks = list(transform_cve_pages(iter(pages), chunk_size=3))
 
-@patch("cartography.intel.cve.feed._call_cves_api")
-def test_get_published_cves_per_year(mock_call_cves_api: Mock):
-    # Arrange
-    no_cves = {
-        "resultsPerPage": 0,
-        "startIndex": 4000,
-        "totalResults": 4000,
-        "format": "NVD_CVE",
-        "version": "2.0",
-        "timestamp": "2024-01-10T19:30:07.520",
-        "vulnerabilities": [],
-    }
-    expected_cves = GET_CVE_API_DATA.copy()
-    _map_cve_dict(expected_cves, no_cves)
-    mock_call_cves_api.side_effect = [GET_CVE_API_DATA, no_cves, no_cves, no_cves]
-    # Act
-    cves = get_published_cves_per_year(NIST_CVE_URL, "2024", API_KEY)
-    # Assert
-    mock_call_cves_api.call_count == 4
-    assert cves == expected_cves
+    assert [len(chunk) for chunk in chunks] == [3, 3, 2]
+    assert [cve["id"] for chunk in chunks for cve in chunk] == [
+        "CVE-2024-00", "CVE-2024-01", "CVE-2024-02", "CVE-2024-20", "CVE-2024-30", "CVE-2024-31", "CVE-2024-32",
+        "CVE-2024-33",
+    ]
+
+
+@patch("cartography.intel.cve.feed.time.sleep")
+@patch("cartography.intel.cve.feed.time.monotonic")
+def test_request_pacer_waits_only_when_window_is_full(mock_monotonic: Mock, mock_sleep: Mock):
+    mock_monotonic.return_value = 100.0
+    pacer = RequestPacer(max_requests=2, window_seconds=30)
+
+    pacer.wait()
+    pacer.wait()
+    mock_sleep.assert_not_called()
+
+    mock_monotonic.return_value = 110.0
+    pacer.wait()
+    mock_sleep.assert_called_once_with(20.0)
+
+
+@patch("cartography.intel.cve.feed.time.sleep")
+@patch("cartography.intel.cve.feed.time.monotonic", return_value=100.0)
+def test_request_pacer_follows_response_headers(mock_monotonic: Mock, mock_sleep: Mock):
+    pacer = RequestPacer(max_requests=5)
+
+    assert not pacer.update_from_headers({"X-RateLimit-Limit": "1"})
+    assert pacer.max_requests == 1
+    assert pacer.update_from_headers({"Retry-After": "12"})
+    pacer.wait()
+    mock_sleep.assert_called_once_with(12.0)
+
+
+@patch("cartography.intel.cve.feed.time.sleep")
+@patch("cartography.intel.cve.feed.requests.get")
+def test_iter_cve_pages_backs_off_when_rate_limited(mock_get: Mock, mock_sleep: Mock):
+    rate_limited = Mock()
+    rate_limited.status_code = 403
+    rate_limited.headers = {}
+    rate_limited.raise_for_status.side_effect = requests.exceptions.HTTPError(response=rate_limited)
+    page = Mock()
+    page.headers = {}
+    page.json.return_value = {**GET_CVE_API_DATA, "resultsPerPage": 0, "totalResults": 0}
+    mock_get.side_effect = [rate_limited, page]
+
+    pages = list(_iter_cve_pages(NIST_CVE_URL, API_KEY, {}, RequestPacer(max_requests=50, window_seconds=30)))
+
+    assert len(pages) == 1
+    assert mock_sleep.call_count == 1
+    assert 29 < mock_sleep.call_args.args[0] <= 30
+
+
+@patch("cartography.intel.cve.feed._iter_cve_pages")
+def test_iter_published_cve_pages_per_year(mock_iter_cve_pages: Mock):
+    mock_iter_cve_pages.side_effect = lambda url, api_key, params, pacer: iter([params])
+
+    pages = list(iter_published_cve_pages_per_year(NIST_CVE_URL, "2024", API_KEY))
+
+    # 366 days in 2024, in ranges of at most 120 days
+    assert [page["pubStartDate"] for page in pages] == [
+        "2024-01-01T00:00:00", "2024-04-30T00:00:00", "2024-08-28T00:00:00", "2024-12-26T00:00:00",
+    ]
+    assert pages[-1]["pubEndDate"] == "2025-01-01T00:00:00"
+    # The date ranges share one pacer
+    assert len({id(c.args[3]) for c in mock_iter_cve_pages.call_args_list}) == 1
@@ -1,4 +1,8 @@
+import copy
+from unittest import mock
+
 import cartography.intel.gcp.compute
+from tests.data.gcp.compute import GCP_LIST_INSTANCES_RESPONSE
 from tests.data.gcp.compute import LIST_FIREWALLS_RESPONSE
 from tests.data.gcp.compute import VPC_RESPONSE
 from tests.data.gcp.compute import VPC_SUBNET_RESPONSE
@@ -63,3 +67,71 @@ def test_transform_gcp_firewall():
     assert sample_fw_icmp_rule['fromport'] is None
     assert sample_fw_icmp_rule['toport'] is None
     assert sample_fw_icmp_rule['protocol'] == 'icmp'
+
+
+def test_transform_instance_attachments():
+    instance_list = cartography.intel.gcp.compute.transform_gcp_instances(
+        [copy.deepcopy(GCP_LIST_INSTANCES_RESPONSE)],
+    )
+    instance_id = 'projects/project-abc/zones/europe-west2-b/instances/instance-1'
+    nic_id = f'{instance_id}/networkinterfaces/nic0'
+
+    assert cartography.intel.gcp.compute._transform_instance_tags(instance_list) == [
+        {
+            'InstanceId': instance_id,
+            'TagId': 'projects/project-abc/global/networks/default/tags/test',
+            'TagValue': 'test',
+            'VpcPartialUri': 'projects/project-abc/global/networks/default',
+        },
+    ]
+
+    nics = cartography.intel.gcp.compute._transform_gcp_nics(instance_list)
+    assert [nic['NicId'] for nic in nics] == [nic_id, f'{instance_id}-test/networkinterfaces/nic0']
+    assert nics[0]['SubnetPartialUri'] == 'projects/project-abc/regions/europe-west2/subnetworks/default'
+
+    access_configs = cartography.intel.gcp.compute._transform_gcp_nic_access_configs(instance_list)
+    assert len(access_configs) == 2
+    assert access_configs[0]['NicId'] == nic_id
+    assert access_configs[0]['AccessConfigId'] == f'{nic_id}/accessconfigs/ONE_TO_ONE_NAT'
+    assert access_configs[0]['NatIP'] == '1.2.3.4'
+
+
+def test_transform_firewall_attachments():
+    fw_list = cartography.intel.gcp.compute.transform_gcp_firewall(copy.deepcopy(LIST_FIREWALLS_RESPONSE))
+
+    # One entry per rule and source range; firewalls without sourceRanges contribute none
+    allow_rules = cartography.intel.gcp.compute._transform_firewall_rules(fw_list, 'transformed_allow_list')
+    assert len(allow_rules) == sum(
+        len(fw['transformed_allow_list']) * len(fw.get('sourceRanges', [])) for fw in fw_list
+    )
+    assert allow_rules[1] == {
+        'FwPartialUri': 'projects/project-abc/global/firewalls/default-allow-internal',
+        'RuleId': 'projects/project-abc/global/firewalls/default-allow-internal/allow/0to65535tcp',
+        'Protocol': 'tcp',
+        'FromPort': 0,
+        'ToPort': 65535,
+        'Range': '10.128.0.0/9',
+    }
+    assert cartography.intel.gcp.compute._transform_firewall_rules(fw_list, 'transformed_deny_list') == []
+
+    assert cartography.intel.gcp.compute._transform_target_tags(fw_list) == [
+        {
+            'FwPartialUri': 'projects/project-abc/global/firewalls/custom-port-incoming',
+            'TagId': 'projects/project-abc/global/networks/default/tags/test',
+            'TagValue': 'test',
+        },
+    ]
+
+
+@mock.patch.object(cartography.intel.gcp.compute, 'load_graph_data')
+def test_load_gcp_instances_batches_queries(mock_load_graph_data):
+    instance_list = cartography.intel.gcp.compute.transform_gcp_instances(
+        [copy.deepcopy(GCP_LIST_INSTANCES_RESPONSE)],
+    )
+    neo4j_session = mock.MagicMock()
+
+    cartography.intel.gcp.compute.load_gcp_instances(neo4j_session, instance_list, 1)
+
+    # One load each for instances, tags, NICs, access configs and VPC membership, however many instances there are
+    assert mock_load_graph_data.call_count == 5
+    neo4j_session.run.assert_not_called()
@@ -0,0 +1,75 @@
+import threading
+from unittest import mock
+
+import pytest
+
+from cartography.intel import gcp
+
+ENABLED_SERVICES = {gcp.service_names.compute, gcp.service_names.dns}
+
+
+@pytest.fixture
+def mock_clients():
+    # Every build returns a new client, like googleapiclient.discovery.build()
+    with mock.patch.object(gcp, '_get_serviceusage_resource', side_effect=lambda c: mock.MagicMock()) as serviceusage, \
+            mock.patch.object(gcp, '_get_compute_resource', side_effect=lambda c: mock.MagicMock()) as compute, \
+            mock.patch.object(gcp, '_get_container_resource', side_effect=lambda c: mock.MagicMock()), \
+            mock.patch.object(gcp, '_get_dns_resource', side_effect=lambda c: mock.MagicMock()), \
+            mock.patch.object(gcp, '_get_storage_resource', side_effect=lambda c: mock.MagicMock()):
+        yield serviceusage, compute
+
+
+@mock.patch.object(gcp, 'crm')
+@mock.patch.object(gcp, 'dns')
+@mock.patch.object(gcp, 'gke')
+@mock.patch.object(gcp, 'storage')
+@mock.patch.object(gcp, 'compute')
+@mock.patch.object(gcp, '_services_enabled_on_project', return_value=ENABLED_SERVICES)
+def test_sync_multiple_projects_lists_services_once_per_project(
+    mock_services, mock_compute, mock_storage, mock_gke, mock_dns, mock_crm, mock_clients,
+):
+    mock_serviceusage_builds, mock_compute_builds = mock_clients
+    projects = [{'projectId': f'project-{i}'} for i in range(3)]
+
+    gcp._sync_multiple_projects(mock.MagicMock(), object(), projects, 1, {'UPDATE_TAG': 1})
+
+    assert [c.args[1] for c in mock_services.call_args_list] == ['project-0', 'project-1', 'project-2']
+    assert [c.args[2] for c in mock_compute.sync.call_args_list] == ['project-0', 'project-1', 'project-2']
+    assert mock_dns.sync.call_count == 3
+    mock_storage.sync_gcp_buckets.assert_not_called()
+    mock_gke.sync_gke_clusters.assert_not_called()
+    # Clients are built once for the thread, not once per project and service
+    assert mock_serviceusage_builds.call_count == 1
+    assert mock_compute_builds.call_count == 1
+
+
+@mock.patch.object(gcp, 'get_neo4j_driver', return_value=mock.MagicMock())
+@mock.patch.object(gcp, 'new_neo4j_session')
+@mock.patch.object(gcp, 'crm')
+@mock.patch.object(gcp, 'dns')
+@mock.patch.object(gcp, 'compute')
+@mock.patch.object(gcp, '_services_enabled_on_project', return_value=ENABLED_SERVICES)
+def test_sync_multiple_projects_concurrently(
+    mock_services, mock_compute, mock_dns, mock_crm, mock_new_session, mock_get_driver, mock_clients,
+):
+    clients_by_thread = {}
+    lock = threading.Lock()
+    both_started = threading.Barrier(2, timeout=5)
+
+    def sync_compute(neo4j_session, compute_client, project_id, update_tag, common_job_parameters):
+        with lock:
+            clients_by_thread.setdefault(threading.get_ident(), set()).add(id(compute_client))
+        if project_id in ('project-0', 'project-1'):
+            # Two projects run at the same time
+            both_started.wait()
+
+    mock_compute.sync.side_effect = sync_compute
+    projects = [{'projectId': f'project-{i}'} for i in range(4)]
+
+    gcp._sync_multiple_projects(mock.MagicMock(), object(), projects, 1, {'UPDATE_TAG': 1}, project_concurrency=2)
+
+    assert sorted(c.args[2] for c in mock_compute.sync.call_args_list) == [p['projectId'] for p in projects]
+    assert mock_new_session.call_count == 4
+    # Each worker thread uses its own client for all of its projects
+    assert len(clients_by_thread) == 2
+    assert all(len(clients) == 1 for clients in clients_by_thread.values())
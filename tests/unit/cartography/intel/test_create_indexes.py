@@ -0,0 +1,11 @@
+from cartography.intel.create_indexes import get_all_node_schemas
+from cartography.models.aws.ec2.instances import EC2InstanceSchema
+from cartography.models.core.nodes import CartographyNodeSchema
+
+
+def test_get_all_node_schemas():
+    schemas = get_all_node_schemas()
+
+    assert all(isinstance(schema, CartographyNodeSchema) for schema in schemas)
+    assert any(isinstance(schema, EC2InstanceSchema) for schema in schemas)
+    assert [schema.label for schema in schemas] == sorted(schema.label for schema in schemas)
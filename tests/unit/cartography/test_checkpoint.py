@@ -0,0 +1,78 @@
+from unittest import mock
+
+import pytest
+
+from cartography.checkpoint import CheckpointStore
+from cartography.checkpoint import is_complete
+from cartography.checkpoint import mark_complete
+from cartography.checkpoint import set_checkpoint_store
+from cartography.config import Config
+from cartography.sync import Sync
+
+
+@pytest.fixture
+def checkpoint_store(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'checkpoints.sqlite'), update_tag=1)
+    set_checkpoint_store(store)
+    yield store
+    set_checkpoint_store(None)
+
+
+def test_checkpoint_store_is_keyed_by_update_tag(tmp_path):
+    path = str(tmp_path / 'checkpoints.sqlite')
+    store = CheckpointStore(path, update_tag=1)
+    store.mark_complete('aws', '123456789012', 'ec2:instance')
+    store.mark_complete('aws', '123456789012', 'ec2:instance')
+    store.close()
+
+    resumed = CheckpointStore(path, update_tag=1)
+    assert resumed.is_complete('aws', '123456789012', 'ec2:instance')
+    assert not resumed.is_complete('aws', '123456789012')
+    assert not CheckpointStore(path, update_tag=2).is_complete('aws', '123456789012', 'ec2:instance')
+
+    resumed.clear()
+    assert not resumed.is_complete('aws', '123456789012', 'ec2:instance')
+
+
+def test_clear_forgets_older_update_tags(tmp_path):
+    path = str(tmp_path / 'checkpoints.sqlite')
+    for update_tag in (1, 2, 3):
+        CheckpointStore(path, update_tag).mark_complete('aws', '123456789012')
+
+    CheckpointStore(path, update_tag=2).clear()
+
+    assert not CheckpointStore(path, update_tag=1).is_complete('aws', '123456789012')
+    assert not CheckpointStore(path, update_tag=2).is_complete('aws', '123456789012')
+    assert CheckpointStore(path, update_tag=3).is_complete('aws', '123456789012')
+
+
+def test_module_functions_without_store():
+    set_checkpoint_store(None)
+    mark_complete('aws')
+    assert not is_complete('aws')
+
+
+def test_sync_skips_completed_stages_and_clears_on_success(checkpoint_store):
+    checkpoint_store.mark_complete('first')
+    first = mock.MagicMock()
+    second = mock.MagicMock()
+    sync = Sync()
+    sync.add_stages([('first', first), ('second', second)])
+
+    sync.run(mock.MagicMock(), Config(neo4j_uri='bolt://localhost:7687', update_tag=1))
+
+    first.assert_not_called()
+    second.assert_called_once()
+    assert not checkpoint_store.is_complete('first')
+    assert not checkpoint_store.is_complete('second')
+
+
+def test_sync_keeps_completed_stages_on_failure(checkpoint_store):
+    sync = Sync()
+    sync.add_stages([('first', mock.MagicMock()), ('second', mock.MagicMock(side_effect=RuntimeError('boom')))])
+
+    with pytest.raises(RuntimeError):
+        sync.run(mock.MagicMock(), Config(neo4j_uri='bolt://localhost:7687', update_tag=1))
+
+    assert checkpoint_store.is_complete('first')
+    assert not checkpoint_store.is_complete('second')
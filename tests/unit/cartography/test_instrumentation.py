@@ -0,0 +1,82 @@
+import json
+from unittest import mock
+
+from cartography.client.core.tx import load_graph_data
+from cartography.client.core.tx import LoadBatchBounds
+from cartography.instrumentation import current_operation
+from cartography.instrumentation import get_run_report
+from cartography.instrumentation import operation
+from cartography.instrumentation import reset_run_report
+from cartography.instrumentation import write_run_report
+
+
+def _summary(**counters):
+    summary = mock.MagicMock()
+    summary.result_available_after = 2
+    summary.result_consumed_after = 3
+    summary.profile = {'dbHits': 5, 'children': [{'dbHits': 7, 'children': []}]}
+    for counter in (
+        'nodes_created', 'nodes_deleted', 'relationships_created', 'relationships_deleted', 'properties_set',
+    ):
+        setattr(summary.counters, counter, counters.get(counter, 0))
+    return summary
+
+
+def test_operation_records_nested_operations():
+    reset_run_report()
+
+    with operation('stage', 'aws'):
+        assert current_operation('load') is None
+        for _ in range(2):
+            with operation('load', 'EC2Instance') as stats:
+                assert current_operation('load') is stats
+                stats.rows += 10
+                stats.add_summary(_summary(nodes_created=4))
+
+    report = get_run_report()
+    assert report['operations']['stage']['aws']['count'] == 1
+    load_stats = report['operations']['load']['EC2Instance']
+    assert load_stats['count'] == 2
+    assert load_stats['rows'] == 20
+    assert load_stats['batches'] == 2
+    assert load_stats['result_available_after_ms'] == 4
+    assert load_stats['result_consumed_after_ms'] == 6
+    assert load_stats['db_hits'] == 24
+    assert load_stats['nodes_created'] == 8
+
+
+def test_load_graph_data_is_reported_under_its_operation_name(tmp_path):
+    reset_run_report()
+    neo4j_session = mock.MagicMock()
+    neo4j_session.write_transaction.return_value = _summary(properties_set=3)
+
+    with mock.patch(
+        'cartography.client.core.tx.get_load_batch_bounds',
+        return_value=LoadBatchBounds(min_size=10, max_size=10),
+    ):
+        load_graph_data(
+            neo4j_session,
+            'UNWIND $DictList AS item RETURN item',
+            [{'id': i} for i in range(25)],
+            operation_name=f'{__name__}.load_things',
+        )
+
+    report_path = tmp_path / 'report.json'
+    write_run_report(str(report_path))
+    load_stats = json.loads(report_path.read_text())['operations']['load'][f'{__name__}.load_things']
+    assert load_stats['count'] == 1
+    assert load_stats['batches'] == 3
+    assert load_stats['rows'] == 25
+    assert load_stats['properties_set'] == 9
+    assert load_stats['bytes'] > 0
+
+
+@mock.patch('cartography.instrumentation.stat_handler')
+def test_operation_sends_statsd_timer(mock_stat_handler):
+    with operation('job', 'aws_import_tags_cleanup'):
+        pass
+    with operation('load', 'cartography.intel.aws.iam.load_users'):
+        pass
+
+    timers = [c.args[0] for c in mock_stat_handler.timing.call_args_list]
+    assert timers == ['job.aws_import_tags_cleanup', 'load.cartography_intel_aws_iam_load_users']
@@ -0,0 +1,46 @@
+import pstats
+
+from cartography import profiling
+
+
+def test_profile_writes_dumps_and_summary(tmp_path):
+    profiling.configure(str(tmp_path), profile_nested=True)
+    try:
+        with profiling.profile('aws'):
+            data = [str(i) for i in range(10000)]
+            with profiling.profile('aws.123.ec2:instance', nested=True):
+                nested_data = [str(i) for i in range(20000)]
+        with profiling.profile('gcp'):
+            pass
+    finally:
+        profiling.configure(None)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        '001-aws.123.ec2_instance.allocations.txt',
+        '001-aws.123.ec2_instance.prof',
+        '002-aws.allocations.txt',
+        '002-aws.prof',
+        '003-gcp.allocations.txt',
+        '003-gcp.prof',
+        profiling.SUMMARY_FILE_NAME,
+    ]
+    # The dumps can be read with pstats
+    assert pstats.Stats(str(tmp_path / '002-aws.prof')).total_calls > 0
+
+    summary = (tmp_path / profiling.SUMMARY_FILE_NAME).read_text().splitlines()
+    assert summary[0].split()[0] == 'name'
+    assert [line.split()[0] for line in summary[1:]] == ['aws.123.ec2:instance', 'aws', 'gcp']
+    assert len(data) + len(nested_data) == 30000
+
+
+def test_profile_skips_nested_blocks_unless_requested(tmp_path):
+    profiling.configure(str(tmp_path))
+    try:
+        with profiling.profile('aws'):
+            with profiling.profile('aws.123.ec2:instance', nested=True):
+                pass
+    finally:
+        profiling.configure(None)
+
+    summary = (tmp_path / profiling.SUMMARY_FILE_NAME).read_text().splitlines()
+    assert [line.split()[0] for line in summary[1:]] == ['aws']
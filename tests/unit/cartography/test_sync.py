@@ -1,9 +1,20 @@
+from unittest import mock
+
+import neo4j.exceptions
 import pytest
 
+from cartography.client.core.tx import get_load_batch_bounds
+from cartography.client.core.tx import LoadBatchBounds
+from cartography.client.core.tx import set_load_batch_bounds
+from cartography.config import Config
+from cartography.graph.statement import get_iteration_size_bounds
+from cartography.graph.statement import set_iteration_size_bounds
 from cartography.sync import build_default_sync
 from cartography.sync import build_sync
 from cartography.sync import parse_and_validate_selected_modules
+from cartography.sync import run_with_config
 from cartography.sync import TOP_LEVEL_MODULES
+from cartography.util import STATUS_FAILURE
 
 
 def test_build_default_sync():
@@ -37,3 +48,25 @@ def test_parse_and_validate_selected_modules():
     absolute_garbage = '#@$@#RDFFHKjsdfkjsd,KDFJHW#@,'
     with pytest.raises(ValueError):
         parse_and_validate_selected_modules(absolute_garbage)
+
+
+@mock.patch('cartography.sync.GraphDatabase.driver', side_effect=neo4j.exceptions.ServiceUnavailable('down'))
+def test_run_with_config_lowers_default_min_sizes_to_given_max_sizes(mock_driver):
+    config = Config(
+        neo4j_uri='bolt://localhost:7687',
+        neo4j_load_batch_max_size=200,
+        neo4j_cleanup_iteration_max_size=50,
+        neo4j_cleanup_iteration_target_seconds=1,
+    )
+    try:
+        assert run_with_config(build_sync('analysis'), config) == STATUS_FAILURE
+
+        assert get_load_batch_bounds().min_size == 200
+        assert get_load_batch_bounds().max_size == 200
+        iteration_size_bounds = get_iteration_size_bounds()
+        assert iteration_size_bounds is not None
+        assert iteration_size_bounds.min_size == 50
+        assert iteration_size_bounds.max_size == 50
+    finally:
+        set_load_batch_bounds(LoadBatchBounds())
+        set_iteration_size_bounds(None)
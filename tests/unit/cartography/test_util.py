@@ -9,6 +9,7 @@ import cartography.util
 from cartography import util
 from cartography.util import aws_handle_regions
 from cartography.util import batch
+from cartography.util import iter_batches
 from cartography.util import run_analysis_and_ensure_deps
 
 
@@ -104,6 +105,24 @@ def test_batch(mocker):
     assert batch([], 3) == []
 
 
+def test_iter_batches_is_lazy():
+    # Arrange
+    consumed = []
+
+    def _gen():
+        for i in range(7):
+            consumed.append(i)
+            yield i
+
+    # Act
+    batches = iter_batches(_gen(), 3)
+
+    # Assert that only the first chunk is pulled from the generator
+    assert next(batches) == [0, 1, 2]
+    assert consumed == [0, 1, 2]
+    assert list(batches) == [[3, 4, 5], [6]]
+
+
 @mock.patch.object(cartography.util, 'run_analysis_job', return_value=None)
 def test_run_analysis_and_ensure_deps(mock_run_analysis_job: mock.MagicMock):
     # Arrange
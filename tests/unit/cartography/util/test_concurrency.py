@@ -0,0 +1,166 @@
+import threading
+import time
+from unittest import mock
+
+import botocore
+import pytest
+
+from cartography.util import concurrency
+
+
+@pytest.fixture
+def shared_pool():
+    concurrency.set_max_workers(8)
+    yield
+    concurrency.set_max_workers(concurrency.DEFAULT_MAX_WORKERS)
+
+
+def _tracking_fetch():
+    lock = threading.Lock()
+    running = [0]
+    max_running = [0]
+
+    def _fetch(item):
+        with lock:
+            running[0] += 1
+            max_running[0] = max(max_running[0], running[0])
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+        return item * 2
+
+    return _fetch, max_running
+
+
+def test_map_bounded_caps_concurrency_and_keeps_order(shared_pool):
+    fetch, max_running = _tracking_fetch()
+
+    results = list(concurrency.map_bounded(fetch, range(20), max_concurrency=4))
+
+    assert results == [i * 2 for i in range(20)]
+    assert 1 < max_running[0] <= 4
+
+
+def test_as_completed_caps_concurrency(shared_pool):
+    fetch, max_running = _tracking_fetch()
+
+    results = list(concurrency.as_completed(fetch, range(20), max_concurrency=4))
+
+    assert sorted(results) == [(i, i * 2) for i in range(20)]
+    assert 1 < max_running[0] <= 4
+
+
+@pytest.mark.parametrize('helper', [concurrency.map_bounded, concurrency.as_completed])
+def test_helpers_hold_back_calls_for_slow_consumer(shared_pool, helper):
+    started = []
+
+    def _fetch(item):
+        started.append(item)
+        return item
+
+    results = helper(_fetch, range(20), max_concurrency=4)
+    next(results)
+
+    # Only the first window of items and the replacements for completed ones may have started
+    assert len(started) <= 8
+    results.close()
+
+
+@pytest.mark.parametrize('helper', [concurrency.map_bounded, concurrency.as_completed])
+def test_helpers_raise_call_errors(shared_pool, helper):
+    def _fetch(item):
+        if item == 3:
+            raise ValueError('boom')
+        return item
+
+    with pytest.raises(ValueError):
+        list(helper(_fetch, range(10), max_concurrency=4))
+
+
+def test_map_bounded_runs_inline_with_a_single_worker():
+    threads = set()
+
+    def _fetch(item):
+        threads.add(threading.current_thread())
+        return item
+
+    assert list(concurrency.map_bounded(_fetch, range(5), max_concurrency=1)) == list(range(5))
+    assert threads == {threading.current_thread()}
+
+
+def test_nested_helpers_do_not_deadlock():
+    concurrency.set_max_workers(2)
+    try:
+        def _outer(item):
+            return sum(concurrency.map_bounded(lambda x: x, range(item)))
+
+        assert list(concurrency.map_bounded(_outer, range(6))) == [sum(range(i)) for i in range(6)]
+    finally:
+        concurrency.set_max_workers(concurrency.DEFAULT_MAX_WORKERS)
+
+
+def test_call_with_retry_raises_non_throttling_errors_right_away():
+    func = mock.Mock(side_effect=ValueError('boom'))
+
+    with pytest.raises(ValueError):
+        concurrency.call_with_retry(func, 'item')
+
+    func.assert_called_once_with('item')
+
+
+def _throttling_error():
+    return botocore.exceptions.ClientError({'Error': {'Code': 'Throttling', 'Message': 'Rate exceeded'}}, 'GetObject')
+
+
+@mock.patch('time.sleep')
+def test_call_with_retry_retries_throttling_errors(mock_sleep):
+    func = mock.Mock(side_effect=[_throttling_error(), 'result'])
+
+    assert concurrency.call_with_retry(func, 'item') == 'result'
+    assert func.call_count == 2
+
+
+@pytest.mark.parametrize('helper', [concurrency.map_bounded, concurrency.as_completed])
+def test_helpers_call_once_without_retry(shared_pool, helper):
+    func = mock.Mock(side_effect=_throttling_error())
+
+    with pytest.raises(botocore.exceptions.ClientError):
+        list(helper(func, ['item'], retry=False))
+
+    func.assert_called_once_with('item')
+
+
+def test_call_with_retry_takes_a_rate_limit_token_per_call():
+    concurrency.set_rate_limit('test-service', 100)
+    try:
+        with mock.patch.object(concurrency.RateLimiter, 'acquire') as acquire:
+            assert concurrency.call_with_retry(lambda x: x + 1, 1, service='test-service') == 2
+            assert concurrency.call_with_retry(lambda x: x + 1, 1, service='other-service') == 2
+        acquire.assert_called_once_with()
+    finally:
+        concurrency.set_rate_limit('test-service', None)
+    assert concurrency.get_rate_limiter('test-service') is None
+
+
+def test_rate_limiter_waits_for_tokens():
+    rate_limiter = concurrency.RateLimiter(requests_per_second=50, burst=2)
+
+    start = time.monotonic()
+    for _ in range(4):
+        rate_limiter.acquire()
+
+    # The burst is free, the 2 calls after it each wait about 1/50th of a second
+    assert time.monotonic() - start >= 0.03
+
+
+def test_parse_rate_limit():
+    assert concurrency.parse_rate_limit('kms=20') == ('kms', 20.0)
+    with pytest.raises(ValueError):
+        concurrency.parse_rate_limit('kms')
+    with pytest.raises(ValueError):
+        concurrency.parse_rate_limit('kms=0')
+
+
+def test_set_max_workers_rejects_values_below_one():
+    with pytest.raises(ValueError):
+        concurrency.set_max_workers(0)